@@ -1,6 +1,6 @@
 """Configuration management for weather pipeline"""
 from pydantic_settings import BaseSettings
-from typing import List
+from typing import List, Literal
 from dotenv import load_dotenv
 import os
 
@@ -12,20 +12,100 @@ class Settings(BaseSettings):
 
     # OpenWeatherMap API
     OPENWEATHER_API_KEY: str
+    OPENWEATHER_BASE_URL: str = "https://api.openweathermap.org/data/2.5"
+    WEATHER_API_MAX_CONCURRENCY: int = 10  # Requests in flight during city fan-out
+    WEATHER_API_CITY_TIMEOUT_SECONDS: float = 20.0  # Deadline for each city request attempt
+    OPENWEATHER_CALLS_PER_MINUTE: int = 60  # Free tier quota; split evenly between sharded ingest workers
+    OPENWEATHER_BURST: int = 10  # Calls allowed back-to-back before throttling kicks in
+    OPENWEATHER_MAX_RETRIES: int = 4
+    OPENWEATHER_BACKOFF_BASE_SECONDS: float = 1.0
+    OPENWEATHER_BACKOFF_MAX_SECONDS: float = 60.0
+    OPENWEATHER_USE_GROUP_ENDPOINT: bool = True  # Batch resolved cities through /group
+    OPENWEATHER_GROUP_SIZE: int = 20  # /group accepts at most 20 city IDs per call
+    CITY_ID_CACHE_PATH: str = "data/city_ids.json"  # On-disk cache of resolved city IDs
+    WEATHER_CACHE_MAX_ENTRIES: int = 512  # 0 disables response caching
+    WEATHER_CACHE_REFRESH_SECONDS: int = 600  # OpenWeatherMap station update cadence
+    WEATHER_CACHE_MIN_TTL_SECONDS: int = 60  # Floor for observations already past refresh
 
     # OpenAI API
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
 
+    # Storage
+    STORAGE_BACKEND: Literal["bigquery", "sqlite"] = "bigquery"  # sqlite: embedded local database
+    SQLITE_PATH: str = "data/weather.db"  # Database file for the sqlite backend
+
     # Google BigQuery
     GOOGLE_APPLICATION_CREDENTIALS: str = os.getenv("GOOGLE_APPLICATION_CREDENTIALS", "")
     GCP_PROJECT_ID: str = os.getenv("GCP_PROJECT_ID", "adup-assignment")
     BIGQUERY_DATASET: str = os.getenv("BIGQUERY_DATASET", "weather_data")
     BIGQUERY_TABLE: str = os.getenv("BIGQUERY_TABLE", "weather_records")
+    BIGQUERY_MAX_WORKERS: int = 8  # Threads running blocking BigQuery client calls
+    BIGQUERY_QUERY_TIMEOUT_SECONDS: float = 60.0  # Query jobs are cancelled after this
+    BIGQUERY_LOAD_TIMEOUT_SECONDS: float = 300.0  # Load jobs are cancelled after this
+    BIGQUERY_WRITE_MODE: Literal["append", "merge"] = "merge"  # merge: stage, then insert only unseen record IDs
+    BIGQUERY_LOAD_FORMAT: Literal["json", "parquet"] = "json"  # Payload format for load jobs; parquet is smaller and faster to encode
+    BIGQUERY_AUTO_MIGRATE: bool = True  # Rebuild legacy unpartitioned tables at startup
+    LATEST_LOOKBACK_DAYS: int = 7  # Partitions scanned when looking up latest observations
+
+    # Repository result cache for history, statistics and rollup reads
+    RESULT_CACHE_MAX_BYTES: int = 64 * 1024 * 1024  # 0 disables the cache
+    RESULT_CACHE_TTL_SECONDS: float = 900.0  # Bounds staleness if shared invalidation misses a write
+
+    # Local read replica of the BigQuery weather table
+    REPLICA_ENABLED: bool = False  # Serve reads from a local SQLite copy synced from BigQuery
+    REPLICA_SQLITE_PATH: str = "data/replica.db"
+    REPLICA_STATE_PATH: str = "data/replica_state.json"  # Persisted sync watermark
+    REPLICA_SYNC_INTERVAL_SECONDS: float = 300.0
+    REPLICA_MAX_STALENESS_SECONDS: float = 900.0  # Reads go to BigQuery once the last sync is older
+    REPLICA_SYNC_OVERLAP_SECONDS: float = 900.0  # Re-read window for loads that commit after later ones
+    REPLICA_SYNC_BATCH_ROWS: int = 50000  # Rows pulled per query during a sync
+    REPLICA_RETENTION_DAYS: int = 60  # Matches the longest history the API serves
     
     # Application
     BACKFILL_DAYS: int = 3  # 3 days of historical data
+    BACKFILL_BATCH_ROWS: int = 10000  # Rows generated and loaded per backfill load job
+    BACKFILL_CHECKPOINT_PATH: str = "data/backfill_checkpoint.json"  # Last backfilled hour per city
     UPDATE_INTERVAL_HOURS: int = 1
+    EMBEDDED_SCHEDULER_ENABLED: bool = True  # false: the API only serves reads; run `python -m app.worker` to ingest
+    WORKER_METRICS_HOST: str = "0.0.0.0"
+    WORKER_METRICS_PORT: int = 9100  # /health and /stats of the standalone worker; 0 disables; one port per worker on a host
+    SCHEDULER_LEADER_ELECTION: bool = True  # Only the process holding the lease runs ingestion jobs
+    SCHEDULER_LEASE_PATH: str = "data/scheduler_lease.db"  # Shared by every worker on the host
+    SCHEDULER_LEASE_TTL_SECONDS: float = 15.0  # A dead leader is replaced within this long
+    SCHEDULER_LEASE_HEARTBEAT_SECONDS: float = 5.0
+    INGEST_SHARDING_ENABLED: bool = False  # Every worker ingests its consistent-hash share of CITIES
+    INGEST_MEMBER_ID: str = ""  # ID in the ingest ring; defaults to <hostname>-<pid>
+    INGEST_MEMBERSHIP_PATH: str = "data/ingest_members.db"  # Shared by every ingest worker
+    INGEST_MEMBER_TTL_SECONDS: float = 30.0  # A silent worker's cities move to the others after this
+    INGEST_MEMBER_HEARTBEAT_SECONDS: float = 10.0
+    INGEST_RING_VNODES: int = 160  # Ring points per worker; more evens out shard sizes
+    ADAPTIVE_POLLING_ENABLED: bool = False  # Poll each city at its own interval instead of UPDATE_INTERVAL_HOURS
+    ADAPTIVE_POLL_MIN_INTERVAL_MINUTES: float = 10.0  # OpenWeatherMap refreshes stations about this often
+    ADAPTIVE_POLL_MAX_INTERVAL_MINUTES: float = 180.0
+    ADAPTIVE_POLL_CHANGE_PER_POLL: float = 1.0  # Target change between polls (1 unit = 1 C, 5% humidity, 1 m/s or a new condition)
+    ADAPTIVE_POLL_MAX_POLLS_PER_HOUR: float = 600.0  # City fetches per hour, split between sharded workers; intervals stretch to fit
+    ADAPTIVE_POLL_TICK_SECONDS: int = 60  # How often due cities are checked
+    INGEST_PIPELINE_QUEUE_RECORDS: int = 500  # Fetched records buffered ahead of the writer
+    INGEST_PIPELINE_FLUSH_RECORDS: int = 50  # Hourly update writes a batch once this many are buffered...
+    INGEST_PIPELINE_FLUSH_SECONDS: float = 5.0  # ...or this long after the oldest buffered record arrived
+    LATEST_STORE_MAX_AGE_SECONDS: int = 3900  # In-memory latest entries older than this are re-read
+    SHARED_INVALIDATION_ENABLED: bool = True  # Processes drop cached reads of cities another process wrote
+    SHARED_INVALIDATION_POLL_SECONDS: float = 2.0  # How often write generations in SCHEDULER_LEASE_PATH are checked
+    SPOOL_ENABLED: bool = True  # Write hourly observations to a local spool before BigQuery
+    SPOOL_DIR: str = "data/spool"  # Segment files awaiting load
+    SPOOL_SEGMENT_MAX_BYTES: int = 8 * 1024 * 1024  # Active segment is sealed past this size
+    SPOOL_FLUSH_BATCH_RECORDS: int = 10000  # Segments are combined up to this many records per load
+    SPOOL_FLUSH_INTERVAL_SECONDS: float = 30.0  # Flusher also wakes after every append
+    SPOOL_BACKOFF_BASE_SECONDS: float = 5.0
+    SPOOL_BACKOFF_MAX_SECONDS: float = 600.0
     
+    # HTTP responses
+    HISTORY_PAGE_DEFAULT_ROWS: int = 1000  # Page size when a cursor is given without a limit
+    HISTORY_PAGE_MAX_ROWS: int = 5000
+    HISTORY_STREAM_CHUNK_ROWS: int = 1000  # Rows read from storage per chunk for ndjson history
+    HTTP_GZIP_MINIMUM_BYTES: int = 1024  # Smaller bodies are sent uncompressed
+    HTTP_GZIP_LEVEL: int = 5  # Most of level 9's ratio on weather JSON at a fraction of the CPU
+
     # Cities to track 
     CITIES: List[str] = [
         # Europe
@@ -0,0 +1,39 @@
+"""FastAPI dependencies for application-scoped resources
+
+The repository, OpenWeatherMap client and scheduler are created once in
+the `lifespan` hook in main.py and stored on `app.state`; routes receive
+them through these dependencies instead of building their own.
+"""
+from fastapi import Request
+from app.repositories.base import WeatherRepository
+from app.services.latest_store import LatestObservationStore
+from app.services.weather_api import WeatherAPIClient
+from app.services.weather_agent import WeatherAgent
+
+
+def get_repository(request: Request) -> WeatherRepository:
+    """Dependency for the shared weather repository"""
+    return request.app.state.repository
+
+
+def get_latest_store(request: Request) -> LatestObservationStore:
+    """Dependency for the in-memory latest observation store"""
+    return request.app.state.latest_store
+
+
+def get_weather_client(request: Request) -> WeatherAPIClient:
+    """Dependency for the shared OpenWeatherMap client"""
+    return request.app.state.weather_client
+
+
+def get_weather_agent(request: Request) -> WeatherAgent:
+    """Get or create the application-scoped weather agent"""
+    agent = getattr(request.app.state, "weather_agent", None)
+    if agent is None:
+        agent = WeatherAgent(
+            repository=get_repository(request),
+            weather_client=get_weather_client(request),
+            latest_store=get_latest_store(request)
+        )
+        request.app.state.weather_agent = agent
+    return agent
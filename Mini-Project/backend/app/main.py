@@ -1,13 +1,25 @@
 """Main FastAPI application"""
+import asyncio
 import logging
 import sys
+from functools import partial
+from typing import List, Optional
 from contextlib import asynccontextmanager
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from app.routes.weather import router as weather_router
 from app.routes.agent import router as agent_router
 from app.routes.tourist import router as tourist_router
-from app.scheduler import weather_scheduler
+from app.config import settings
+from app.repositories import create_repository
+from app.repositories.cached_repo import CachedRepository
+from app.scheduler import WeatherScheduler
+from app.services.latest_store import LatestObservationStore
+from app.services.spool import create_spool
+from app.services.weather_api import WeatherAPIClient
+from app.services.weather_cache import weather_response_cache
+from app.services.write_generations import ROLLUPS_SCOPE, create_write_generations
 
 # Configure logging
 logging.basicConfig(
@@ -21,20 +33,78 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+async def _initialize_in_background(repository, weather_scheduler: Optional[WeatherScheduler]):
+    """Create storage objects and start the embedded scheduler without delaying startup"""
+    try:
+        if weather_scheduler is not None:
+            await weather_scheduler.start()
+        else:
+            # Migrations are left to the ingest worker's scheduler
+            await repository.initialize_schema(migrate=False)
+    except Exception as e:
+        logger.error(f"Background initialization failed: {str(e)}")
+
+
+async def _drop_remote_writes(latest_store: LatestObservationStore, repository, scopes: List[str]):
+    """Make reads of cities another process just wrote go back to the repository"""
+    city_keys = [scope for scope in scopes if scope != ROLLUPS_SCOPE]
+    latest_store.invalidate(city_keys)
+    if isinstance(repository, CachedRepository):
+        repository.cache.invalidate_cities(city_keys)
+        if ROLLUPS_SCOPE in scopes:
+            repository.cache.invalidate_kinds({"hourly", "daily"})
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     Lifespan context manager for startup and shutdown events
+
+    Creates the application-scoped repository and OpenWeatherMap client
+    shared by routes, the scheduler and the agent (see app.dependencies).
+    Schema creation and the embedded scheduler start in the background, so
+    the API serves requests as soon as routes are imported. With
+    EMBEDDED_SCHEDULER_ENABLED=false ingestion runs in `python -m app.worker`.
     """
     # Startup
     logger.info("Starting Weather Pipeline Application")
-    await weather_scheduler.start()
+    repository = create_repository()
+    weather_client = WeatherAPIClient()
+    latest_store = LatestObservationStore(max_age_seconds=settings.LATEST_STORE_MAX_AGE_SECONDS)
+    write_generations = create_write_generations(partial(_drop_remote_writes, latest_store, repository))
+    weather_scheduler = None
+    if settings.EMBEDDED_SCHEDULER_ENABLED:
+        weather_scheduler = WeatherScheduler(
+            repository, weather_client, latest_store, create_spool(), write_generations
+        )
+    else:
+        logger.info("Embedded scheduler disabled; ingestion runs in a separate worker")
+
+    app.state.repository = repository
+    app.state.weather_client = weather_client
+    app.state.latest_store = latest_store
+    app.state.weather_scheduler = weather_scheduler
+    app.state.write_generations = write_generations
+
+    # Warm in the background; reads fall back to the repository until it completes
+    warm_task = asyncio.create_task(latest_store.warm(repository))
+    init_task = asyncio.create_task(_initialize_in_background(repository, weather_scheduler))
+    if write_generations is not None:
+        # Picks up writes by the scheduler leader or the ingest worker
+        write_generations.start()
     
     yield
     
     # Shutdown
     logger.info("Shutting down Weather Pipeline Application")
-    await weather_scheduler.shutdown()
+    warm_task.cancel()
+    init_task.cancel()
+    if write_generations is not None:
+        await write_generations.stop()
+    if weather_scheduler is not None:
+        await weather_scheduler.shutdown()
+    await weather_client.aclose()
+    await repository.close()
 
 
 # Create FastAPI application
@@ -54,6 +124,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress JSON bodies above the threshold for clients sending Accept-Encoding: gzip
+app.add_middleware(
+    GZipMiddleware,
+    minimum_size=settings.HTTP_GZIP_MINIMUM_BYTES,
+    compresslevel=settings.HTTP_GZIP_LEVEL
+)
+
 # Include routers
 app.include_router(weather_router)
 app.include_router(agent_router)
@@ -71,11 +148,26 @@ async def root():
 
 
 @app.get("/health", tags=["health"])
-async def health_check():
+async def health_check(request: Request):
     """Health check endpoint"""
     return {
         "status": "healthy",
-        "scheduler": "running"
+        "scheduler": "running" if request.app.state.weather_scheduler is not None else "external"
+    }
+
+
+@app.get("/stats", tags=["health"])
+async def pipeline_stats(request: Request):
+    """Runtime counters for caches and the ingestion pipeline"""
+    return {
+        "weather_cache": weather_response_cache.stats(),
+        "latest_store": request.app.state.latest_store.stats(),
+        "shared_invalidation": generations.stats() if (generations := request.app.state.write_generations) else None,
+        "last_fetch_run": request.app.state.weather_client.last_run_report,
+        "fetch_totals": request.app.state.weather_client.total_stats.as_dict(),
+        "scheduler": weather_scheduler.stats() if (weather_scheduler := request.app.state.weather_scheduler) else None,
+        "spool": flusher.stats() if weather_scheduler and (flusher := weather_scheduler.flusher) else None,
+        "repository": request.app.state.repository.stats()
     }
 
 
@@ -1,19 +1,171 @@
 """Pydantic models for weather data"""
-from pydantic import BaseModel, Field
-from datetime import datetime
-from typing import Optional
+from pydantic import BaseModel, Field, model_validator
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+import base64
+import hashlib
 import uuid
+import numpy as np
+
+# Namespace for deterministic weather record IDs (uuid5)
+WEATHER_ID_NAMESPACE = uuid.UUID("5b0b6c1e-7f0a-4d8e-9c1a-3e2f4a6b8d10")
+_NAMESPACE_BYTES = WEATHER_ID_NAMESPACE.bytes
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def normalize_city(city: str) -> str:
+    """
+    Normalize a city name for case- and whitespace-insensitive lookups
+
+    Matches the `city_key` column stored in BigQuery, which is computed
+    in SQL as LOWER(REGEXP_REPLACE(TRIM(city), r'\s+', ' ')).
+    """
+    return " ".join(city.split()).lower()
+
+
+def weather_record_id_from_key(city_key: str, timestamp_us: int) -> str:
+    """
+    Deterministic record ID from a normalized city and epoch microseconds
+
+    Equal to str(uuid.uuid5(WEATHER_ID_NAMESPACE, f"{city_key}@{timestamp_us}")),
+    built directly from the SHA-1 digest because it runs once per backfill row.
+    """
+    digest = bytearray(hashlib.sha1(_NAMESPACE_BYTES + f"{city_key}@{timestamp_us}".encode()).digest()[:16])
+    digest[6] = (digest[6] & 0x0F) | 0x50  # version 5
+    digest[8] = (digest[8] & 0x3F) | 0x80  # RFC 4122 variant
+    value = digest.hex()
+    return f"{value[:8]}-{value[8:12]}-{value[12:16]}-{value[16:20]}-{value[20:]}"
+
+
+def weather_record_id(city: str, timestamp: datetime) -> str:
+    """
+    Deterministic record ID for one observation of a city
+
+    The same (city, observation time) always yields the same ID, so a
+    repeated fetch or backfill of an unchanged observation can be
+    de-duplicated on write. Naive timestamps are treated as UTC.
+    """
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    timestamp_us = (timestamp - _EPOCH) // timedelta(microseconds=1)
+    return weather_record_id_from_key(normalize_city(city), timestamp_us)
+
+
+@dataclass
+class WeatherBatch:
+    """
+    A block of weather rows stored as parallel NumPy columns
+
+    Rows are ordered by timestamp, then city. Timestamps are UTC
+    datetime64[us]; `city` and `condition` are object arrays of str.
+    """
+    city: np.ndarray
+    city_key: np.ndarray
+    timestamp: np.ndarray
+    temperature: np.ndarray
+    humidity: np.ndarray
+    wind_speed: np.ndarray
+    condition: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    @property
+    def first_timestamp(self) -> datetime:
+        """Earliest timestamp in the batch"""
+        return self._to_datetime(self.timestamp.min())
+
+    @property
+    def last_timestamp(self) -> datetime:
+        """Latest timestamp in the batch"""
+        return self._to_datetime(self.timestamp.max())
+
+    @staticmethod
+    def _to_datetime(value: np.datetime64) -> datetime:
+        return datetime(1970, 1, 1, tzinfo=timezone.utc) + timedelta(microseconds=int(value.astype(np.int64)))
+
+    def to_rows(self) -> List[dict]:
+        """Convert to the JSON rows accepted by a BigQuery load job"""
+        timestamps = np.char.add(
+            np.datetime_as_string(self.timestamp, unit="us"), "+00:00"
+        ).tolist()
+        return [
+            {
+                "id": weather_record_id_from_key(city_key, timestamp_us),
+                "city": city,
+                "city_key": city_key,
+                "timestamp": timestamp,
+                "temperature": temperature,
+                "humidity": humidity,
+                "wind_speed": wind_speed,
+                "condition": condition
+            }
+            for city, city_key, timestamp_us, timestamp, temperature, humidity, wind_speed, condition in zip(
+                self.city.tolist(),
+                self.city_key.tolist(),
+                self.timestamp.astype(np.int64).tolist(),
+                timestamps,
+                self.temperature.tolist(),
+                self.humidity.tolist(),
+                self.wind_speed.tolist(),
+                self.condition.tolist()
+            )
+        ]
+
+
+def _cursor_check(payload: str) -> str:
+    """Short digest that makes edited or truncated cursors fail to decode"""
+    return hashlib.sha1(f"history-cursor:{payload}".encode()).hexdigest()[:8]
+
+
+def encode_history_cursor(timestamp: datetime, record_id: str) -> str:
+    """Opaque cursor pointing just past a history row in (timestamp, id) order"""
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    timestamp_us = (timestamp - _EPOCH) // timedelta(microseconds=1)
+    payload = f"{timestamp_us}:{record_id}"
+    return base64.urlsafe_b64encode(f"{payload}:{_cursor_check(payload)}".encode()).decode().rstrip("=")
+
+
+def decode_history_cursor(cursor: str) -> Tuple[datetime, str]:
+    """
+    Parse a cursor made by encode_history_cursor
+
+    The check digest catches cursors that were edited or cut short; it
+    is not a signature, but a cursor only positions a page within
+    history the caller can already read.
+
+    Raises:
+        ValueError: If the cursor is malformed or fails its check
+    """
+    try:
+        decoded = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        payload, check = decoded.rsplit(":", 1)
+        if check != _cursor_check(payload):
+            raise ValueError("check digest mismatch")
+        timestamp_us, record_id = payload.split(":", 1)
+        uuid.UUID(record_id)
+        return _EPOCH + timedelta(microseconds=int(timestamp_us)), record_id
+    except (ValueError, UnicodeDecodeError, OverflowError) as e:
+        raise ValueError(f"Invalid history cursor: {cursor}") from e
 
 
 class WeatherData(BaseModel):
     """Normalized weather data model"""
-    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = ""  # Derived from (city, timestamp) when not given
     city: str
     timestamp: datetime
     temperature: float  # Celsius
     humidity: int  # Percentage
     wind_speed: float  # m/s
     condition: str  # Weather description
+
+    @model_validator(mode="after")
+    def derive_id(self) -> "WeatherData":
+        if not self.id:
+            self.id = weather_record_id(self.city, self.timestamp)
+        return self
     
     class Config:
         json_schema_extra = {
@@ -29,6 +181,36 @@ class WeatherData(BaseModel):
         }
 
 
+class WeatherStatistics(BaseModel):
+    """Aggregate weather statistics for a city over a period"""
+    city: str
+    record_count: int
+    average_temperature: float  # Celsius
+    min_temperature: float  # Celsius
+    max_temperature: float  # Celsius
+    average_humidity: float  # Percentage
+    recent_records: list[WeatherData] = []  # Newest first, bounded sample
+
+
+class ConditionCount(BaseModel):
+    """Number of observations with a given condition in an aggregate bucket"""
+    condition: str
+    count: int
+
+
+class WeatherAggregate(BaseModel):
+    """Pre-aggregated weather for one city over one hour or day"""
+    city: str
+    bucket_start: datetime
+    record_count: int
+    min_temperature: float  # Celsius
+    max_temperature: float  # Celsius
+    mean_temperature: float  # Celsius
+    mean_humidity: float  # Percentage
+    mean_wind_speed: float  # m/s
+    condition_counts: list[ConditionCount] = []  # Most frequent first
+
+
 class OpenWeatherResponse(BaseModel):
     """OpenWeatherMap API response model"""
     coord: dict
@@ -61,6 +243,16 @@ class WeatherHistoryResponse(BaseModel):
     city: str
     records: list[WeatherLatestResponse]
     count: int
+    resolution: str = "raw"
+    next_cursor: Optional[str] = None  # Set when more pages follow
+
+
+class WeatherAggregateHistoryResponse(BaseModel):
+    """Response model for weather history served from rollup tables"""
+    city: str
+    resolution: str  # "hourly" or "daily"
+    records: list[WeatherAggregate]
+    count: int
 
 
 class AgentQueryRequest(BaseModel):
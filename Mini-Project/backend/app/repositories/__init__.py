@@ -1 +1,71 @@
-"""Repositories package"""
\ No newline at end of file
+"""Repositories package"""
+from app.repositories.base import WeatherRepository
+from app.config import settings
+
+
+def create_repository(backend: str = None) -> WeatherRepository:
+    """
+    Build the storage backend selected by STORAGE_BACKEND
+
+    The backend is wrapped in a write-invalidated result cache unless
+    RESULT_CACHE_MAX_BYTES is 0.
+
+    With REPLICA_ENABLED, BigQuery is wrapped so reads are served from a
+    local SQLite replica kept in sync in the background.
+
+    Args:
+        backend: "bigquery" or "sqlite"; defaults to the configured backend
+
+    Returns:
+        WeatherRepository instance
+    """
+    repository = _create_backend(backend or settings.STORAGE_BACKEND)
+    if settings.RESULT_CACHE_MAX_BYTES <= 0:
+        return repository
+
+    from app.repositories.cached_repo import CachedRepository, QueryResultCache
+    return CachedRepository(
+        repository,
+        QueryResultCache(settings.RESULT_CACHE_MAX_BYTES, settings.RESULT_CACHE_TTL_SECONDS)
+    )
+
+
+def _create_backend(backend: str) -> WeatherRepository:
+    if backend == "bigquery":
+        from app.repositories.bigquery_repo import BigQueryRepository
+        if not settings.REPLICA_ENABLED:
+            return BigQueryRepository()
+
+        from app.repositories.replicated_repo import ReplicatedRepository, ReplicaSynchronizer
+        from app.repositories.sqlite_repo import SQLiteRepository
+        from app.services.leader import SQLiteLease, default_holder_id
+        primary = BigQueryRepository()
+        replica = SQLiteRepository(settings.REPLICA_SQLITE_PATH)
+        return ReplicatedRepository(
+            primary,
+            replica,
+            ReplicaSynchronizer(
+                primary,
+                replica,
+                state_path=settings.REPLICA_STATE_PATH,
+                interval_seconds=settings.REPLICA_SYNC_INTERVAL_SECONDS,
+                max_staleness_seconds=settings.REPLICA_MAX_STALENESS_SECONDS,
+                overlap_seconds=settings.REPLICA_SYNC_OVERLAP_SECONDS,
+                batch_rows=settings.REPLICA_SYNC_BATCH_ROWS,
+                retention_days=settings.REPLICA_RETENTION_DAYS,
+                lease=SQLiteLease(
+                    settings.SCHEDULER_LEASE_PATH,
+                    name="replica_sync",
+                    holder_id=default_holder_id(),
+                    ttl_seconds=settings.SCHEDULER_LEASE_TTL_SECONDS
+                ) if settings.SCHEDULER_LEADER_ELECTION else None,
+                lease_heartbeat_seconds=settings.SCHEDULER_LEASE_HEARTBEAT_SECONDS
+            )
+        )
+    if backend == "sqlite":
+        from app.repositories.sqlite_repo import SQLiteRepository
+        return SQLiteRepository(settings.SQLITE_PATH)
+    raise ValueError(f"Unknown storage backend: {backend}")
+
+
+__all__ = ["WeatherRepository", "create_repository"]
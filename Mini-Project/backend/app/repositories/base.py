@@ -0,0 +1,121 @@
+"""Storage interface shared by all weather repository backends"""
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Tuple
+from app.models import WeatherAggregate, WeatherBatch, WeatherData, WeatherStatistics
+
+
+class WeatherRepository(ABC):
+    """
+    Operations the pipeline, API routes and agent need from storage
+
+    Implementations must be safe to call from the event loop: blocking
+    client or driver calls run off-loop. Writes are idempotent on record
+    `id` where the backend supports it.
+    """
+
+    @abstractmethod
+    async def initialize_schema(self, migrate: bool = True):
+        """
+        Create tables (and any supporting objects) if they don't exist
+
+        Args:
+            migrate: Also rewrite existing tables whose layout is outdated.
+                Only one process should migrate at a time; the others pass
+                False (see WeatherScheduler.start).
+        """
+
+    @abstractmethod
+    async def insert_weather_data(self, weather_records: List[WeatherData]) -> int:
+        """
+        Store weather observations
+
+        Returns:
+            Number of records attempted to insert
+        """
+
+    @abstractmethod
+    async def insert_weather_batch(self, batch: WeatherBatch) -> int:
+        """
+        Store a column-oriented batch of weather observations
+
+        Returns:
+            Number of records attempted to insert
+        """
+
+    @abstractmethod
+    async def get_latest_weather(self, city: str) -> Optional[WeatherData]:
+        """Newest observation for a city, or None"""
+
+    @abstractmethod
+    async def get_latest_weather_bulk(self, cities: Optional[List[str]] = None) -> List[WeatherData]:
+        """Newest observation for each of `cities`, or for every city when None"""
+
+    @abstractmethod
+    async def get_weather_history(self, city: str, days: int) -> List[WeatherData]:
+        """Observations for a city over the last `days` days, newest first"""
+
+    @abstractmethod
+    async def get_weather_history_page(
+        self,
+        city: str,
+        days: int,
+        limit: int,
+        after: Optional[Tuple[datetime, str]] = None
+    ) -> List[WeatherData]:
+        """
+        Up to `limit` observations for a city, newest first in (timestamp, id) order
+
+        `after` is the (timestamp, id) of the last row of the previous page;
+        only rows strictly after it in that order are returned.
+        """
+
+    async def iter_weather_history(
+        self,
+        city: str,
+        days: int,
+        chunk_rows: int
+    ) -> AsyncIterator[List[WeatherData]]:
+        """
+        Stream a city's history newest first in chunks of up to `chunk_rows`
+
+        The default walks keyset pages, so only one chunk is held at a time.
+        """
+        after = None
+        while True:
+            page = await self.get_weather_history_page(city, days, chunk_rows, after)
+            if page:
+                yield page
+            if len(page) < chunk_rows:
+                return
+            after = (page[-1].timestamp, page[-1].id)
+
+    @abstractmethod
+    async def get_weather_statistics(
+        self,
+        city: str,
+        days: int,
+        sample_size: int = 10
+    ) -> Optional[WeatherStatistics]:
+        """Aggregates and the newest `sample_size` records for a city, or None"""
+
+    @abstractmethod
+    async def refresh_rollups(self, since: datetime):
+        """Recompute hourly/daily aggregates for buckets touched since `since`"""
+
+    @abstractmethod
+    async def get_weather_rollups(
+        self,
+        city: str,
+        days: int,
+        resolution: str
+    ) -> List[WeatherAggregate]:
+        """Hourly or daily aggregates for a city, newest bucket first"""
+
+    @abstractmethod
+    async def close(self):
+        """Release connections and worker threads"""
+
+    def stats(self) -> dict:
+        """Backend counters for monitoring"""
+        return {}
@@ -1,26 +1,201 @@
 """BigQuery repository for weather data storage and retrieval"""
+import asyncio
+import functools
+import io
 import logging
-from datetime import datetime, timedelta
-from typing import List, Optional
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Callable, List, Optional, Tuple, Union
 from google.cloud import bigquery
 from google.cloud.exceptions import NotFound
-from app.models import WeatherData
+from app.models import (
+    ConditionCount,
+    WeatherAggregate,
+    WeatherBatch,
+    WeatherData,
+    WeatherStatistics,
+    normalize_city,
+)
+from app.repositories.base import WeatherRepository
+from app.repositories.load_formats import (
+    batch_to_arrow,
+    records_to_arrow,
+    records_to_json_rows,
+    to_parquet_bytes,
+)
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Table layout: partitioned by day of `timestamp`, clustered on the
+# normalized `city_key` so city filters can prune storage blocks.
+WEATHER_SCHEMA = [
+    bigquery.SchemaField("id", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("city", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("city_key", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("timestamp", "TIMESTAMP", mode="REQUIRED"),
+    bigquery.SchemaField("temperature", "FLOAT64", mode="REQUIRED"),
+    bigquery.SchemaField("humidity", "INTEGER", mode="REQUIRED"),
+    bigquery.SchemaField("wind_speed", "FLOAT64", mode="REQUIRED"),
+    bigquery.SchemaField("condition", "STRING", mode="REQUIRED"),
+    # Load time, used as the change watermark by read replicas; NULL on older rows
+    bigquery.SchemaField("ingested_at", "TIMESTAMP", mode="NULLABLE"),
+]
+WEATHER_PARTITIONING = bigquery.TimePartitioning(
+    type_=bigquery.TimePartitioningType.DAY,
+    field="timestamp"
+)
+WEATHER_CLUSTERING = ["city_key", "timestamp"]
 
-class BigQueryRepository:
-    """Repository for managing weather data in BigQuery"""
-    
-    def __init__(self):
-        self.client = bigquery.Client(project=settings.GCP_PROJECT_ID)
+# Rollup tables: one row per city per hour/day, maintained incrementally
+# from the raw table by refresh_rollups. Maps resolution -> TIMESTAMP_TRUNC part.
+ROLLUP_GRANULARITIES = {"hourly": "HOUR", "daily": "DAY"}
+ROLLUP_SCHEMA = [
+    bigquery.SchemaField("city", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("city_key", "STRING", mode="REQUIRED"),
+    bigquery.SchemaField("bucket_start", "TIMESTAMP", mode="REQUIRED"),
+    bigquery.SchemaField("record_count", "INTEGER", mode="REQUIRED"),
+    bigquery.SchemaField("min_temperature", "FLOAT64", mode="REQUIRED"),
+    bigquery.SchemaField("max_temperature", "FLOAT64", mode="REQUIRED"),
+    bigquery.SchemaField("mean_temperature", "FLOAT64", mode="REQUIRED"),
+    bigquery.SchemaField("mean_humidity", "FLOAT64", mode="REQUIRED"),
+    bigquery.SchemaField("mean_wind_speed", "FLOAT64", mode="REQUIRED"),
+    bigquery.SchemaField(
+        "condition_counts", "RECORD", mode="REPEATED",
+        fields=[
+            bigquery.SchemaField("condition", "STRING", mode="REQUIRED"),
+            bigquery.SchemaField("count", "INTEGER", mode="REQUIRED"),
+        ]
+    ),
+    bigquery.SchemaField("updated_at", "TIMESTAMP", mode="REQUIRED"),
+]
+
+# SQL equivalent of app.models.normalize_city, used when migrating legacy rows
+CITY_KEY_SQL = r"LOWER(REGEXP_REPLACE(TRIM(city), r'\s+', ' '))"
+
+
+class BigQueryRepository(WeatherRepository):
+    """
+    Repository for managing weather data in BigQuery
+
+    The google-cloud-bigquery client is synchronous, so every client call
+    runs on a dedicated, bounded thread pool instead of the event loop.
+    Query and load jobs that exceed their timeout, or whose awaiting task
+    is cancelled, are cancelled server-side as well.
+    """
+
+    def __init__(self, client: Optional[bigquery.Client] = None):
+        self.client = client or bigquery.Client(project=settings.GCP_PROJECT_ID)
         self.dataset_id = settings.BIGQUERY_DATASET
         self.table_id = settings.BIGQUERY_TABLE
         self.full_table_id = f"{settings.GCP_PROJECT_ID}.{self.dataset_id}.{self.table_id}"
-    
-    async def initialize_schema(self):
-        """Create dataset and table if they don't exist"""
+        self.rollup_table_ids = {
+            resolution: f"{self.full_table_id}_{resolution}"
+            for resolution in ROLLUP_GRANULARITIES
+        }
+        self.query_timeout = settings.BIGQUERY_QUERY_TIMEOUT_SECONDS
+        self.load_timeout = settings.BIGQUERY_LOAD_TIMEOUT_SECONDS
+        self.write_mode = settings.BIGQUERY_WRITE_MODE
+        self.load_format = settings.BIGQUERY_LOAD_FORMAT
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, settings.BIGQUERY_MAX_WORKERS),
+            thread_name_prefix="bigquery"
+        )
+
+    async def _run_blocking(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking client call on the repository's thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    async def _run_job(
+        self,
+        start_job: Callable[[], Any],
+        timeout: Optional[float],
+        collect: Callable[[Any], Any] = lambda result: result,
+        page_size: Optional[int] = None
+    ) -> Any:
+        """
+        Start a BigQuery job and wait for it without blocking the event loop
+
+        Args:
+            start_job: Blocking callable that submits the job and returns it
+            timeout: Seconds to wait for completion (None waits indefinitely)
+            collect: Blocking callable applied to job.result() on the worker
+                thread, e.g. to materialize rows while still off the loop
+            page_size: Rows per result page for query jobs (None for the default)
+
+        Returns:
+            Whatever `collect` returns
+
+        Raises:
+            asyncio.TimeoutError: If the job did not finish within `timeout`
+        """
+        job = await self._run_blocking(start_job)
+
+        def wait_for_job():
+            if page_size is not None:
+                return collect(job.result(timeout=timeout, page_size=page_size))
+            return collect(job.result(timeout=timeout))
+
+        try:
+            return await asyncio.wait_for(self._run_blocking(wait_for_job), timeout)
+        except (asyncio.CancelledError, asyncio.TimeoutError):
+            self._cancel_job(job)
+            raise
+
+    def _cancel_job(self, job):
+        """Request server-side cancellation of a job without waiting for it"""
+        logger.warning(f"Cancelling BigQuery job {job.job_id}")
+
+        def cancel():
+            try:
+                job.cancel()
+            except Exception as e:
+                logger.error(f"Failed to cancel BigQuery job {job.job_id}: {str(e)}")
+
+        self._executor.submit(cancel)
+
+    async def _query_rows(self, query: str, job_config: bigquery.QueryJobConfig) -> list:
+        """Run a query job and return all of its rows"""
+        return await self._run_job(
+            lambda: self.client.query(query, job_config=job_config),
+            timeout=self.query_timeout,
+            collect=list
+        )
+
+    @staticmethod
+    def _row_to_weather_data(row) -> WeatherData:
+        """Convert a BigQuery result row to a WeatherData object"""
+        return WeatherData(
+            id=row.id,
+            city=row.city,
+            timestamp=row.timestamp,
+            temperature=row.temperature,
+            humidity=row.humidity,
+            wind_speed=row.wind_speed,
+            condition=row.condition
+        )
+
+    @staticmethod
+    def _latest_since() -> datetime:
+        """Lower timestamp bound that lets latest-row lookups prune partitions"""
+        return datetime.now(timezone.utc) - timedelta(days=settings.LATEST_LOOKBACK_DAYS)
+
+    async def close(self):
+        """Release the thread pool and the client's HTTP sessions"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.client.close()
+
+    def stats(self) -> dict:
+        """Backend counters for monitoring"""
+        return {"backend": "bigquery"}
+
+    async def initialize_schema(self, migrate: bool = True):
+        """Create dataset and table if they don't exist, migrating a legacy layout if `migrate`"""
+        await self._run_blocking(self._initialize_schema_sync, migrate)
+
+    def _initialize_schema_sync(self, migrate: bool):
         # Create dataset
         dataset_ref = self.client.dataset(self.dataset_id)
         try:
@@ -31,31 +206,127 @@ class BigQueryRepository:
             dataset.location = "US"
             dataset = self.client.create_dataset(dataset)
             logger.info(f"Created dataset {self.dataset_id}")
-        
+
         # Create table
         table_ref = dataset_ref.table(self.table_id)
         try:
-            self.client.get_table(table_ref)
+            table = self.client.get_table(table_ref)
             logger.info(f"Table {self.table_id} already exists")
+            if not any(field.name == "ingested_at" for field in table.schema):
+                table.schema = [*table.schema, WEATHER_SCHEMA[-1]]
+                table = self.client.update_table(table, ["schema"])
+                logger.info(f"Added ingested_at column to {self.table_id}")
+            if self._is_legacy_layout(table):
+                if settings.BIGQUERY_AUTO_MIGRATE and migrate:
+                    self._migrate_table_layout_sync()
+                elif settings.BIGQUERY_AUTO_MIGRATE:
+                    logger.info(f"Table {self.table_id} uses the legacy layout; another process is migrating it")
+                else:
+                    logger.warning(
+                        f"Table {self.table_id} uses the legacy unpartitioned layout; "
+                        "set BIGQUERY_AUTO_MIGRATE=true to migrate it"
+                    )
         except NotFound:
-            schema = [
-                bigquery.SchemaField("id", "STRING", mode="REQUIRED"),
-                bigquery.SchemaField("city", "STRING", mode="REQUIRED"),
-                bigquery.SchemaField("timestamp", "TIMESTAMP", mode="REQUIRED"),
-                bigquery.SchemaField("temperature", "FLOAT64", mode="REQUIRED"),
-                bigquery.SchemaField("humidity", "INTEGER", mode="REQUIRED"),
-                bigquery.SchemaField("wind_speed", "FLOAT64", mode="REQUIRED"),
-                bigquery.SchemaField("condition", "STRING", mode="REQUIRED"),
-            ]
-            
-            table = bigquery.Table(table_ref, schema=schema)
-            
-            # Create clustering for better query performance
-            table.clustering_fields = ["city", "timestamp"]
-            
-            table = self.client.create_table(table)
+            self._create_weather_table(self.full_table_id)
             logger.info(f"Created table {self.table_id}")
-    
+
+        # Create rollup tables
+        for table_id in self.rollup_table_ids.values():
+            try:
+                self.client.get_table(table_id)
+            except NotFound:
+                table = bigquery.Table(table_id, schema=ROLLUP_SCHEMA)
+                table.time_partitioning = bigquery.TimePartitioning(
+                    type_=bigquery.TimePartitioningType.DAY,
+                    field="bucket_start"
+                )
+                table.clustering_fields = ["city_key", "bucket_start"]
+                self.client.create_table(table)
+                logger.info(f"Created rollup table {table_id}")
+
+    def _create_weather_table(self, table_id: str) -> bigquery.Table:
+        """Create a weather table with the current partitioned, clustered layout"""
+        table = bigquery.Table(table_id, schema=WEATHER_SCHEMA)
+
+        # Daily partitions let time-bounded queries skip old data entirely;
+        # clustering on city_key prunes blocks within each partition
+        table.time_partitioning = WEATHER_PARTITIONING
+        table.clustering_fields = WEATHER_CLUSTERING
+
+        return self.client.create_table(table)
+
+    @staticmethod
+    def _is_legacy_layout(table: bigquery.Table) -> bool:
+        """Whether a table predates time partitioning and the city_key column"""
+        column_names = {field.name for field in table.schema}
+        return table.time_partitioning is None or "city_key" not in column_names
+
+    async def migrate_table_layout(self):
+        """Rebuild a legacy table with partitioning and a stored city_key"""
+        await self._run_blocking(self._migrate_table_layout_sync)
+
+    def _migrate_table_layout_sync(self):
+        """
+        Migrate a legacy table to the partitioned, city_key-clustered layout
+
+        Partitioning cannot be added to an existing table, so the rows are
+        copied into a new table, the legacy table is renamed to a
+        timestamped backup, and the new table takes its name. The backup
+        is left in place for manual verification and cleanup.
+
+        Other processes keep loading while this runs, and a load that
+        commits after the copy's snapshot lands in what becomes the
+        backup. Once the new table has taken the name, rows ingested since
+        shortly before the copy are copied again, skipping IDs the new
+        table already holds. A write stamps `ingested_at` before its load
+        job and, in merge mode, its merge query, so the margin is both
+        timeouts. Loads attempted between
+        the two renames fail, and the spool retries them when SPOOL_ENABLED.
+        """
+        suffix = datetime.now(timezone.utc).strftime("%Y%m%d%H%M%S")
+        staging_id = f"{self.full_table_id}_migrating_{suffix}"
+        backup_name = f"{self.table_id}_legacy_{suffix}"
+        backup_id = f"{settings.GCP_PROJECT_ID}.{self.dataset_id}.{backup_name}"
+        logger.info(f"Migrating {self.table_id} to partitioned layout via {staging_id}")
+
+        self._create_weather_table(staging_id)
+        copy_started = datetime.now(timezone.utc)
+        copy_rows = f"""
+        INSERT INTO `{staging_id}`
+          (id, city, city_key, timestamp, temperature, humidity, wind_speed, condition, ingested_at)
+        SELECT id, city, {CITY_KEY_SQL}, timestamp, temperature, humidity, wind_speed, condition, ingested_at
+        FROM `{self.full_table_id}`
+        """
+        self.client.query(copy_rows).result()
+
+        self.client.query(f"ALTER TABLE `{self.full_table_id}` RENAME TO `{backup_name}`").result()
+        self.client.query(f"ALTER TABLE `{staging_id}` RENAME TO `{self.table_id}`").result()
+
+        # Rows loaded into the legacy table after the copy's snapshot
+        catch_up_rows = f"""
+        INSERT INTO `{self.full_table_id}`
+          (id, city, city_key, timestamp, temperature, humidity, wind_speed, condition, ingested_at)
+        SELECT id, city, {CITY_KEY_SQL}, timestamp, temperature, humidity, wind_speed, condition, ingested_at
+        FROM `{backup_id}`
+        WHERE ingested_at >= @since
+          AND id NOT IN (SELECT id FROM `{self.full_table_id}`)
+        """
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[
+                bigquery.ScalarQueryParameter(
+                    "since", "TIMESTAMP",
+                    copy_started - timedelta(
+                        seconds=settings.BIGQUERY_LOAD_TIMEOUT_SECONDS + settings.BIGQUERY_QUERY_TIMEOUT_SECONDS
+                    )
+                )
+            ]
+        )
+        caught_up = self.client.query(catch_up_rows, job_config=job_config).result().num_dml_affected_rows
+        logger.info(
+            f"Migrated {self.table_id}; copied {caught_up or 0} rows loaded during the copy; "
+            f"legacy rows kept in {backup_name}"
+        )
+
     async def insert_weather_data(self, weather_records: List[WeatherData]) -> int:
         """
         Insert weather data into BigQuery using load jobs
@@ -70,49 +341,191 @@ class BigQueryRepository:
             logger.warning("No weather records to insert")
             return 0
 
-        # Convert to dict format for BigQuery
-        rows_to_insert = []
-        for record in weather_records:
-            rows_to_insert.append({
-                "id": record.id,
-                "city": record.city,
-                "timestamp": record.timestamp.isoformat(),
-                "temperature": record.temperature,
-                "humidity": record.humidity,
-                "wind_speed": record.wind_speed,
-                "condition": record.condition
-            })
+        # Encoding is CPU-bound; keep it off the event loop
+        payload = await self._run_blocking(self._encode_records, weather_records)
+        earliest = min(record.timestamp for record in weather_records)
+        return await self._write_payload(payload, len(weather_records), earliest)
+
+    async def insert_weather_batch(self, batch: WeatherBatch) -> int:
+        """
+        Insert a column-oriented batch of weather data using a load job
+
+        Args:
+            batch: WeatherBatch of rows to insert
+
+        Returns:
+            Number of records attempted to insert
+        """
+        if not len(batch):
+            return 0
+
+        # Encoding is CPU-bound; keep it off the event loop
+        payload = await self._run_blocking(self._encode_batch, batch)
+        return await self._write_payload(payload, len(batch), batch.first_timestamp)
+
+    def _encode_records(self, weather_records: List[WeatherData]) -> Union[List[dict], bytes]:
+        """Encode records as JSON rows or a Parquet file, per BIGQUERY_LOAD_FORMAT"""
+        ingested_at = datetime.now(timezone.utc)
+        if self.load_format == "parquet":
+            return to_parquet_bytes(records_to_arrow(weather_records, ingested_at))
+        return records_to_json_rows(weather_records, ingested_at)
 
+    def _encode_batch(self, batch: WeatherBatch) -> Union[List[dict], bytes]:
+        """Encode a column batch as JSON rows or a Parquet file, per BIGQUERY_LOAD_FORMAT"""
+        ingested_at = datetime.now(timezone.utc)
+        if self.load_format == "parquet":
+            return to_parquet_bytes(batch_to_arrow(batch, ingested_at))
+        rows = batch.to_rows()
+        for row in rows:
+            row["ingested_at"] = ingested_at.isoformat()
+        return rows
+
+    async def _write_payload(self, payload: Union[List[dict], bytes], count: int, earliest: datetime) -> int:
+        """
+        Write an encoded payload to the weather table according to BIGQUERY_WRITE_MODE
+
+        Args:
+            payload: JSON rows or Parquet file bytes matching WEATHER_SCHEMA
+            count: Number of records in the payload
+            earliest: Earliest row timestamp, bounds the partitions a merge scans
+
+        Returns:
+            Number of records attempted to insert
+        """
         try:
-            # Use load jobs with WRITE_APPEND to handle large inserts efficiently
+            if self.write_mode == "merge":
+                await self._merge_payload(payload, earliest)
+            else:
+                # Use load jobs with WRITE_APPEND to handle large inserts efficiently
+                await self._load_to_table(payload, self.full_table_id)
+
+            logger.info(f"Successfully inserted {count} weather records")
+            return count
+
+        except Exception as e:
+            logger.error(f"Error inserting weather data: {str(e)}")
+            raise
+
+    async def _load_to_table(self, payload: Union[List[dict], bytes], table_id: str):
+        """Append a JSON row list or Parquet file to a table with one load job and wait for it"""
+        if isinstance(payload, bytes):
             job_config = bigquery.LoadJobConfig(
-                schema=[
-                    bigquery.SchemaField("id", "STRING", mode="REQUIRED"),
-                    bigquery.SchemaField("city", "STRING", mode="REQUIRED"),
-                    bigquery.SchemaField("timestamp", "TIMESTAMP", mode="REQUIRED"),
-                    bigquery.SchemaField("temperature", "FLOAT64", mode="REQUIRED"),
-                    bigquery.SchemaField("humidity", "INTEGER", mode="REQUIRED"),
-                    bigquery.SchemaField("wind_speed", "FLOAT64", mode="REQUIRED"),
-                    bigquery.SchemaField("condition", "STRING", mode="REQUIRED"),
-                ],
+                schema=WEATHER_SCHEMA,
+                source_format=bigquery.SourceFormat.PARQUET,
                 write_disposition=bigquery.WriteDisposition.WRITE_APPEND,
             )
 
-            # Load data directly to main table
-            job = self.client.load_table_from_json(
-                rows_to_insert,
-                self.full_table_id,
-                job_config=job_config
+            def start_job():
+                return self.client.load_table_from_file(
+                    io.BytesIO(payload),
+                    table_id,
+                    job_config=job_config
+                )
+        else:
+            job_config = bigquery.LoadJobConfig(
+                schema=WEATHER_SCHEMA,
+                write_disposition=bigquery.WriteDisposition.WRITE_APPEND,
+            )
+
+            def start_job():
+                return self.client.load_table_from_json(
+                    payload,
+                    table_id,
+                    job_config=job_config
+                )
+
+        await self._run_job(start_job, timeout=self.load_timeout)
+
+    async def _merge_payload(self, payload: Union[List[dict], bytes], earliest: datetime):
+        """
+        Load rows into a staging table, then MERGE only unseen IDs into the table
+
+        IDs are deterministic per (city, observation time), so repeated
+        fetches of an unchanged observation and re-run backfill hours are
+        skipped instead of appended. The staging table is dropped afterwards
+        and expires on its own if cleanup fails.
+        """
+        staging_id = f"{self.full_table_id}_staging_{uuid.uuid4().hex}"
+        staging_table = bigquery.Table(staging_id, schema=WEATHER_SCHEMA)
+        staging_table.expires = datetime.now(timezone.utc) + timedelta(hours=1)
+        await self._run_blocking(self.client.create_table, staging_table)
+
+        try:
+            await self._load_to_table(payload, staging_id)
+
+            query = f"""
+            MERGE `{self.full_table_id}` AS target
+            USING (
+              SELECT * FROM `{staging_id}`
+              WHERE TRUE
+              QUALIFY ROW_NUMBER() OVER (PARTITION BY id) = 1
+            ) AS source
+            ON target.id = source.id
+              AND target.timestamp >= @earliest
+            WHEN NOT MATCHED THEN INSERT ROW
+            """
+
+            job_config = bigquery.QueryJobConfig(
+                query_parameters=[
+                    bigquery.ScalarQueryParameter("earliest", "TIMESTAMP", earliest)
+                ]
             )
-            job.result()  # Wait for the job to complete
+            await self._query_rows(query, job_config)
+
+        finally:
+            await self._run_blocking(self.client.delete_table, staging_id, not_found_ok=True)
 
-            logger.info(f"Successfully inserted {len(rows_to_insert)} weather records")
-            return len(rows_to_insert)
+    async def read_changes(
+        self,
+        after_ingested_at: Optional[datetime],
+        after_id: str,
+        since: datetime,
+        limit: int
+    ) -> List[Tuple[WeatherData, Optional[datetime]]]:
+        """
+        Read rows in (ingested_at, id) order after a watermark, for replication
+
+        Rows loaded before ingested_at existed have it NULL and sort first,
+        so a replica starting without a watermark also receives them.
+
+        Args:
+            after_ingested_at: Watermark load time, or None to start from the beginning
+            after_id: Watermark row ID, breaking ties within one load time
+            since: Only rows observed at or after this time (partition bound)
+            limit: Maximum rows to return
+
+        Returns:
+            List of (WeatherData, ingested_at) tuples in watermark order
+        """
+        query = f"""
+        SELECT id, city, timestamp, temperature, humidity, wind_speed, condition, ingested_at
+        FROM `{self.full_table_id}`
+        WHERE timestamp >= @since
+          AND (
+            @after_ingested_at IS NULL
+            OR COALESCE(ingested_at, TIMESTAMP '1970-01-01') > @after_ingested_at
+            OR (COALESCE(ingested_at, TIMESTAMP '1970-01-01') = @after_ingested_at AND id > @after_id)
+          )
+        ORDER BY COALESCE(ingested_at, TIMESTAMP '1970-01-01'), id
+        LIMIT {max(1, int(limit))}
+        """
+
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[
+                bigquery.ScalarQueryParameter("since", "TIMESTAMP", since),
+                bigquery.ScalarQueryParameter("after_ingested_at", "TIMESTAMP", after_ingested_at),
+                bigquery.ScalarQueryParameter("after_id", "STRING", after_id)
+            ]
+        )
+
+        try:
+            results = await self._query_rows(query, job_config)
+            return [(self._row_to_weather_data(row), row.ingested_at) for row in results]
 
         except Exception as e:
-            logger.error(f"Error inserting weather data: {str(e)}")
+            logger.error(f"Error reading changes for replication: {str(e)}")
             raise
-    
+
     async def get_latest_weather(self, city: str) -> Optional[WeatherData]:
         """
         Get latest weather data for a city
@@ -126,38 +539,73 @@ class BigQueryRepository:
         query = f"""
         SELECT id, city, timestamp, temperature, humidity, wind_speed, condition
         FROM `{self.full_table_id}`
-        WHERE LOWER(city) = LOWER(@city)
+        WHERE city_key = @city_key
+          AND timestamp >= @since
         ORDER BY timestamp DESC
         LIMIT 1
         """
 
         job_config = bigquery.QueryJobConfig(
             query_parameters=[
-                bigquery.ScalarQueryParameter("city", "STRING", city)
+                bigquery.ScalarQueryParameter("city_key", "STRING", normalize_city(city)),
+                bigquery.ScalarQueryParameter("since", "TIMESTAMP", self._latest_since())
             ]
         )
-        
+
         try:
-            query_job = self.client.query(query, job_config=job_config)
-            results = query_job.result()
-            
+            results = await self._query_rows(query, job_config)
+
             for row in results:
-                return WeatherData(
-                    id=row.id,
-                    city=row.city,
-                    timestamp=row.timestamp,
-                    temperature=row.temperature,
-                    humidity=row.humidity,
-                    wind_speed=row.wind_speed,
-                    condition=row.condition
-                )
-            
+                return self._row_to_weather_data(row)
+
             return None
-            
+
         except Exception as e:
             logger.error(f"Error fetching latest weather for {city}: {str(e)}")
             raise
-    
+
+    async def get_latest_weather_bulk(self, cities: Optional[List[str]] = None) -> List[WeatherData]:
+        """
+        Get the latest weather data for many cities in one query
+
+        Uses a windowed "latest per group" scan instead of one
+        ORDER BY ... LIMIT 1 job per city. Only the last
+        LATEST_LOOKBACK_DAYS daily partitions are scanned.
+
+        Args:
+            cities: City names to include (None for every city in the table)
+
+        Returns:
+            List of WeatherData objects, one per city found
+        """
+        city_filter = "AND city_key IN UNNEST(@city_keys)" if cities is not None else ""
+        query = f"""
+        SELECT id, city, timestamp, temperature, humidity, wind_speed, condition
+        FROM `{self.full_table_id}`
+        WHERE timestamp >= @since
+          {city_filter}
+        QUALIFY ROW_NUMBER() OVER (PARTITION BY city_key ORDER BY timestamp DESC) = 1
+        """
+
+        query_parameters = [
+            bigquery.ScalarQueryParameter("since", "TIMESTAMP", self._latest_since())
+        ]
+        if cities is not None:
+            query_parameters.append(
+                bigquery.ArrayQueryParameter(
+                    "city_keys", "STRING", [normalize_city(city) for city in cities]
+                )
+            )
+        job_config = bigquery.QueryJobConfig(query_parameters=query_parameters)
+
+        try:
+            results = await self._query_rows(query, job_config)
+            return [self._row_to_weather_data(row) for row in results]
+
+        except Exception as e:
+            logger.error(f"Error fetching latest weather in bulk: {str(e)}")
+            raise
+
     async def get_weather_history(self, city: str, days: int) -> List[WeatherData]:
         """
         Get weather history for a city
@@ -169,41 +617,355 @@ class BigQueryRepository:
         Returns:
             List of WeatherData objects
         """
-        start_date = datetime.utcnow() - timedelta(days=days)
+        start_date = datetime.now(timezone.utc) - timedelta(days=days)
 
         query = f"""
         SELECT id, city, timestamp, temperature, humidity, wind_speed, condition
         FROM `{self.full_table_id}`
-        WHERE LOWER(city) = LOWER(@city)
+        WHERE city_key = @city_key
           AND timestamp >= @start_date
         ORDER BY timestamp DESC
         """
 
         job_config = bigquery.QueryJobConfig(
             query_parameters=[
-                bigquery.ScalarQueryParameter("city", "STRING", city),
+                bigquery.ScalarQueryParameter("city_key", "STRING", normalize_city(city)),
                 bigquery.ScalarQueryParameter("start_date", "TIMESTAMP", start_date)
             ]
         )
-        
+
         try:
-            query_job = self.client.query(query, job_config=job_config)
-            results = query_job.result()
-            
+            results = await self._query_rows(query, job_config)
+
             weather_records = []
             for row in results:
-                weather_records.append(WeatherData(
-                    id=row.id,
-                    city=row.city,
-                    timestamp=row.timestamp,
-                    temperature=row.temperature,
-                    humidity=row.humidity,
-                    wind_speed=row.wind_speed,
-                    condition=row.condition
-                ))
-            
+                weather_records.append(self._row_to_weather_data(row))
+
             return weather_records
-            
+
         except Exception as e:
             logger.error(f"Error fetching weather history for {city}: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    async def get_weather_history_page(
+        self,
+        city: str,
+        days: int,
+        limit: int,
+        after: Optional[Tuple[datetime, str]] = None
+    ) -> List[WeatherData]:
+        """
+        Get one keyset page of weather history for a city
+
+        Args:
+            city: City name
+            days: Number of days to retrieve
+            limit: Maximum rows to return
+            after: (timestamp, id) of the last row already returned
+
+        Returns:
+            List of WeatherData objects, newest first
+        """
+        query_parameters = [
+            bigquery.ScalarQueryParameter("city_key", "STRING", normalize_city(city)),
+            bigquery.ScalarQueryParameter(
+                "start_date", "TIMESTAMP", datetime.now(timezone.utc) - timedelta(days=days)
+            )
+        ]
+        keyset_filter = ""
+        if after is not None:
+            # The plain upper bound lets BigQuery prune partitions past the cursor
+            keyset_filter = """
+          AND timestamp <= @after_timestamp
+          AND (timestamp < @after_timestamp OR id < @after_id)"""
+            query_parameters.extend([
+                bigquery.ScalarQueryParameter("after_timestamp", "TIMESTAMP", after[0]),
+                bigquery.ScalarQueryParameter("after_id", "STRING", after[1])
+            ])
+
+        query = f"""
+        SELECT id, city, timestamp, temperature, humidity, wind_speed, condition
+        FROM `{self.full_table_id}`
+        WHERE city_key = @city_key
+          AND timestamp >= @start_date{keyset_filter}
+        ORDER BY timestamp DESC, id DESC
+        LIMIT {max(1, int(limit))}
+        """
+
+        job_config = bigquery.QueryJobConfig(query_parameters=query_parameters)
+
+        try:
+            results = await self._query_rows(query, job_config)
+            return [self._row_to_weather_data(row) for row in results]
+
+        except Exception as e:
+            logger.error(f"Error fetching weather history page for {city}: {str(e)}")
+            raise
+
+    async def iter_weather_history(
+        self,
+        city: str,
+        days: int,
+        chunk_rows: int
+    ) -> AsyncIterator[List[WeatherData]]:
+        """
+        Stream weather history for a city from a single query job
+
+        Instead of one job per keyset page, the result is read back page by
+        page from the finished job, so each chunk costs one API call and
+        no extra bytes scanned.
+
+        Args:
+            city: City name
+            days: Number of days to retrieve
+            chunk_rows: Rows per result page
+
+        Yields:
+            Lists of WeatherData objects, newest first
+        """
+        query = f"""
+        SELECT id, city, timestamp, temperature, humidity, wind_speed, condition
+        FROM `{self.full_table_id}`
+        WHERE city_key = @city_key
+          AND timestamp >= @start_date
+        ORDER BY timestamp DESC, id DESC
+        """
+
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[
+                bigquery.ScalarQueryParameter("city_key", "STRING", normalize_city(city)),
+                bigquery.ScalarQueryParameter(
+                    "start_date", "TIMESTAMP", datetime.now(timezone.utc) - timedelta(days=days)
+                )
+            ]
+        )
+
+        try:
+            pages = await self._run_job(
+                lambda: self.client.query(query, job_config=job_config),
+                timeout=self.query_timeout,
+                collect=lambda result: result.pages,
+                page_size=max(1, int(chunk_rows))
+            )
+        except Exception as e:
+            logger.error(f"Error streaming weather history for {city}: {str(e)}")
+            raise
+
+        # Each page after the first is a blocking tabledata call
+        page = await self._run_blocking(lambda: next(pages, None))
+        while page is not None:
+            yield [self._row_to_weather_data(row) for row in page]
+            page = await self._run_blocking(lambda: next(pages, None))
+
+    async def get_weather_statistics(
+        self,
+        city: str,
+        days: int,
+        sample_size: int = 10
+    ) -> Optional[WeatherStatistics]:
+        """
+        Get aggregate statistics and the newest records for a city
+
+        Averages, extremes and a bounded sample of recent rows are computed
+        in BigQuery and returned as a single row, instead of transferring
+        every record in the period.
+
+        Args:
+            city: City name
+            days: Number of days to aggregate
+            sample_size: Maximum number of recent records to include
+
+        Returns:
+            WeatherStatistics object or None if the period has no data
+        """
+        start_date = datetime.now(timezone.utc) - timedelta(days=days)
+
+        query = f"""
+        SELECT
+          COUNT(*) AS record_count,
+          AVG(temperature) AS average_temperature,
+          MIN(temperature) AS min_temperature,
+          MAX(temperature) AS max_temperature,
+          AVG(humidity) AS average_humidity,
+          ARRAY_AGG(
+            STRUCT(id, city, timestamp, temperature, humidity, wind_speed, condition)
+            ORDER BY timestamp DESC
+            LIMIT {max(0, int(sample_size))}
+          ) AS recent_records
+        FROM `{self.full_table_id}`
+        WHERE city_key = @city_key
+          AND timestamp >= @start_date
+        """
+
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[
+                bigquery.ScalarQueryParameter("city_key", "STRING", normalize_city(city)),
+                bigquery.ScalarQueryParameter("start_date", "TIMESTAMP", start_date)
+            ]
+        )
+
+        try:
+            results = await self._query_rows(query, job_config)
+
+            row = results[0] if results else None
+            if row is None or row.record_count == 0:
+                return None
+
+            return WeatherStatistics(
+                city=city,
+                record_count=row.record_count,
+                average_temperature=row.average_temperature,
+                min_temperature=row.min_temperature,
+                max_temperature=row.max_temperature,
+                average_humidity=row.average_humidity,
+                recent_records=[WeatherData(**record) for record in row.recent_records or []]
+            )
+
+        except Exception as e:
+            logger.error(f"Error fetching weather statistics for {city}: {str(e)}")
+            raise
+
+    async def refresh_rollups(self, since: datetime):
+        """
+        Recompute hourly and daily rollup rows touched by data since `since`
+
+        Every bucket from the one containing `since` onwards is rebuilt from
+        the raw table and MERGEd into the rollup table, so the refresh is
+        incremental (only recent partitions are read) and idempotent.
+
+        Args:
+            since: Earliest observation timestamp written since the last refresh
+        """
+        for resolution, part in ROLLUP_GRANULARITIES.items():
+            query = f"""
+            MERGE `{self.rollup_table_ids[resolution]}` AS target
+            USING (
+              WITH stats AS (
+                SELECT
+                  city_key,
+                  TIMESTAMP_TRUNC(timestamp, {part}) AS bucket_start,
+                  ANY_VALUE(city) AS city,
+                  COUNT(*) AS record_count,
+                  MIN(temperature) AS min_temperature,
+                  MAX(temperature) AS max_temperature,
+                  AVG(temperature) AS mean_temperature,
+                  AVG(humidity) AS mean_humidity,
+                  AVG(wind_speed) AS mean_wind_speed
+                FROM `{self.full_table_id}`
+                WHERE timestamp >= TIMESTAMP_TRUNC(@since, {part})
+                GROUP BY city_key, bucket_start
+              ),
+              per_condition AS (
+                SELECT
+                  city_key,
+                  TIMESTAMP_TRUNC(timestamp, {part}) AS bucket_start,
+                  condition,
+                  COUNT(*) AS count
+                FROM `{self.full_table_id}`
+                WHERE timestamp >= TIMESTAMP_TRUNC(@since, {part})
+                GROUP BY city_key, bucket_start, condition
+              ),
+              conditions AS (
+                SELECT
+                  city_key,
+                  bucket_start,
+                  ARRAY_AGG(STRUCT(condition, count) ORDER BY count DESC, condition) AS condition_counts
+                FROM per_condition
+                GROUP BY city_key, bucket_start
+              )
+              SELECT * FROM stats JOIN conditions USING (city_key, bucket_start)
+            ) AS source
+            ON target.city_key = source.city_key
+              AND target.bucket_start = source.bucket_start
+              AND target.bucket_start >= TIMESTAMP_TRUNC(@since, {part})
+            WHEN MATCHED THEN UPDATE SET
+              city = source.city,
+              record_count = source.record_count,
+              min_temperature = source.min_temperature,
+              max_temperature = source.max_temperature,
+              mean_temperature = source.mean_temperature,
+              mean_humidity = source.mean_humidity,
+              mean_wind_speed = source.mean_wind_speed,
+              condition_counts = source.condition_counts,
+              updated_at = CURRENT_TIMESTAMP()
+            WHEN NOT MATCHED THEN INSERT
+              (city, city_key, bucket_start, record_count, min_temperature, max_temperature,
+               mean_temperature, mean_humidity, mean_wind_speed, condition_counts, updated_at)
+            VALUES
+              (source.city, source.city_key, source.bucket_start, source.record_count,
+               source.min_temperature, source.max_temperature, source.mean_temperature,
+               source.mean_humidity, source.mean_wind_speed, source.condition_counts,
+               CURRENT_TIMESTAMP())
+            """
+
+            job_config = bigquery.QueryJobConfig(
+                query_parameters=[
+                    bigquery.ScalarQueryParameter("since", "TIMESTAMP", since)
+                ]
+            )
+
+            try:
+                await self._query_rows(query, job_config)
+                logger.info(f"Refreshed {resolution} rollups from {since.isoformat()}")
+
+            except Exception as e:
+                logger.error(f"Error refreshing {resolution} rollups: {str(e)}")
+                raise
+
+    async def get_weather_rollups(
+        self,
+        city: str,
+        days: int,
+        resolution: str
+    ) -> List[WeatherAggregate]:
+        """
+        Get pre-aggregated weather history for a city
+
+        Args:
+            city: City name
+            days: Number of days to retrieve
+            resolution: "hourly" or "daily"
+
+        Returns:
+            List of WeatherAggregate objects, newest bucket first
+        """
+        part = ROLLUP_GRANULARITIES[resolution]
+        start_date = datetime.now(timezone.utc) - timedelta(days=days)
+
+        query = f"""
+        SELECT city, bucket_start, record_count, min_temperature, max_temperature,
+               mean_temperature, mean_humidity, mean_wind_speed, condition_counts
+        FROM `{self.rollup_table_ids[resolution]}`
+        WHERE city_key = @city_key
+          AND bucket_start >= TIMESTAMP_TRUNC(@start_date, {part})
+        ORDER BY bucket_start DESC
+        """
+
+        job_config = bigquery.QueryJobConfig(
+            query_parameters=[
+                bigquery.ScalarQueryParameter("city_key", "STRING", normalize_city(city)),
+                bigquery.ScalarQueryParameter("start_date", "TIMESTAMP", start_date)
+            ]
+        )
+
+        try:
+            results = await self._query_rows(query, job_config)
+
+            return [
+                WeatherAggregate(
+                    city=row.city,
+                    bucket_start=row.bucket_start,
+                    record_count=row.record_count,
+                    min_temperature=row.min_temperature,
+                    max_temperature=row.max_temperature,
+                    mean_temperature=row.mean_temperature,
+                    mean_humidity=row.mean_humidity,
+                    mean_wind_speed=row.mean_wind_speed,
+                    condition_counts=[ConditionCount(**item) for item in row.condition_counts]
+                )
+                for row in results
+            ]
+
+        except Exception as e:
+            logger.error(f"Error fetching {resolution} rollups for {city}: {str(e)}")
+            raise
@@ -0,0 +1,257 @@
+"""Write-invalidated result cache in front of any weather repository"""
+import sys
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, Hashable, List, Optional, Tuple
+from pydantic import BaseModel
+import numpy as np
+from app.models import WeatherAggregate, WeatherBatch, WeatherData, WeatherStatistics, normalize_city
+from app.repositories.base import WeatherRepository
+
+# (city_key, days, kind, variant); variant holds extra arguments such as the sample size
+ResultKey = Tuple[str, int, str, Hashable]
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate deep size in bytes of a cached result"""
+    if isinstance(value, BaseModel):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value.__dict__.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(estimate_size(item) for item in value)
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            estimate_size(key) + estimate_size(item) for key, item in value.items()
+        )
+    return sys.getsizeof(value)
+
+
+class QueryResultCache:
+    """
+    Bounded LRU cache of repository read results, sized in bytes
+
+    Entries are grouped by city so a write drops only the cities it
+    touched. Each city carries a generation counter that writes bump; a
+    read that started before an invalidation is not stored, so a slow
+    query can't put a pre-write result back into the cache. Entries also
+    expire after `ttl_seconds`, which bounds staleness from writes made by
+    other processes and from the `days` window sliding forward.
+    """
+
+    def __init__(self, max_bytes: int, ttl_seconds: float):
+        self.max_bytes = max(0, max_bytes)
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[ResultKey, Tuple[Any, int, float]]" = OrderedDict()
+        self._keys_by_city: Dict[str, set] = {}
+        self._generations: Dict[str, int] = {}
+        self._epoch = 0
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.oversized = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def generation(self, city_key: str) -> Tuple[int, int]:
+        """Token that changes whenever results for the city are invalidated"""
+        return self._epoch, self._generations.get(city_key, 0)
+
+    def _remove(self, key: ResultKey):
+        _, size, _ = self._entries.pop(key)
+        self.bytes -= size
+        city_keys = self._keys_by_city.get(key[0])
+        if city_keys is not None:
+            city_keys.discard(key)
+            if not city_keys:
+                del self._keys_by_city[key[0]]
+
+    def get(self, key: ResultKey) -> Tuple[bool, Any]:
+        """
+        Look up a result, counted as a hit or miss
+
+        Returns:
+            (found, value); value may legitimately be None or empty
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry[2] <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return False, None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return True, entry[0]
+
+    def put(self, key: ResultKey, value: Any, generation: Tuple[int, int]):
+        """
+        Store a result read while the city was at `generation`
+
+        Skipped if the city was written since, or if the result alone is
+        larger than the whole cache.
+        """
+        if not self.enabled or self.generation(key[0]) != generation:
+            return
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            self.oversized += 1
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (value, size, time.monotonic() + self.ttl_seconds)
+        self._keys_by_city.setdefault(key[0], set()).add(key)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def invalidate_cities(self, city_keys):
+        """Drop every result for the given cities"""
+        for city_key in city_keys:
+            self._generations[city_key] = self._generations.get(city_key, 0) + 1
+            for key in list(self._keys_by_city.get(city_key, ())):
+                self._remove(key)
+                self.invalidations += 1
+
+    def invalidate_kinds(self, kinds):
+        """Drop every result of the given query kinds, for all cities"""
+        kinds = set(kinds)
+        self._epoch += 1
+        for city_key in list(self._keys_by_city):
+            for key in [key for key in self._keys_by_city[city_key] if key[2] in kinds]:
+                self._remove(key)
+                self.invalidations += 1
+
+    def stats(self) -> dict:
+        """Cache counters for monitoring"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "cities": len(self._keys_by_city),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "oversized": self.oversized,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+class CachedRepository(WeatherRepository):
+    """
+    Caches history, statistics and rollup reads of another repository
+
+    Results only change when rows are written, so inserts invalidate the
+    cities they wrote and a rollup refresh invalidates cached rollups.
+    Latest-weather reads pass through; LatestObservationStore already
+    serves those from memory. Paged and streamed history also pass
+    through, since they exist to avoid holding whole results in memory.
+    Cached lists are shared between callers and must not be mutated.
+    """
+
+    def __init__(self, repository: WeatherRepository, cache: QueryResultCache):
+        self.repository = repository
+        self.cache = cache
+
+    async def _cached(self, city: str, days: int, kind: str, variant: Hashable, load):
+        if not self.cache.enabled:
+            return await load()
+        key = (normalize_city(city), days, kind, variant)
+        found, value = self.cache.get(key)
+        if found:
+            return value
+        generation = self.cache.generation(key[0])
+        value = await load()
+        self.cache.put(key, value, generation)
+        return value
+
+    async def initialize_schema(self, migrate: bool = True):
+        await self.repository.initialize_schema(migrate)
+
+    async def insert_weather_data(self, weather_records: List[WeatherData]) -> int:
+        try:
+            return await self.repository.insert_weather_data(weather_records)
+        finally:
+            # Also on failure: the write may have landed before the error surfaced
+            self.cache.invalidate_cities({normalize_city(record.city) for record in weather_records})
+
+    async def insert_weather_batch(self, batch: WeatherBatch) -> int:
+        try:
+            return await self.repository.insert_weather_batch(batch)
+        finally:
+            self.cache.invalidate_cities(np.unique(batch.city_key).tolist())
+
+    async def get_latest_weather(self, city: str) -> Optional[WeatherData]:
+        return await self.repository.get_latest_weather(city)
+
+    async def get_latest_weather_bulk(self, cities: Optional[List[str]] = None) -> List[WeatherData]:
+        return await self.repository.get_latest_weather_bulk(cities)
+
+    async def get_weather_history(self, city: str, days: int) -> List[WeatherData]:
+        return await self._cached(
+            city, days, "history", None,
+            lambda: self.repository.get_weather_history(city, days)
+        )
+
+    async def get_weather_history_page(
+        self,
+        city: str,
+        days: int,
+        limit: int,
+        after: Optional[Tuple[datetime, str]] = None
+    ) -> List[WeatherData]:
+        return await self.repository.get_weather_history_page(city, days, limit, after)
+
+    async def iter_weather_history(
+        self,
+        city: str,
+        days: int,
+        chunk_rows: int
+    ) -> AsyncIterator[List[WeatherData]]:
+        async for chunk in self.repository.iter_weather_history(city, days, chunk_rows):
+            yield chunk
+
+    async def get_weather_statistics(
+        self,
+        city: str,
+        days: int,
+        sample_size: int = 10
+    ) -> Optional[WeatherStatistics]:
+        return await self._cached(
+            city, days, "statistics", sample_size,
+            lambda: self.repository.get_weather_statistics(city, days, sample_size)
+        )
+
+    async def refresh_rollups(self, since: datetime):
+        try:
+            await self.repository.refresh_rollups(since)
+        finally:
+            self.cache.invalidate_kinds({"hourly", "daily"})
+
+    async def get_weather_rollups(
+        self,
+        city: str,
+        days: int,
+        resolution: str
+    ) -> List[WeatherAggregate]:
+        return await self._cached(
+            city, days, resolution, None,
+            lambda: self.repository.get_weather_rollups(city, days, resolution)
+        )
+
+    async def close(self):
+        await self.repository.close()
+
+    def stats(self) -> dict:
+        """Backend counters plus result cache counters"""
+        return {**self.repository.stats(), "result_cache": self.cache.stats()}
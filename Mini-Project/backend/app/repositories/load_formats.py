@@ -0,0 +1,92 @@
+"""Encoders turning weather records into BigQuery load job payloads"""
+import io
+from datetime import datetime
+from typing import List
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from app.models import WeatherBatch, WeatherData, normalize_city, weather_record_id_from_key
+
+# Arrow equivalent of WEATHER_SCHEMA; every column but ingested_at is REQUIRED
+WEATHER_ARROW_SCHEMA = pa.schema([
+    pa.field("id", pa.string(), nullable=False),
+    pa.field("city", pa.string(), nullable=False),
+    pa.field("city_key", pa.string(), nullable=False),
+    pa.field("timestamp", pa.timestamp("us", tz="UTC"), nullable=False),
+    pa.field("temperature", pa.float64(), nullable=False),
+    pa.field("humidity", pa.int64(), nullable=False),
+    pa.field("wind_speed", pa.float64(), nullable=False),
+    pa.field("condition", pa.string(), nullable=False),
+    pa.field("ingested_at", pa.timestamp("us", tz="UTC"), nullable=True),
+])
+
+
+def records_to_json_rows(weather_records: List[WeatherData], ingested_at: datetime) -> List[dict]:
+    """Convert records to the JSON rows accepted by load_table_from_json"""
+    ingested_at = ingested_at.isoformat()
+    return [
+        {
+            "id": record.id,
+            "city": record.city,
+            "city_key": normalize_city(record.city),
+            "timestamp": record.timestamp.isoformat(),
+            "temperature": record.temperature,
+            "humidity": record.humidity,
+            "wind_speed": record.wind_speed,
+            "condition": record.condition,
+            "ingested_at": ingested_at
+        }
+        for record in weather_records
+    ]
+
+
+def _ingested_at_column(ingested_at: datetime, length: int) -> pa.Array:
+    return pa.array([ingested_at] * length, pa.timestamp("us", tz="UTC"))
+
+
+def records_to_arrow(weather_records: List[WeatherData], ingested_at: datetime) -> pa.Table:
+    """Build a typed Arrow table from records, one column at a time"""
+    return pa.Table.from_arrays(
+        [
+            pa.array([record.id for record in weather_records], pa.string()),
+            pa.array([record.city for record in weather_records], pa.string()),
+            pa.array([normalize_city(record.city) for record in weather_records], pa.string()),
+            pa.array([record.timestamp for record in weather_records], pa.timestamp("us", tz="UTC")),
+            pa.array([record.temperature for record in weather_records], pa.float64()),
+            pa.array([record.humidity for record in weather_records], pa.int64()),
+            pa.array([record.wind_speed for record in weather_records], pa.float64()),
+            pa.array([record.condition for record in weather_records], pa.string()),
+            _ingested_at_column(ingested_at, len(weather_records)),
+        ],
+        schema=WEATHER_ARROW_SCHEMA
+    )
+
+
+def batch_to_arrow(batch: WeatherBatch, ingested_at: datetime) -> pa.Table:
+    """Build an Arrow table from a column batch; numeric columns are not copied"""
+    timestamp_us = batch.timestamp.astype(np.int64)
+    ids = [
+        weather_record_id_from_key(city_key, value)
+        for city_key, value in zip(batch.city_key.tolist(), timestamp_us.tolist())
+    ]
+    return pa.Table.from_arrays(
+        [
+            pa.array(ids, pa.string()),
+            pa.array(batch.city, pa.string()),
+            pa.array(batch.city_key, pa.string()),
+            pa.array(timestamp_us, pa.int64()).cast(pa.timestamp("us", tz="UTC")),
+            pa.array(batch.temperature, pa.float64()),
+            pa.array(batch.humidity, pa.int64()),
+            pa.array(batch.wind_speed, pa.float64()),
+            pa.array(batch.condition, pa.string()),
+            _ingested_at_column(ingested_at, len(batch)),
+        ],
+        schema=WEATHER_ARROW_SCHEMA
+    )
+
+
+def to_parquet_bytes(table: pa.Table) -> bytes:
+    """Serialize an Arrow table to a Snappy-compressed Parquet file in memory"""
+    buffer = io.BytesIO()
+    pq.write_table(table, buffer, compression="snappy")
+    return buffer.getvalue()
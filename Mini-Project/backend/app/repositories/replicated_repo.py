@@ -0,0 +1,383 @@
+"""BigQuery repository fronted by an incrementally synced local SQLite replica"""
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import AsyncIterator, List, Optional, Tuple
+from app.models import WeatherAggregate, WeatherBatch, WeatherData, WeatherStatistics
+from app.repositories.base import WeatherRepository
+from app.repositories.bigquery_repo import BigQueryRepository
+from app.repositories.sqlite_repo import SQLiteRepository
+from app.services.leader import LeaderElector, SQLiteLease
+from app.services.rate_limiter import backoff_delay
+
+logger = logging.getLogger(__name__)
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+STATE_RECHECK_SECONDS = 5.0  # How often processes that don't sync re-read the last sync time
+
+
+class ReplicaSynchronizer:
+    """
+    Pulls new BigQuery rows into the local replica on an interval
+
+    Rows are read in (ingested_at, id) order after a persisted watermark,
+    so each sync transfers only what was loaded since the last one. A load
+    job stamps ingested_at when it is encoded but commits later, so every
+    sync restarts `overlap_seconds` before the watermark; rows seen twice
+    are skipped by the replica's primary key.
+
+    Every process on the host (e.g. each uvicorn worker) reads the same
+    replica file, but with a `lease` only the process holding it syncs;
+    the others take the time of the last sync from the state file, so
+    they fall back to BigQuery together when syncing stops. State writes
+    hold an flock on `<state>.lock` and go through a per-process
+    temporary file, since a new syncer may overlap the previous one.
+    """
+
+    def __init__(
+        self,
+        primary: BigQueryRepository,
+        replica: SQLiteRepository,
+        state_path: str,
+        interval_seconds: float,
+        max_staleness_seconds: float,
+        overlap_seconds: float,
+        batch_rows: int,
+        retention_days: int,
+        lease: Optional[SQLiteLease] = None,
+        lease_heartbeat_seconds: float = 5.0
+    ):
+        self.primary = primary
+        self.replica = replica
+        self.state_path = Path(state_path)
+        self.lock_path = self.state_path.with_name(self.state_path.name + ".lock")
+        self.interval_seconds = interval_seconds
+        self.max_staleness_seconds = max_staleness_seconds
+        self.overlap = timedelta(seconds=overlap_seconds)
+        self.batch_rows = batch_rows
+        self.retention = timedelta(days=retention_days)
+        self.watermark_ingested_at, self.watermark_id, self.last_synced_at = self._load_state()
+        self.last_sync_rows = 0
+        self.last_sync_seconds = 0.0
+        self.synced_rows = 0
+        self.failures = 0
+        self.last_error: Optional[str] = None
+        self._state_checked_at = time.monotonic()
+        self._task: Optional[asyncio.Task] = None
+        self.elector = None
+        if lease is not None:
+            self.elector = LeaderElector(
+                lease,
+                heartbeat_seconds=lease_heartbeat_seconds,
+                on_elected=self._start_syncing,
+                on_demoted=self._stop_syncing
+            )
+
+    @property
+    def syncing(self) -> bool:
+        """Whether this process runs the sync loop"""
+        return self._task is not None and not self._task.done()
+
+    @contextmanager
+    def _locked(self):
+        """Hold the cross-process state lock; proceeds unlocked if the lock file can't be opened"""
+        try:
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            lock_fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        except OSError as e:
+            logger.warning(f"Replica state lock unavailable: {str(e)}")
+            yield
+            return
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(lock_fd)  # Releases the flock
+
+    def _load_state(self) -> Tuple[Optional[datetime], str, Optional[float]]:
+        """(watermark ingested_at, watermark id, epoch seconds of the last finished sync)"""
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                state = json.load(f)
+            return datetime.fromisoformat(state["ingested_at"]), state["id"], state.get("synced_at")
+        except FileNotFoundError:
+            return None, "", None
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable replica state {self.state_path}: {str(e)}")
+            return None, "", None
+
+    def _save_state(self):
+        if self.watermark_ingested_at is None:
+            return
+        tmp_path = None
+        try:
+            with self._locked():
+                # Never move the shared watermark back, e.g. behind a previous syncer's last write
+                ingested_at, record_id, _ = self._load_state()
+                if ingested_at is not None and (ingested_at, record_id) > (self.watermark_ingested_at, self.watermark_id):
+                    self.watermark_ingested_at, self.watermark_id = ingested_at, record_id
+                fd, tmp_path = tempfile.mkstemp(
+                    dir=self.state_path.parent, prefix=self.state_path.name + ".", suffix=".tmp"
+                )
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(
+                        {
+                            "ingested_at": self.watermark_ingested_at.isoformat(),
+                            "id": self.watermark_id,
+                            "synced_at": self.last_synced_at
+                        },
+                        f, indent=2
+                    )
+                os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            logger.warning(f"Failed to save replica state: {str(e)}")
+
+    def is_fresh(self) -> bool:
+        """Whether the last successful sync, by any process, is recent enough to serve reads"""
+        if not self.syncing and time.monotonic() - self._state_checked_at >= STATE_RECHECK_SECONDS:
+            self._state_checked_at = time.monotonic()
+            _, _, self.last_synced_at = self._load_state()
+        return (
+            self.last_synced_at is not None
+            and time.time() - self.last_synced_at <= self.max_staleness_seconds
+        )
+
+    async def sync_once(self) -> int:
+        """
+        Copy rows loaded since the watermark into the replica
+
+        Returns:
+            Number of rows read from BigQuery
+        """
+        started = time.monotonic()
+        since = datetime.now(timezone.utc) - self.retention
+        after_ingested_at, after_id = self.watermark_ingested_at, self.watermark_id
+        if after_ingested_at is not None and after_ingested_at - self.overlap > _EPOCH:
+            after_ingested_at, after_id = after_ingested_at - self.overlap, ""
+
+        rows = 0
+        earliest: Optional[datetime] = None
+        while True:
+            changes = await self.primary.read_changes(after_ingested_at, after_id, since, self.batch_rows)
+            if not changes:
+                break
+
+            records = [record for record, _ in changes]
+            await self.replica.insert_weather_data(records)
+            batch_earliest = min(record.timestamp for record in records)
+            earliest = batch_earliest if earliest is None else min(earliest, batch_earliest)
+
+            last_record, last_ingested_at = changes[-1]
+            after_ingested_at, after_id = last_ingested_at or _EPOCH, last_record.id
+            if self.watermark_ingested_at is None or (after_ingested_at, after_id) > (self.watermark_ingested_at, self.watermark_id):
+                self.watermark_ingested_at, self.watermark_id = after_ingested_at, after_id
+                await asyncio.to_thread(self._save_state)
+            rows += len(changes)
+
+            if len(changes) < self.batch_rows:
+                break
+
+        if earliest is not None:
+            await self.replica.refresh_rollups(earliest)
+        await self.replica.delete_before(since)
+
+        self.last_synced_at = time.time()
+        await asyncio.to_thread(self._save_state)
+        self.last_sync_rows = rows
+        self.last_sync_seconds = time.monotonic() - started
+        self.synced_rows += rows
+        logger.info(f"Replica sync read {rows} rows in {self.last_sync_seconds:.2f}s")
+        return rows
+
+    def start(self):
+        """Start syncing in the background, or campaign for the sync lease first"""
+        if self.elector is not None:
+            self.elector.start()
+        else:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self.elector is not None:
+            await self.elector.stop()
+        await self._stop_syncing()
+
+    async def _start_syncing(self):
+        # Continue from wherever the previous syncer got to
+        self.watermark_ingested_at, self.watermark_id, self.last_synced_at = self._load_state()
+        if not self.syncing:
+            self._task = asyncio.create_task(self._run())
+        logger.info("Replica sync running in this process")
+
+    async def _stop_syncing(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        consecutive_failures = 0
+        while True:
+            try:
+                await self.sync_once()
+                consecutive_failures = 0
+                delay = self.interval_seconds
+            except Exception as e:
+                self.failures += 1
+                self.last_error = str(e)
+                delay = backoff_delay(consecutive_failures, 5.0, self.interval_seconds)
+                consecutive_failures += 1
+                logger.error(f"Replica sync failed, retrying in {delay:.1f}s: {str(e)}")
+            await asyncio.sleep(delay)
+
+    def stats(self) -> dict:
+        """Sync counters for monitoring"""
+        return {
+            "fresh": self.is_fresh(),
+            "syncing": self.syncing,
+            "seconds_since_sync": (
+                round(time.time() - self.last_synced_at, 1) if self.last_synced_at is not None else None
+            ),
+            "watermark": self.watermark_ingested_at.isoformat() if self.watermark_ingested_at else None,
+            "last_sync_rows": self.last_sync_rows,
+            "last_sync_seconds": round(self.last_sync_seconds, 3),
+            "synced_rows": self.synced_rows,
+            "failures": self.failures,
+            "last_error": self.last_error
+        }
+
+
+class ReplicatedRepository(WeatherRepository):
+    """
+    Writes go to BigQuery; reads are served locally while the replica is fresh
+
+    Successful writes are also applied to the replica straight away, so
+    the ingesting process sees its own writes without waiting for a sync.
+    If the replica is stale (sync failing or not yet completed) or a local
+    read fails, the read falls back to BigQuery.
+    """
+
+    def __init__(
+        self,
+        primary: BigQueryRepository,
+        replica: SQLiteRepository,
+        synchronizer: ReplicaSynchronizer
+    ):
+        self.primary = primary
+        self.replica = replica
+        self.synchronizer = synchronizer
+        self.replica_reads = 0
+        self.primary_reads = 0
+
+    async def _read(self, method: str, *args, **kwargs):
+        if self.synchronizer.is_fresh():
+            try:
+                result = await getattr(self.replica, method)(*args, **kwargs)
+                self.replica_reads += 1
+                return result
+            except Exception as e:
+                logger.warning(f"Replica {method} failed, reading from BigQuery: {str(e)}")
+        self.primary_reads += 1
+        return await getattr(self.primary, method)(*args, **kwargs)
+
+    async def _write_through(self, method: str, *args):
+        try:
+            await getattr(self.replica, method)(*args)
+        except Exception as e:
+            # The next sync copies the rows anyway
+            logger.warning(f"Replica {method} failed: {str(e)}")
+
+    async def initialize_schema(self, migrate: bool = True):
+        """Create both schemas and start background syncing (in the lease holder only)"""
+        await self.primary.initialize_schema(migrate)
+        await self.replica.initialize_schema(migrate)
+        self.synchronizer.start()
+
+    async def insert_weather_data(self, weather_records: List[WeatherData]) -> int:
+        count = await self.primary.insert_weather_data(weather_records)
+        await self._write_through("insert_weather_data", weather_records)
+        return count
+
+    async def insert_weather_batch(self, batch: WeatherBatch) -> int:
+        count = await self.primary.insert_weather_batch(batch)
+        await self._write_through("insert_weather_batch", batch)
+        return count
+
+    async def get_latest_weather(self, city: str) -> Optional[WeatherData]:
+        return await self._read("get_latest_weather", city)
+
+    async def get_latest_weather_bulk(self, cities: Optional[List[str]] = None) -> List[WeatherData]:
+        return await self._read("get_latest_weather_bulk", cities)
+
+    async def get_weather_history(self, city: str, days: int) -> List[WeatherData]:
+        return await self._read("get_weather_history", city, days)
+
+    async def get_weather_history_page(
+        self,
+        city: str,
+        days: int,
+        limit: int,
+        after: Optional[Tuple[datetime, str]] = None
+    ) -> List[WeatherData]:
+        return await self._read("get_weather_history_page", city, days, limit, after)
+
+    async def iter_weather_history(
+        self,
+        city: str,
+        days: int,
+        chunk_rows: int
+    ) -> AsyncIterator[List[WeatherData]]:
+        # No fallback once streaming has started: rows already sent can't be retracted
+        if self.synchronizer.is_fresh():
+            self.replica_reads += 1
+            source = self.replica
+        else:
+            self.primary_reads += 1
+            source = self.primary
+        async for chunk in source.iter_weather_history(city, days, chunk_rows):
+            yield chunk
+
+    async def get_weather_statistics(
+        self,
+        city: str,
+        days: int,
+        sample_size: int = 10
+    ) -> Optional[WeatherStatistics]:
+        return await self._read("get_weather_statistics", city, days, sample_size)
+
+    async def refresh_rollups(self, since: datetime):
+        await self.primary.refresh_rollups(since)
+        await self._write_through("refresh_rollups", since)
+
+    async def get_weather_rollups(
+        self,
+        city: str,
+        days: int,
+        resolution: str
+    ) -> List[WeatherAggregate]:
+        return await self._read("get_weather_rollups", city, days, resolution)
+
+    async def close(self):
+        await self.synchronizer.stop()
+        await self.replica.close()
+        await self.primary.close()
+
+    def stats(self) -> dict:
+        """Read routing and sync counters for monitoring"""
+        return {
+            "backend": "bigquery+replica",
+            "replica_reads": self.replica_reads,
+            "primary_reads": self.primary_reads,
+            "sync": self.synchronizer.stats()
+        }
@@ -0,0 +1,570 @@
+"""Embedded SQLite repository for single-node deployments and offline use"""
+import asyncio
+import functools
+import json
+import logging
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Tuple
+import numpy as np
+from app.models import (
+    ConditionCount,
+    WeatherAggregate,
+    WeatherBatch,
+    WeatherData,
+    WeatherStatistics,
+    normalize_city,
+    weather_record_id_from_key,
+)
+from app.repositories.base import WeatherRepository
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+# Bucket widths in microseconds; UTC days align with the epoch
+ROLLUP_BUCKET_US = {"hourly": 3_600_000_000, "daily": 86_400_000_000}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS weather_records (
+  id TEXT PRIMARY KEY,
+  city TEXT NOT NULL,
+  city_key TEXT NOT NULL,
+  timestamp INTEGER NOT NULL,  -- epoch microseconds, UTC
+  temperature REAL NOT NULL,
+  humidity INTEGER NOT NULL,
+  wind_speed REAL NOT NULL,
+  condition TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS weather_records_city_time
+  ON weather_records (city_key, timestamp DESC);
+CREATE INDEX IF NOT EXISTS weather_records_time
+  ON weather_records (timestamp);
+
+CREATE TABLE IF NOT EXISTS weather_rollups (
+  resolution TEXT NOT NULL,
+  city_key TEXT NOT NULL,
+  bucket_start INTEGER NOT NULL,  -- epoch microseconds, UTC
+  city TEXT NOT NULL,
+  record_count INTEGER NOT NULL,
+  min_temperature REAL NOT NULL,
+  max_temperature REAL NOT NULL,
+  mean_temperature REAL NOT NULL,
+  mean_humidity REAL NOT NULL,
+  mean_wind_speed REAL NOT NULL,
+  condition_counts TEXT NOT NULL,  -- JSON array of {condition, count}
+  updated_at INTEGER NOT NULL,
+  PRIMARY KEY (resolution, city_key, bucket_start)
+) WITHOUT ROWID;
+"""
+
+
+def to_micros(value: datetime) -> int:
+    """Epoch microseconds for a datetime; naive values are treated as UTC"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def from_micros(value: int) -> datetime:
+    return _EPOCH + timedelta(microseconds=value)
+
+
+class SQLiteRepository(WeatherRepository):
+    """
+    Weather repository backed by a local SQLite database file
+
+    Implements the same interface as BigQueryRepository with the same
+    semantics: writes are idempotent on record `id` (INSERT OR IGNORE),
+    and rollups use UTC hour/day buckets. All statements run on one
+    dedicated thread that owns the connection, so the event loop never
+    blocks and no locking is needed around the connection. The database
+    runs in WAL mode so the file can also be read by other processes.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or settings.SQLITE_PATH
+        if self.path != ":memory:":
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+        self._connection: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the connection on first use (always on the repository thread)"""
+        if self._connection is None:
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.row_factory = sqlite3.Row
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+        return self._connection
+
+    async def _run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking database call on the repository thread"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    def _fetch_all(self, query: str, params: tuple = ()) -> List[sqlite3.Row]:
+        return self._connect().execute(query, params).fetchall()
+
+    @staticmethod
+    def _row_to_weather_data(row: sqlite3.Row) -> WeatherData:
+        """Convert a result row to a WeatherData object"""
+        return WeatherData(
+            id=row["id"],
+            city=row["city"],
+            timestamp=from_micros(row["timestamp"]),
+            temperature=row["temperature"],
+            humidity=row["humidity"],
+            wind_speed=row["wind_speed"],
+            condition=row["condition"]
+        )
+
+    @staticmethod
+    def _since_micros(days: float) -> int:
+        return to_micros(datetime.now(timezone.utc) - timedelta(days=days))
+
+    async def initialize_schema(self, migrate: bool = True):
+        """Create tables and indexes if they don't exist; the schema has no migrations"""
+        def create():
+            with self._connect() as connection:
+                connection.executescript(SCHEMA)
+        await self._run(create)
+        logger.info(f"SQLite schema ready at {self.path}")
+
+    async def close(self):
+        """Close the connection and stop the repository thread"""
+        def close_connection():
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+        await self._run(close_connection)
+        self._executor.shutdown(wait=False)
+
+    def stats(self) -> dict:
+        """Backend counters for monitoring"""
+        return {"backend": "sqlite"}
+
+    def _insert_rows(self, rows) -> int:
+        with self._connect() as connection:
+            connection.executemany(
+                """
+                INSERT OR IGNORE INTO weather_records
+                  (id, city, city_key, timestamp, temperature, humidity, wind_speed, condition)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                rows
+            )
+        return len(rows)
+
+    async def insert_weather_data(self, weather_records: List[WeatherData]) -> int:
+        """
+        Insert weather data, skipping IDs that are already stored
+
+        Args:
+            weather_records: List of WeatherData objects
+
+        Returns:
+            Number of records attempted to insert
+        """
+        if not weather_records:
+            logger.warning("No weather records to insert")
+            return 0
+
+        rows = [
+            (
+                record.id,
+                record.city,
+                normalize_city(record.city),
+                to_micros(record.timestamp),
+                record.temperature,
+                record.humidity,
+                record.wind_speed,
+                record.condition
+            )
+            for record in weather_records
+        ]
+
+        try:
+            count = await self._run(self._insert_rows, rows)
+            logger.info(f"Successfully inserted {count} weather records")
+            return count
+        except Exception as e:
+            logger.error(f"Error inserting weather data: {str(e)}")
+            raise
+
+    async def insert_weather_batch(self, batch: WeatherBatch) -> int:
+        """
+        Insert a column-oriented batch of weather data
+
+        Args:
+            batch: WeatherBatch of rows to insert
+
+        Returns:
+            Number of records attempted to insert
+        """
+        if not len(batch):
+            return 0
+
+        def build_and_insert():
+            city_keys = batch.city_key.tolist()
+            timestamps = batch.timestamp.astype(np.int64).tolist()
+            rows = list(zip(
+                [weather_record_id_from_key(key, ts) for key, ts in zip(city_keys, timestamps)],
+                batch.city.tolist(),
+                city_keys,
+                timestamps,
+                batch.temperature.tolist(),
+                batch.humidity.tolist(),
+                batch.wind_speed.tolist(),
+                batch.condition.tolist()
+            ))
+            return self._insert_rows(rows)
+
+        try:
+            count = await self._run(build_and_insert)
+            logger.info(f"Successfully inserted {count} weather records")
+            return count
+        except Exception as e:
+            logger.error(f"Error inserting weather data: {str(e)}")
+            raise
+
+    async def delete_before(self, cutoff: datetime) -> int:
+        """
+        Delete observations and rollup buckets older than `cutoff`
+
+        Returns:
+            Number of observations deleted
+        """
+        cutoff_us = to_micros(cutoff)
+
+        def delete():
+            with self._connect() as connection:
+                deleted = connection.execute(
+                    "DELETE FROM weather_records WHERE timestamp < ?", (cutoff_us,)
+                ).rowcount
+                # Keep the daily bucket that contains the cutoff
+                connection.execute(
+                    "DELETE FROM weather_rollups WHERE bucket_start < ?",
+                    (cutoff_us - cutoff_us % ROLLUP_BUCKET_US["daily"],)
+                )
+            return deleted
+
+        return await self._run(delete)
+
+    async def get_latest_weather(self, city: str) -> Optional[WeatherData]:
+        """
+        Get latest weather data for a city
+
+        Args:
+            city: City name
+
+        Returns:
+            WeatherData object or None
+        """
+        query = """
+        SELECT id, city, timestamp, temperature, humidity, wind_speed, condition
+        FROM weather_records
+        WHERE city_key = ? AND timestamp >= ?
+        ORDER BY timestamp DESC
+        LIMIT 1
+        """
+
+        try:
+            rows = await self._run(
+                self._fetch_all, query,
+                (normalize_city(city), self._since_micros(settings.LATEST_LOOKBACK_DAYS))
+            )
+            return self._row_to_weather_data(rows[0]) if rows else None
+
+        except Exception as e:
+            logger.error(f"Error fetching latest weather for {city}: {str(e)}")
+            raise
+
+    async def get_latest_weather_bulk(self, cities: Optional[List[str]] = None) -> List[WeatherData]:
+        """
+        Get the latest weather data for many cities in one query
+
+        Args:
+            cities: City names to include, or None for every city
+
+        Returns:
+            List of WeatherData objects, one per city found
+        """
+        params: list = [self._since_micros(settings.LATEST_LOOKBACK_DAYS)]
+        city_filter = ""
+        if cities is not None:
+            if not cities:
+                return []
+            keys = sorted({normalize_city(city) for city in cities})
+            city_filter = f"AND city_key IN ({', '.join('?' for _ in keys)})"
+            params.extend(keys)
+
+        # SQLite fills bare columns from the row that produced MAX(timestamp)
+        query = f"""
+        SELECT id, city, MAX(timestamp) AS timestamp, temperature, humidity, wind_speed, condition
+        FROM weather_records
+        WHERE timestamp >= ? {city_filter}
+        GROUP BY city_key
+        """
+
+        try:
+            rows = await self._run(self._fetch_all, query, tuple(params))
+            return [self._row_to_weather_data(row) for row in rows]
+
+        except Exception as e:
+            logger.error(f"Error fetching latest weather in bulk: {str(e)}")
+            raise
+
+    async def get_weather_history(self, city: str, days: int) -> List[WeatherData]:
+        """
+        Get weather history for a city
+
+        Args:
+            city: City name
+            days: Number of days to retrieve
+
+        Returns:
+            List of WeatherData objects, newest first
+        """
+        query = """
+        SELECT id, city, timestamp, temperature, humidity, wind_speed, condition
+        FROM weather_records
+        WHERE city_key = ? AND timestamp >= ?
+        ORDER BY timestamp DESC
+        """
+
+        try:
+            rows = await self._run(
+                self._fetch_all, query, (normalize_city(city), self._since_micros(days))
+            )
+            return [self._row_to_weather_data(row) for row in rows]
+
+        except Exception as e:
+            logger.error(f"Error fetching weather history for {city}: {str(e)}")
+            raise
+
+    async def get_weather_history_page(
+        self,
+        city: str,
+        days: int,
+        limit: int,
+        after: Optional[Tuple[datetime, str]] = None
+    ) -> List[WeatherData]:
+        """
+        Get one keyset page of weather history for a city
+
+        Args:
+            city: City name
+            days: Number of days to retrieve
+            limit: Maximum rows to return
+            after: (timestamp, id) of the last row already returned
+
+        Returns:
+            List of WeatherData objects, newest first
+        """
+        params: list = [normalize_city(city), self._since_micros(days)]
+        keyset_filter = ""
+        if after is not None:
+            after_us = to_micros(after[0])
+            # The first bound keeps the index range scan; the second breaks timestamp ties
+            keyset_filter = "AND timestamp <= ? AND (timestamp < ? OR id < ?)"
+            params.extend([after_us, after_us, after[1]])
+        params.append(max(1, int(limit)))
+
+        query = f"""
+        SELECT id, city, timestamp, temperature, humidity, wind_speed, condition
+        FROM weather_records
+        WHERE city_key = ? AND timestamp >= ? {keyset_filter}
+        ORDER BY timestamp DESC, id DESC
+        LIMIT ?
+        """
+
+        try:
+            rows = await self._run(self._fetch_all, query, tuple(params))
+            return [self._row_to_weather_data(row) for row in rows]
+
+        except Exception as e:
+            logger.error(f"Error fetching weather history page for {city}: {str(e)}")
+            raise
+
+    async def get_weather_statistics(
+        self,
+        city: str,
+        days: int,
+        sample_size: int = 10
+    ) -> Optional[WeatherStatistics]:
+        """
+        Get aggregate statistics and the newest records for a city
+
+        Args:
+            city: City name
+            days: Number of days to aggregate
+            sample_size: Maximum number of recent records to include
+
+        Returns:
+            WeatherStatistics object or None if the period has no data
+        """
+        params = (normalize_city(city), self._since_micros(days))
+
+        def query_statistics():
+            summary = self._fetch_all(
+                """
+                SELECT COUNT(*) AS record_count,
+                       AVG(temperature) AS average_temperature,
+                       MIN(temperature) AS min_temperature,
+                       MAX(temperature) AS max_temperature,
+                       AVG(humidity) AS average_humidity
+                FROM weather_records
+                WHERE city_key = ? AND timestamp >= ?
+                """,
+                params
+            )[0]
+            recent = self._fetch_all(
+                """
+                SELECT id, city, timestamp, temperature, humidity, wind_speed, condition
+                FROM weather_records
+                WHERE city_key = ? AND timestamp >= ?
+                ORDER BY timestamp DESC
+                LIMIT ?
+                """,
+                params + (max(0, int(sample_size)),)
+            )
+            return summary, recent
+
+        try:
+            summary, recent = await self._run(query_statistics)
+            if summary["record_count"] == 0:
+                return None
+
+            return WeatherStatistics(
+                city=city,
+                record_count=summary["record_count"],
+                average_temperature=summary["average_temperature"],
+                min_temperature=summary["min_temperature"],
+                max_temperature=summary["max_temperature"],
+                average_humidity=summary["average_humidity"],
+                recent_records=[self._row_to_weather_data(row) for row in recent]
+            )
+
+        except Exception as e:
+            logger.error(f"Error fetching weather statistics for {city}: {str(e)}")
+            raise
+
+    async def refresh_rollups(self, since: datetime):
+        """
+        Recompute hourly and daily rollup rows touched by data since `since`
+
+        Args:
+            since: Earliest observation timestamp written since the last refresh
+        """
+        since_us = to_micros(since)
+
+        def refresh():
+            with self._connect() as connection:
+                for resolution, width in ROLLUP_BUCKET_US.items():
+                    connection.execute(
+                        """
+                        INSERT OR REPLACE INTO weather_rollups
+                        WITH scoped AS (
+                          SELECT *, timestamp - (timestamp % :width) AS bucket_start
+                          FROM weather_records
+                          WHERE timestamp >= :since - (:since % :width)
+                        ),
+                        stats AS (
+                          SELECT city_key, bucket_start, MAX(city) AS city, COUNT(*) AS record_count,
+                                 MIN(temperature) AS min_temperature, MAX(temperature) AS max_temperature,
+                                 AVG(temperature) AS mean_temperature, AVG(humidity) AS mean_humidity,
+                                 AVG(wind_speed) AS mean_wind_speed
+                          FROM scoped
+                          GROUP BY city_key, bucket_start
+                        ),
+                        per_condition AS (
+                          SELECT city_key, bucket_start, condition, COUNT(*) AS count
+                          FROM scoped
+                          GROUP BY city_key, bucket_start, condition
+                          ORDER BY count DESC, condition
+                        ),
+                        conditions AS (
+                          SELECT city_key, bucket_start,
+                                 json_group_array(json_object('condition', condition, 'count', count)) AS condition_counts
+                          FROM per_condition
+                          GROUP BY city_key, bucket_start
+                        )
+                        SELECT :resolution, stats.city_key, stats.bucket_start, city, record_count,
+                               min_temperature, max_temperature, mean_temperature, mean_humidity,
+                               mean_wind_speed, condition_counts, :now
+                        FROM stats JOIN conditions USING (city_key, bucket_start)
+                        """,
+                        {
+                            "width": width,
+                            "since": since_us,
+                            "resolution": resolution,
+                            "now": to_micros(datetime.now(timezone.utc))
+                        }
+                    )
+
+        try:
+            await self._run(refresh)
+            logger.info(f"Refreshed rollups from {since.isoformat()}")
+
+        except Exception as e:
+            logger.error(f"Error refreshing rollups: {str(e)}")
+            raise
+
+    async def get_weather_rollups(
+        self,
+        city: str,
+        days: int,
+        resolution: str
+    ) -> List[WeatherAggregate]:
+        """
+        Get pre-aggregated weather history for a city
+
+        Args:
+            city: City name
+            days: Number of days to retrieve
+            resolution: "hourly" or "daily"
+
+        Returns:
+            List of WeatherAggregate objects, newest bucket first
+        """
+        width = ROLLUP_BUCKET_US[resolution]
+        start_us = self._since_micros(days)
+
+        query = """
+        SELECT city, bucket_start, record_count, min_temperature, max_temperature,
+               mean_temperature, mean_humidity, mean_wind_speed, condition_counts
+        FROM weather_rollups
+        WHERE resolution = ? AND city_key = ? AND bucket_start >= ?
+        ORDER BY bucket_start DESC
+        """
+
+        try:
+            rows = await self._run(
+                self._fetch_all, query,
+                (resolution, normalize_city(city), start_us - start_us % width)
+            )
+
+            return [
+                WeatherAggregate(
+                    city=row["city"],
+                    bucket_start=from_micros(row["bucket_start"]),
+                    record_count=row["record_count"],
+                    min_temperature=row["min_temperature"],
+                    max_temperature=row["max_temperature"],
+                    mean_temperature=row["mean_temperature"],
+                    mean_humidity=row["mean_humidity"],
+                    mean_wind_speed=row["mean_wind_speed"],
+                    condition_counts=[
+                        ConditionCount(**item) for item in json.loads(row["condition_counts"])
+                    ]
+                )
+                for row in rows
+            ]
+
+        except Exception as e:
+            logger.error(f"Error fetching {resolution} rollups for {city}: {str(e)}")
+            raise
@@ -1,8 +1,8 @@
 """API routes for the weather agent"""
 import logging
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from app.models import AgentQueryRequest, AgentQueryResponse
-from app.services.weather_agent import get_weather_agent
+from app.dependencies import get_weather_agent
 
 logger = logging.getLogger(__name__)
 
@@ -10,7 +10,7 @@ router = APIRouter(prefix="/agent", tags=["agent"])
 
 
 @router.post("/query", response_model=AgentQueryResponse)
-async def query_agent(request: AgentQueryRequest):
+async def query_agent(request: AgentQueryRequest, http_request: Request):
     """
     Query the weather agent with a natural language question.
 
@@ -26,7 +26,7 @@ async def query_agent(request: AgentQueryRequest):
     - "How humid is it in London right now?"
     """
     try:
-        agent = get_weather_agent()
+        agent = get_weather_agent(http_request)
         result = await agent.process_query(
             user_message=request.query,
             conversation_history=request.conversation_history
@@ -43,10 +43,10 @@ async def query_agent(request: AgentQueryRequest):
 
 
 @router.get("/health")
-async def agent_health():
+async def agent_health(http_request: Request):
     """Check if the agent service is healthy"""
     try:
-        agent = get_weather_agent()
+        agent = get_weather_agent(http_request)
         return {
             "status": "healthy",
             "model": agent.model,
@@ -1,22 +1,145 @@
 """API routes for weather data endpoints"""
-from fastapi import APIRouter, HTTPException, Query
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, List, Literal, Optional, Union
 import logging
-from app.repositories.bigquery_repo import BigQueryRepository
-from app.models import WeatherLatestResponse, WeatherHistoryResponse
+from app.config import settings
+from app.dependencies import get_repository, get_latest_store
+from app.repositories.base import WeatherRepository
+from app.services.conditional import is_not_modified, observation_validators, validator_headers
+from app.services.latest_store import LatestObservationStore
+from app.models import (
+    WeatherData,
+    WeatherLatestResponse,
+    WeatherHistoryResponse,
+    WeatherAggregateHistoryResponse,
+    decode_history_cursor,
+    encode_history_cursor,
+)
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/weather", tags=["weather"])
 
 
-def get_repository():
-    """Dependency for BigQuery repository"""
-    return BigQueryRepository()
+def _check_conditional(
+    request: Request,
+    response: Response,
+    records: Optional[List],
+    sliding_window: bool = False,
+    generation: int = 0
+):
+    """
+    Attach validators from the latest observations and short-circuit with 304
+
+    Runs as a dependency, before the route touches storage. When the latest
+    store can't vouch for every city involved, no validators are sent and
+    the request is served normally.
+    """
+    if not records:
+        return
+    variant = f"{request.url.path}?{request.url.query}"
+    etag, last_modified = observation_validators(records, variant, sliding_window, generation=generation)
+    headers = validator_headers(etag, last_modified)
+    if is_not_modified(request.headers, etag, last_modified):
+        raise HTTPException(status_code=304, headers=headers)
+    response.headers.update(headers)
+
+
+def conditional_latest_bulk(
+    request: Request,
+    response: Response,
+    latest_store: LatestObservationStore = Depends(get_latest_store)
+):
+    """Conditional request handling for /weather/latest"""
+    cities = request.query_params.getlist("cities") or None
+    _check_conditional(request, response, latest_store.get_all_fresh(cities))
+
+
+def conditional_city(
+    city: str,
+    request: Request,
+    response: Response,
+    latest_store: LatestObservationStore = Depends(get_latest_store)
+):
+    """Conditional request handling for single-city latest weather"""
+    _check_conditional(request, response, latest_store.get_all_fresh([city]))
+
+
+def conditional_city_window(
+    city: str,
+    request: Request,
+    response: Response,
+    latest_store: LatestObservationStore = Depends(get_latest_store)
+):
+    """Conditional request handling for single-city history over the last `days` days"""
+    _check_conditional(
+        request,
+        response,
+        latest_store.get_all_fresh([city]),
+        sliding_window=True,
+        generation=latest_store.generation([city])
+    )
+
+
+@router.get(
+    "/latest",
+    response_model=List[WeatherLatestResponse],
+    dependencies=[Depends(conditional_latest_bulk)]
+)
+async def get_latest_weather_bulk(
+    cities: Optional[List[str]] = Query(
+        default=None,
+        description="Cities to include (repeat the parameter); omit for every tracked city"
+    ),
+    repository: WeatherRepository = Depends(get_repository),
+    latest_store: LatestObservationStore = Depends(get_latest_store)
+):
+    """
+    Get the latest weather data for every city, or a subset, in one call
+    
+    Args:
+        cities: Optional list of city names
+        
+    Returns:
+        Latest weather data for each city that has data
+        
+    Raises:
+        HTTPException: If error occurs
+    """
+    try:
+        weather_records = await latest_store.get_many_or_load(cities, repository)
+        
+        return [
+            WeatherLatestResponse(
+                city=record.city,
+                timestamp=record.timestamp,
+                temperature=record.temperature,
+                humidity=record.humidity,
+                wind_speed=record.wind_speed,
+                condition=record.condition
+            )
+            for record in sorted(weather_records, key=lambda record: record.city)
+        ]
+        
+    except Exception as e:
+        logger.error(f"Error fetching latest weather in bulk: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Internal server error: {str(e)}"
+        )
 
 
-@router.get("/latest/{city}", response_model=WeatherLatestResponse)
-async def get_latest_weather(city: str):
+@router.get(
+    "/latest/{city}",
+    response_model=WeatherLatestResponse,
+    dependencies=[Depends(conditional_city)]
+)
+async def get_latest_weather(
+    city: str,
+    repository: WeatherRepository = Depends(get_repository),
+    latest_store: LatestObservationStore = Depends(get_latest_store)
+):
     """
     Get the latest weather data for a specific city
     
@@ -29,10 +152,8 @@ async def get_latest_weather(city: str):
     Raises:
         HTTPException: If city not found or error occurs
     """
-    repository = get_repository()
-    
     try:
-        weather_data = await repository.get_latest_weather(city)
+        weather_data = await latest_store.get_or_load(city, repository)
         
         if not weather_data:
             raise HTTPException(
@@ -59,10 +180,67 @@ async def get_latest_weather(city: str):
         )
 
 
-@router.get("/history/{city}", response_model=WeatherHistoryResponse)
+def resolve_history_resolution(resolution: str, days: int) -> str:
+    """
+    Pick the table a history request is served from
+
+    "auto" uses daily buckets beyond two weeks and raw rows otherwise.
+    Observations are already hourly, so the hourly rollup holds as many
+    rows as the raw table and is never a cheaper choice.
+    """
+    if resolution != "auto":
+        return resolution
+    if days > 14:
+        return "daily"
+    return "raw"
+
+
+# Fields of WeatherLatestResponse, written per row in ndjson history
+_HISTORY_ROW_FIELDS = set(WeatherLatestResponse.model_fields)
+
+
+async def _ndjson_history(
+    first_chunk: Optional[List[WeatherData]],
+    chunks: AsyncIterator[List[WeatherData]]
+) -> AsyncIterator[str]:
+    """Encode history chunks as newline-delimited JSON as they arrive from storage"""
+    chunk = first_chunk
+    try:
+        while chunk is not None:
+            yield "".join(record.model_dump_json(include=_HISTORY_ROW_FIELDS) + "\n" for record in chunk)
+            chunk = await anext(chunks, None)
+    except Exception as e:
+        # Headers are already sent; aborting leaves the client a truncated body
+        logger.error(f"Error streaming weather history: {str(e)}")
+        raise
+
+
+@router.get(
+    "/history/{city}",
+    response_model=Union[WeatherHistoryResponse, WeatherAggregateHistoryResponse],
+    dependencies=[Depends(conditional_city_window)]
+)
 async def get_weather_history(
     city: str,
-    days: int = Query(default=7, ge=1, le=60, description="Number of days of history to retrieve")
+    response: Response,
+    days: int = Query(default=7, ge=1, le=60, description="Number of days of history to retrieve"),
+    resolution: Literal["raw", "hourly", "daily", "auto"] = Query(
+        default="raw",
+        description="raw observations, hourly/daily aggregates, or auto to pick by range"
+    ),
+    limit: Optional[int] = Query(
+        default=None,
+        ge=1,
+        le=settings.HISTORY_PAGE_MAX_ROWS,
+        description="Page size; returns raw rows one page at a time with next_cursor"
+    ),
+    cursor: Optional[str] = Query(default=None, description="next_cursor from the previous page"),
+    response_format: Literal["json", "ndjson"] = Query(
+        default="json",
+        alias="format",
+        description="ndjson streams raw rows, one JSON object per line, newest first"
+    ),
+    repository: WeatherRepository = Depends(get_repository)
 ):
     """
     Get weather history for a specific city
@@ -70,17 +248,64 @@ async def get_weather_history(
     Args:
         city: City name
         days: Number of days of history (1-60)
+        resolution: raw, hourly, daily or auto
+        limit: Page size for cursor pagination of raw rows
+        cursor: Position returned as next_cursor by the previous page
+        response_format: json, or ndjson to stream raw rows
         
     Returns:
-        Historical weather data for the city
+        Historical weather data for the city, as raw rows or aggregate buckets
         
     Raises:
-        HTTPException: If error occurs
+        HTTPException: If the cursor is invalid, paging is combined with a
+            rollup resolution, or an error occurs
     """
-    repository = get_repository()
-    
     try:
-        weather_records = await repository.get_weather_history(city, days)
+        paged = limit is not None or cursor is not None
+        if paged or response_format == "ndjson":
+            if resolution in ("hourly", "daily"):
+                raise HTTPException(
+                    status_code=400,
+                    detail="Pagination and ndjson are only available for raw history"
+                )
+            resolution = "raw"
+        else:
+            resolution = resolve_history_resolution(resolution, days)
+
+        if resolution != "raw":
+            aggregates = await repository.get_weather_rollups(city, days, resolution)
+            return WeatherAggregateHistoryResponse(
+                city=city,
+                resolution=resolution,
+                records=aggregates,
+                count=len(aggregates)
+            )
+
+        if response_format == "ndjson":
+            chunks = repository.iter_weather_history(city, days, settings.HISTORY_STREAM_CHUNK_ROWS)
+            # Read the first chunk up front so query errors still become a 500
+            first_chunk = await anext(chunks, None)
+            return StreamingResponse(
+                _ndjson_history(first_chunk, chunks),
+                media_type="application/x-ndjson",
+                headers=dict(response.headers)
+            )
+
+        next_cursor = None
+        if paged:
+            try:
+                after = decode_history_cursor(cursor) if cursor else None
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=str(e))
+            page_size = limit or settings.HISTORY_PAGE_DEFAULT_ROWS
+            # One extra row tells whether another page follows
+            weather_records = await repository.get_weather_history_page(city, days, page_size + 1, after)
+            if len(weather_records) > page_size:
+                weather_records = weather_records[:page_size]
+                last = weather_records[-1]
+                next_cursor = encode_history_cursor(last.timestamp, last.id)
+        else:
+            weather_records = await repository.get_weather_history(city, days)
         
         records_response = [
             WeatherLatestResponse(
@@ -97,9 +322,12 @@ async def get_weather_history(
         return WeatherHistoryResponse(
             city=city,
             records=records_response,
-            count=len(records_response)
+            count=len(records_response),
+            next_cursor=next_cursor
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching weather history for {city}: {str(e)}")
         raise HTTPException(
@@ -116,5 +344,4 @@ async def get_tracked_cities():
     Returns:
         List of city names
     """
-    from app.config import settings
     return settings.CITIES
\ No newline at end of file
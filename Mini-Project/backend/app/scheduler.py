@@ -2,125 +2,389 @@
 import asyncio
 import logging
 from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List, Optional
+import numpy as np
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
 from apscheduler.triggers.date import DateTrigger
+from app.services.rate_limiter import FetchRunStats
 from app.services.weather_api import WeatherAPIClient
-from app.repositories.bigquery_repo import BigQueryRepository
+from app.repositories.base import WeatherRepository
+from app.services.latest_store import LatestObservationStore
+from app.services.adaptive_polling import AdaptivePollPlanner
+from app.services.backfill import BackfillCheckpoint, generate_backfill_batches
+from app.services.ingest_pipeline import IngestPipeline
+from app.services.leader import LeaderElector, SQLiteLease, default_holder_id
+from app.services.sharding import ShardMembership, ingest_member_id
+from app.services.spool import SpoolFlusher, WriteAheadSpool
+from app.services.write_generations import ROLLUPS_SCOPE, SharedWriteGenerations
 from app.config import settings
-from app.models import WeatherData
+from app.models import WeatherData, normalize_city
 
 logger = logging.getLogger(__name__)
 
+# Long enough for a legacy table rebuild; a migrator that dies blocks the others this long
+SCHEMA_MIGRATION_LEASE_TTL_SECONDS = 6 * 3600
+
 
 class WeatherScheduler:
-    """Scheduler for weather data collection jobs"""
+    """
+    Scheduler for weather data collection jobs
+
+    With SCHEDULER_LEADER_ELECTION, every process (e.g. each uvicorn
+    worker) creates a scheduler but only the one holding the SQLite lease
+    runs the backfill, hourly update and spool flusher. If it dies, another
+    process takes the lease after SCHEDULER_LEASE_TTL_SECONDS and starts
+    the jobs; the backfill checkpoint, spool segment claims and
+    deterministic record IDs make the handover safe to overlap. The
+    flusher only exists while this process runs the jobs, so a standby
+    process never touches the shared spool.
+
+    With INGEST_SHARDING_ENABLED instead, every worker runs the jobs but
+    only for its consistent-hash share of CITIES, recomputed from the live
+    members at the start of each run. The account-wide
+    OPENWEATHER_CALLS_PER_MINUTE and ADAPTIVE_POLL_MAX_POLLS_PER_HOUR are
+    divided by the live member count at the same time.
+
+    With ADAPTIVE_POLLING_ENABLED, the update job runs every
+    ADAPTIVE_POLL_TICK_SECONDS and fetches only the cities
+    AdaptivePollPlanner says are due, so cities with fast-changing
+    weather are polled more often than flat ones.
+
+    Every stored batch and rollup refresh is published to
+    `write_generations`, so other processes drop their cached reads of
+    the cities written.
+    """
     
-    def __init__(self):
+    def __init__(
+        self,
+        repository: WeatherRepository,
+        weather_client: WeatherAPIClient,
+        latest_store: LatestObservationStore,
+        spool: Optional[WriteAheadSpool] = None,
+        write_generations: Optional[SharedWriteGenerations] = None
+    ):
         self.scheduler = AsyncIOScheduler()
-        self.weather_client = WeatherAPIClient()
-        self.repository = BigQueryRepository()
+        self.weather_client = weather_client
+        self.repository = repository
+        self.latest_store = latest_store
         self.cities = settings.CITIES
+        self.checkpoint = BackfillCheckpoint(settings.BACKFILL_CHECKPOINT_PATH)
+        self.update_runs = 0
+        self.update_failures = 0
+        self.last_update: Optional[dict] = None
+        self.spool = spool
+        self.write_generations = write_generations
+        self.flusher: Optional[SpoolFlusher] = None
+        self.poll_planner = None
+        if settings.ADAPTIVE_POLLING_ENABLED:
+            self.poll_planner = AdaptivePollPlanner(
+                min_interval_seconds=settings.ADAPTIVE_POLL_MIN_INTERVAL_MINUTES * 60,
+                max_interval_seconds=settings.ADAPTIVE_POLL_MAX_INTERVAL_MINUTES * 60,
+                default_interval_seconds=settings.UPDATE_INTERVAL_HOURS * 3600,
+                change_per_poll=settings.ADAPTIVE_POLL_CHANGE_PER_POLL,
+                max_polls_per_hour=settings.ADAPTIVE_POLL_MAX_POLLS_PER_HOUR
+            )
+        self.elector = None
+        self.membership = None
+        if settings.INGEST_SHARDING_ENABLED:
+            self.membership = ShardMembership(
+                settings.INGEST_MEMBERSHIP_PATH,
+                member_id=ingest_member_id(),
+                ttl_seconds=settings.INGEST_MEMBER_TTL_SECONDS,
+                heartbeat_seconds=settings.INGEST_MEMBER_HEARTBEAT_SECONDS,
+                vnodes=settings.INGEST_RING_VNODES
+            )
+        elif settings.SCHEDULER_LEADER_ELECTION:
+            self.elector = LeaderElector(
+                SQLiteLease(
+                    settings.SCHEDULER_LEASE_PATH,
+                    name="weather_scheduler",
+                    holder_id=default_holder_id(),
+                    ttl_seconds=settings.SCHEDULER_LEASE_TTL_SECONDS
+                ),
+                heartbeat_seconds=settings.SCHEDULER_LEASE_HEARTBEAT_SECONDS,
+                on_elected=self._start_jobs,
+                on_demoted=self._stop_jobs
+            )
     
+    async def assigned_cities(self) -> List[str]:
+        """Cities this process ingests: its shard when sharded, otherwise all of them"""
+        if self.membership is None:
+            return self.cities
+        shard = await self.membership.shard(self.cities)
+        self._share_quota(len(self.membership.last_members))
+        return shard
+
+    def _share_quota(self, members: int):
+        """Limit this worker to 1/members of the account's fetch and poll budgets"""
+        share = 1 / max(1, members)
+        self.weather_client.rate_limiter.set_rate(settings.OPENWEATHER_CALLS_PER_MINUTE * share)
+        if self.poll_planner is not None:
+            self.poll_planner.max_polls_per_hour = settings.ADAPTIVE_POLL_MAX_POLLS_PER_HOUR * share
+
     async def backfill_historical_data(self):
         """
-        Backfill historical weather data for the past 3 days
+        Backfill historical weather data for the past BACKFILL_DAYS days
 
         Note: OpenWeatherMap free tier does NOT provide historical weather data.
-        The backfill creates hourly snapshots going back BACKFILL_DAYS.
+        The backfill creates hourly snapshots going back BACKFILL_DAYS, aligned
+        to whole hours, and stops before the current hour, which the first
+        update run fills with a real observation. Progress is checkpointed per
+        city after every batch, and every stored real observation advances
+        the checkpoint as well, so a restart or a new leader only fills the
+        hours that have no stored row.
         """
         logger.info(f"Starting backfill for {settings.BACKFILL_DAYS} days of historical data")
 
         try:
-            # Calculate time range for backfill
-            end_time = datetime.now(timezone.utc)
+            # Calculate time range for backfill on whole-hour boundaries, up to the last full hour
+            end_time = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0) - timedelta(hours=1)
             start_time = end_time - timedelta(days=settings.BACKFILL_DAYS)
 
-            # Calculate number of hourly intervals
-            total_hours = int((end_time - start_time).total_seconds() / 3600)
-            logger.info(f"Backfilling {total_hours} hourly snapshots for {len(self.cities)} cities")
+            # A previous leader may have advanced it since this process started
+            self.checkpoint.reload()
 
-            # Collect current weather as baseline
-            current_weather = await self.weather_client.fetch_multiple_cities(self.cities)
+            # Group cities by the first hour they still need
+            resume_groups = {}
+            for city in await self.assigned_cities():
+                resume_at = self.checkpoint.resume_from(city, start_time)
+                if resume_at <= end_time:
+                    resume_groups.setdefault(resume_at, []).append(city)
 
-            if not current_weather:
-                logger.warning("Failed to fetch current weather for backfill")
+            if not resume_groups:
+                logger.info(f"Backfill already complete through {end_time.isoformat()}")
                 return
 
-            # Create a map of city -> current weather data
-            city_weather_map = {record.city: record for record in current_weather}
-
-            # Generate historical records with timestamps going back
-            all_historical_records = []
-            batch_size = 1000  # Insert in batches to avoid memory issues
+            pending_cities = [city for cities in resume_groups.values() for city in cities]
+            logger.info(f"Backfilling {len(pending_cities)} cities from {min(resume_groups).isoformat()} to {end_time.isoformat()}")
 
-            # Generate records for each hour in the backfill period
-            current_time = start_time
-            records_generated = 0
+            # Collect current weather as baseline, keyed by the configured city name
+            baseline_by_city = {
+                city: weather_data
+                async for city, weather_data in self.weather_client.iter_multiple_cities(pending_cities)
+                if weather_data is not None
+            }
 
-            while current_time <= end_time:
-                batch_records = []
-
-                for city, base_weather in city_weather_map.items():
-                    # Create a synthetic historical record
-                    # In production, this would be replaced with actual historical API data
-                    historical_record = WeatherData(
-                        city=city,
-                        timestamp=current_time,
-                        temperature=round(base_weather.temperature + ((hash(str(current_time)) % 10) - 5), 2),  # ±5°C variation, rounded to 2 decimals
-                        humidity=max(0, min(100, base_weather.humidity + ((hash(str(current_time)) % 20) - 10))),  # ±10% variation
-                        wind_speed=round(max(0, base_weather.wind_speed + ((hash(str(current_time)) % 6) - 3)), 2),  # ±3 m/s variation, rounded to 2 decimals
-                        condition=base_weather.condition
-                    )
-                    batch_records.append(historical_record)
+            if not baseline_by_city:
+                logger.warning("Failed to fetch current weather for backfill")
+                return
 
-                all_historical_records.extend(batch_records)
-                records_generated += len(batch_records)
+            records_generated = 0
 
-                # Insert in batches
-                if len(all_historical_records) >= batch_size:
-                    await self.repository.insert_weather_data(all_historical_records)
-                    logger.info(f"Backfill progress: {records_generated}/{total_hours * len(self.cities)} records inserted")
-                    all_historical_records = []
+            # Generate synthetic hourly snapshots as column batches and load
+            # each one before generating the next, so memory stays bounded.
+            # In production, this would be replaced with actual historical API data
+            for resume_at, cities in sorted(resume_groups.items()):
+                baselines = [baseline_by_city[city] for city in cities if city in baseline_by_city]
+                if not baselines:
+                    continue
 
-                # Move to next hour
-                current_time += timedelta(hours=1)
+                for batch in generate_backfill_batches(
+                    baselines,
+                    resume_at,
+                    end_time,
+                    settings.BACKFILL_BATCH_ROWS
+                ):
+                    await self.repository.insert_weather_batch(batch)
+                    # History responses for these cities changed; their latest observation didn't
+                    city_keys = np.unique(batch.city_key).tolist()
+                    self.latest_store.mark_written(city_keys)
+                    await self._publish_writes(city_keys)
+                    self.checkpoint.advance(
+                        [city for city in cities if city in baseline_by_city],
+                        batch.last_timestamp
+                    )
+                    records_generated += len(batch)
+                    logger.info(f"Backfill progress: {records_generated} records inserted")
 
-            # Insert remaining records
-            if all_historical_records:
-                await self.repository.insert_weather_data(all_historical_records)
+            logger.info(f"Backfill completed: {records_generated} historical records inserted across {len(baseline_by_city)} cities")
+            logger.info(f"Data range: {min(resume_groups).isoformat()} to {end_time.isoformat()}")
 
-            logger.info(f"Backfill completed: {records_generated} historical records inserted across {len(self.cities)} cities")
-            logger.info(f"Data range: {start_time.isoformat()} to {end_time.isoformat()}")
+            await self.refresh_rollups(min(resume_groups))
 
         except Exception as e:
             logger.error(f"Error during backfill: {str(e)}")
             raise
     
     async def fetch_and_store_current_weather(self):
-        """Fetch current weather for all cities and store in BigQuery"""
-        logger.info(f"Starting hourly weather update for {len(self.cities)} cities")
+        """
+        Fetch current weather for all cities and store it as results arrive
+
+        Records are written in batches while later cities are still being
+        fetched (see IngestPipeline), so the first cities are stored and
+        served without waiting for the slowest fetch. In adaptive mode this
+        runs every ADAPTIVE_POLL_TICK_SECONDS and fetches only the cities
+        whose next poll time has come.
+        """
+        cities = await self.assigned_cities()
+        if self.poll_planner is not None:
+            cities = self.poll_planner.due(cities)
+            if not cities:
+                return
+        logger.info(f"Starting weather update for {len(cities)} cities")
+        self.update_runs += 1
+        pipeline = IngestPipeline(
+            self._store_update_batch,
+            queue_records=settings.INGEST_PIPELINE_QUEUE_RECORDS,
+            flush_records=settings.INGEST_PIPELINE_FLUSH_RECORDS,
+            flush_seconds=settings.INGEST_PIPELINE_FLUSH_SECONDS
+        )
         
         try:
-            # Fetch weather data for all cities
-            weather_records = await self.weather_client.fetch_multiple_cities(self.cities)
-            
-            if weather_records:
-                # Store in BigQuery
-                inserted_count = await self.repository.insert_weather_data(weather_records)
-                logger.info(f"Hourly update completed: {inserted_count} records inserted/updated")
+            fetch_stats = FetchRunStats()
+            results = self.weather_client.iter_multiple_cities(cities, fetch_stats)
+            if self.poll_planner is not None:
+                results = self._record_poll_results(results)
+            stored_count = await pipeline.run(results)
+
+            if stored_count and self.spool is not None:
+                # One load job for the whole run rather than one per pipeline batch
+                if self.flusher is not None:
+                    self.flusher.wake()
+                logger.info(f"Weather update completed: {stored_count} records spooled for loading in {pipeline.batches} batches")
+            elif stored_count:
+                logger.info(f"Weather update completed: {stored_count} records inserted/updated in {pipeline.batches} batches")
+                await self.refresh_rollups(pipeline.earliest)
             else:
-                logger.warning("No weather records fetched during hourly update")
+                logger.warning("No weather records fetched during weather update")
+
+            self.last_update = {
+                "finished_at": datetime.now(timezone.utc).isoformat(),
+                "cities": len(cities),
+                **pipeline.report(),
+                "fetch": fetch_stats.as_dict()
+            }
                 
         except Exception as e:
-            logger.error(f"Error during hourly weather update: {str(e)}")
+            self.update_failures += 1
+            logger.error(f"Error during weather update: {str(e)}")
+            if self.spool is None and pipeline.earliest is not None:
+                # Batches written before the failure still need their rollups
+                await self.refresh_rollups(pipeline.earliest)
+            elif pipeline.written and self.flusher is not None:
+                self.flusher.wake()
+
+    async def _record_poll_results(self, results):
+        """Pass fetch results through, scheduling each city's next poll"""
+        async for city, weather_data in results:
+            self.poll_planner.record(city, weather_data)
+            yield city, weather_data
+
+    async def _store_update_batch(self, weather_records: List[WeatherData]) -> int:
+        """Write one pipeline batch and publish it to the latest-observation store once stored"""
+        if self.spool is not None:
+            # Durable locally first; the flusher loads it into BigQuery and
+            # publishes it (see _after_spool_flush), so ETags never run ahead of storage
+            return await self.spool.append(weather_records)
+        count = await self.repository.insert_weather_data(weather_records)
+        self.latest_store.update(weather_records)
+        self.checkpoint.record_observations(weather_records)
+        await self._publish_writes({normalize_city(record.city) for record in weather_records})
+        return count
     
+    async def refresh_rollups(self, since: datetime):
+        """Bring the hourly/daily rollup tables up to date with rows written since `since`"""
+        try:
+            await self.repository.refresh_rollups(since)
+        except Exception as e:
+            # Raw data is already stored; the next run's refresh will catch up
+            logger.error(f"Error refreshing rollups: {str(e)}")
+        # Also on failure, as CachedRepository does: part of the refresh may have landed
+        await self._publish_writes([ROLLUPS_SCOPE])
+
+    async def _publish_writes(self, scopes):
+        """Tell other processes which cities (or the rollups) this process just wrote"""
+        if self.write_generations is None:
+            return
+        try:
+            await asyncio.to_thread(self.write_generations.publish, scopes)
+        except Exception as e:
+            # Their cached copies still expire on their own max age
+            logger.error(f"Failed to publish write generations: {str(e)}")
+
+    async def _after_spool_flush(self, weather_records: List[WeatherData]):
+        self.latest_store.update(weather_records)
+        self.checkpoint.record_observations(weather_records)
+        await self._publish_writes({normalize_city(record.city) for record in weather_records})
+        await self.refresh_rollups(min(record.timestamp for record in weather_records))
+
+    async def _departed_spool_directories(self) -> List[Path]:
+        """
+        Spool directories of workers no longer in the ingest ring
+
+        Member IDs include the process ID by default, so every restart
+        leaves a directory behind; live members drain them, with segment
+        claims keeping two flushers (or a late writer) from colliding.
+        Directories are left in place since a restarted worker with an
+        explicit INGEST_MEMBER_ID writes to its old one again.
+        """
+        members = set(await asyncio.to_thread(self.membership.live_members))
+        root = self.spool.directory.parent
+        return [
+            path for path in sorted(root.iterdir())
+            if path.is_dir() and path.name not in members and path != self.spool.directory
+        ]
+
+    async def initialize_schema(self):
+        """
+        Create missing storage objects, migrating outdated ones in one process only
+
+        Every process (each uvicorn worker, each sharded worker) runs this
+        at start-up, so table migrations such as the BIGQUERY_AUTO_MIGRATE
+        rebuild only run in the process holding the `schema_migration`
+        lease; the others just create what is missing and carry on.
+        """
+        lease = SQLiteLease(
+            settings.SCHEDULER_LEASE_PATH,
+            name="schema_migration",
+            holder_id=default_holder_id(),
+            ttl_seconds=SCHEMA_MIGRATION_LEASE_TTL_SECONDS
+        )
+        if not await asyncio.to_thread(lease.try_acquire):
+            logger.info(f"Schema migration held by {await asyncio.to_thread(lease.current_holder)}; not migrating")
+            await self.repository.initialize_schema(migrate=False)
+            return
+        try:
+            await self.repository.initialize_schema(migrate=True)
+        finally:
+            await asyncio.to_thread(lease.release)
+
     async def start(self):
-        """Start the scheduler with all jobs"""
+        """Start the scheduler with all jobs, or campaign for leadership first"""
         logger.info("Initializing weather scheduler")
         
-        # Initialize BigQuery schema
-        await self.repository.initialize_schema()
+        # Initialize storage schema
+        await self.initialize_schema()
+
+        if self.membership is not None:
+            # Join the ring before the first run computes its shard
+            await self.membership.start()
+        elif self.elector is not None:
+            # Jobs start in _start_jobs once this process holds the lease
+            self.elector.start()
+            logger.info("Weather scheduler waiting for leadership")
+            return
+
+        await self._start_jobs()
+
+    async def _start_jobs(self):
+        """Start the flusher and schedule the backfill and hourly update"""
+        # Drain anything spooled before the last shutdown, then keep draining
+        if self.spool is not None and self.flusher is None:
+            self.flusher = SpoolFlusher(
+                self.spool,
+                self.repository,
+                batch_records=settings.SPOOL_FLUSH_BATCH_RECORDS,
+                interval_seconds=settings.SPOOL_FLUSH_INTERVAL_SECONDS,
+                backoff_base_seconds=settings.SPOOL_BACKOFF_BASE_SECONDS,
+                backoff_max_seconds=settings.SPOOL_BACKOFF_MAX_SECONDS,
+                on_flushed=self._after_spool_flush,
+                orphan_directories=self._departed_spool_directories if self.membership is not None else None
+            )
+            self.flusher.start()
+            self.flusher.wake()
         
         # Schedule backfill job to run once at startup 
         self.scheduler.add_job(
@@ -133,26 +397,71 @@ class WeatherScheduler:
         logger.info("Scheduled backfill job (runs once at startup)")
         
         # Schedule hourly update job
-        self.scheduler.add_job(
-            self.fetch_and_store_current_weather,
-            trigger=IntervalTrigger(hours=settings.UPDATE_INTERVAL_HOURS),
-            id="hourly_update_job",
-            name="Hourly Weather Update",
-            replace_existing=True,
-            next_run_time=datetime.now() + timedelta(seconds=30)  # First run after 30 seconds
-        )
-        logger.info(f"Scheduled hourly update job (runs every {settings.UPDATE_INTERVAL_HOURS} hour(s))")
+        if self.poll_planner is not None:
+            # Each tick fetches only the cities that are due
+            self.scheduler.add_job(
+                self.fetch_and_store_current_weather,
+                trigger=IntervalTrigger(seconds=settings.ADAPTIVE_POLL_TICK_SECONDS),
+                id="adaptive_update_job",
+                name="Adaptive Weather Update",
+                replace_existing=True,
+                coalesce=True,
+                next_run_time=datetime.now() + timedelta(seconds=30)  # First run after 30 seconds
+            )
+            logger.info(f"Scheduled adaptive update job (checks due cities every {settings.ADAPTIVE_POLL_TICK_SECONDS}s)")
+        else:
+            self.scheduler.add_job(
+                self.fetch_and_store_current_weather,
+                trigger=IntervalTrigger(hours=settings.UPDATE_INTERVAL_HOURS),
+                id="hourly_update_job",
+                name="Hourly Weather Update",
+                replace_existing=True,
+                next_run_time=datetime.now() + timedelta(seconds=30)  # First run after 30 seconds
+            )
+            logger.info(f"Scheduled hourly update job (runs every {settings.UPDATE_INTERVAL_HOURS} hour(s))")
         
         # Start the scheduler
-        self.scheduler.start()
+        if not self.scheduler.running:
+            self.scheduler.start()
         logger.info("Weather scheduler started successfully")
+
+    async def _stop_jobs(self):
+        """Unschedule jobs and stop the flusher after losing leadership"""
+        # A job already running finishes; its writes are idempotent
+        self.scheduler.remove_all_jobs()
+        await self._stop_flusher()
+        logger.info("Weather scheduler jobs stopped")
     
     async def shutdown(self):
         """Shutdown the scheduler gracefully"""
         logger.info("Shutting down weather scheduler")
-        self.scheduler.shutdown(wait=True)
+        if self.elector is not None:
+            # Releases the lease so another process takes over right away
+            await self.elector.stop()
+        if self.membership is not None:
+            await self.membership.stop()
+        if self.scheduler.running:
+            self.scheduler.shutdown(wait=True)
+        await self._stop_flusher()
+        if self.spool is not None:
+            # Writes from a job that outlived leadership; the next flusher claims them
+            await self.spool.close()
         logger.info("Weather scheduler shutdown complete")
 
+    async def _stop_flusher(self):
+        """Stop and drop the flusher, if this process is running one"""
+        if self.flusher is not None:
+            flusher, self.flusher = self.flusher, None
+            await flusher.stop()
 
-# Global scheduler instance
-weather_scheduler = WeatherScheduler()
\ No newline at end of file
+    def stats(self) -> dict:
+        """Leadership and job state for monitoring"""
+        return {
+            "leader_election": self.elector.stats() if self.elector is not None else None,
+            "sharding": self.membership.stats() if self.membership is not None else None,
+            "jobs": [job.id for job in self.scheduler.get_jobs()] if self.scheduler.running else [],
+            "update_runs": self.update_runs,
+            "update_failures": self.update_failures,
+            "last_update": self.last_update,
+            "adaptive_polling": self.poll_planner.stats() if self.poll_planner is not None else None
+        }
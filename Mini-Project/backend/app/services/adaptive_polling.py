@@ -0,0 +1,179 @@
+"""Per-city poll intervals adapted to how fast each city's weather changes"""
+import logging
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+from app.models import WeatherData
+
+logger = logging.getLogger(__name__)
+
+# Change between two observations that counts as one unit, per variable
+TEMPERATURE_UNIT = 1.0  # Celsius
+HUMIDITY_UNIT = 5.0  # Percentage points
+WIND_SPEED_UNIT = 1.0  # m/s
+CONDITION_UNIT = 1.0  # Any change of description
+
+
+def change_score(previous: WeatherData, current: WeatherData) -> float:
+    """How much the weather changed between two observations, in change units"""
+    return (
+        abs(current.temperature - previous.temperature) / TEMPERATURE_UNIT
+        + abs(current.humidity - previous.humidity) / HUMIDITY_UNIT
+        + abs(current.wind_speed - previous.wind_speed) / WIND_SPEED_UNIT
+        + (CONDITION_UNIT if current.condition.lower() != previous.condition.lower() else 0.0)
+    )
+
+
+@dataclass
+class CityPollState:
+    """Polling history of one city"""
+    next_poll_at: float
+    interval_seconds: float
+    last_observation: Optional[WeatherData] = None
+    change_rate: Optional[float] = None  # Smoothed change units per hour
+    polls: int = 0
+    unchanged_polls: int = 0  # Upstream had no newer observation yet
+    failures: int = 0
+
+
+class AdaptivePollPlanner:
+    """
+    Decides when each city is polled next from how fast its weather changes
+
+    Each new observation is scored against the previous one (see
+    change_score) and divided by the hours between them. That rate is
+    smoothed per city, and a city's interval is set so about
+    `change_per_poll` units of change happen between polls, clamped to
+    [min, max]. If the planned polls for all cities would exceed
+    `max_polls_per_hour`, every interval is stretched by one common
+    factor until they fit, so volatile cities keep their relative
+    priority. Cities without a rate yet use `default_interval_seconds`;
+    failed polls are retried after the minimum interval.
+
+    Times are monotonic seconds; `now` arguments exist for simulations.
+    """
+
+    def __init__(
+        self,
+        min_interval_seconds: float,
+        max_interval_seconds: float,
+        default_interval_seconds: float,
+        change_per_poll: float,
+        max_polls_per_hour: float,
+        smoothing: float = 0.5
+    ):
+        self.min_interval_seconds = min_interval_seconds
+        self.max_interval_seconds = max(min_interval_seconds, max_interval_seconds)
+        self.default_interval_seconds = default_interval_seconds
+        self.change_per_poll = change_per_poll
+        self.max_polls_per_hour = max_polls_per_hour
+        self.smoothing = smoothing
+        self.budget_scale = 1.0
+        self._states: Dict[str, CityPollState] = {}
+
+    def _clamp(self, seconds: float) -> float:
+        return min(self.max_interval_seconds, max(self.min_interval_seconds, seconds))
+
+    def _desired_interval(self, state: CityPollState) -> float:
+        if state.change_rate is None:
+            return self.default_interval_seconds
+        if state.change_rate <= 0:
+            return self.max_interval_seconds
+        return self.change_per_poll / state.change_rate * 3600
+
+    def _planned_polls_per_hour(self, scale: float) -> float:
+        return sum(
+            3600 / self._clamp(self._desired_interval(state) * scale)
+            for state in self._states.values()
+        )
+
+    def _fit_budget(self):
+        """Smallest common stretch factor (>= 1) that keeps planned polls within the budget"""
+        if self.max_polls_per_hour <= 0 or self._planned_polls_per_hour(1.0) <= self.max_polls_per_hour:
+            self.budget_scale = 1.0
+            return
+        if len(self._states) * 3600 / self.max_interval_seconds > self.max_polls_per_hour:
+            # Even max_interval everywhere exceeds it; poll at max and let the fetch rate limiter cap calls
+            shortest = min(self._desired_interval(state) for state in self._states.values())
+            self.budget_scale = self.max_interval_seconds / max(shortest, 1e-9)
+            return
+        low, high = 1.0, 2.0
+        while self._planned_polls_per_hour(high) > self.max_polls_per_hour:
+            low, high = high, high * 2
+        for _ in range(30):
+            middle = (low + high) / 2
+            if self._planned_polls_per_hour(middle) > self.max_polls_per_hour:
+                low = middle
+            else:
+                high = middle
+        self.budget_scale = high
+
+    def due(self, cities: Iterable[str], now: Optional[float] = None) -> List[str]:
+        """
+        Cities to poll now
+
+        Starts tracking new cities (due immediately) and forgets cities no
+        longer in `cities`, e.g. after a shard rebalance.
+        """
+        now = time.monotonic() if now is None else now
+        cities = list(cities)
+        tracked = set(cities)
+        for city in [city for city in self._states if city not in tracked]:
+            del self._states[city]
+        for city in cities:
+            if city not in self._states:
+                self._states[city] = CityPollState(next_poll_at=now, interval_seconds=self.default_interval_seconds)
+        self._fit_budget()
+        return [city for city in cities if self._states[city].next_poll_at <= now]
+
+    def record(self, city: str, weather_data: Optional[WeatherData], now: Optional[float] = None):
+        """Update a city's change rate from a poll result and schedule its next poll"""
+        now = time.monotonic() if now is None else now
+        state = self._states.get(city)
+        if state is None:
+            return
+        if weather_data is None:
+            state.failures += 1
+            state.next_poll_at = now + self.min_interval_seconds
+            return
+
+        state.polls += 1
+        previous = state.last_observation
+        if previous is not None and weather_data.timestamp > previous.timestamp:
+            hours = (weather_data.timestamp - previous.timestamp).total_seconds() / 3600
+            rate = change_score(previous, weather_data) / hours
+            if state.change_rate is None:
+                state.change_rate = rate
+            else:
+                state.change_rate = self.smoothing * rate + (1 - self.smoothing) * state.change_rate
+        elif previous is not None:
+            state.unchanged_polls += 1
+        if previous is None or weather_data.timestamp >= previous.timestamp:
+            state.last_observation = weather_data
+
+        state.interval_seconds = self._clamp(self._desired_interval(state) * self.budget_scale)
+        state.next_poll_at = now + state.interval_seconds
+
+    def stats(self, now: Optional[float] = None) -> dict:
+        """Budget use and per-city intervals for monitoring"""
+        now = time.monotonic() if now is None else now
+        intervals = [state.interval_seconds for state in self._states.values()]
+        return {
+            "cities_tracked": len(self._states),
+            "planned_polls_per_hour": round(sum(3600 / interval for interval in intervals), 1),
+            "max_polls_per_hour": self.max_polls_per_hour,
+            "budget_scale": round(self.budget_scale, 3),
+            "min_interval_minutes": round(min(intervals) / 60, 1) if intervals else None,
+            "max_interval_minutes": round(max(intervals) / 60, 1) if intervals else None,
+            "cities": {
+                city: {
+                    "interval_minutes": round(state.interval_seconds / 60, 1),
+                    "next_poll_in_seconds": round(max(0.0, state.next_poll_at - now)),
+                    "change_rate_per_hour": round(state.change_rate, 3) if state.change_rate is not None else None,
+                    "polls": state.polls,
+                    "unchanged_polls": state.unchanged_polls,
+                    "failures": state.failures
+                }
+                for city, state in self._states.items()
+            }
+        }
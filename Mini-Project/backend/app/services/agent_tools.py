@@ -2,8 +2,9 @@
 import logging
 from datetime import datetime, timedelta
 from typing import Optional, Dict, Any, List
-from app.repositories.bigquery_repo import BigQueryRepository
+from app.repositories.base import WeatherRepository
 from app.services.weather_api import WeatherAPIClient
+from app.services.latest_store import LatestObservationStore
 
 logger = logging.getLogger(__name__)
 
@@ -11,9 +12,15 @@ logger = logging.getLogger(__name__)
 class WeatherAgentTools:
     """Collection of tools for the weather agent"""
 
-    def __init__(self):
-        self.bigquery_repo = BigQueryRepository()
-        self.weather_api = WeatherAPIClient()
+    def __init__(
+        self,
+        repository: WeatherRepository,
+        weather_client: WeatherAPIClient,
+        latest_store: LatestObservationStore
+    ):
+        self.bigquery_repo = repository
+        self.weather_api = weather_client
+        self.latest_store = latest_store
 
     async def get_current_weather_from_storage(self, city: str) -> Dict[str, Any]:
         """
@@ -27,7 +34,7 @@ class WeatherAgentTools:
         """
         try:
             logger.info(f"Fetching current weather for {city} from storage")
-            weather_data = await self.bigquery_repo.get_latest_weather(city)
+            weather_data = await self.latest_store.get_or_load(city, self.bigquery_repo)
 
             if weather_data:
                 return {
@@ -75,28 +82,20 @@ class WeatherAgentTools:
         """
         try:
             logger.info(f"Fetching {days} days of weather history for {city} from storage")
-            weather_records = await self.bigquery_repo.get_weather_history(city, days)
-
-            if weather_records:
-                # Calculate statistics
-                temperatures = [w.temperature for w in weather_records]
-                humidities = [w.humidity for w in weather_records]
-
-                avg_temp = sum(temperatures) / len(temperatures)
-                min_temp = min(temperatures)
-                max_temp = max(temperatures)
-                avg_humidity = sum(humidities) / len(humidities)
+            # Statistics and the 10 most recent records are computed in storage
+            stats = await self.bigquery_repo.get_weather_statistics(city, days, sample_size=10)
 
+            if stats:
                 return {
                     "success": True,
                     "city": city,
                     "period_days": days,
-                    "record_count": len(weather_records),
+                    "record_count": stats.record_count,
                     "statistics": {
-                        "average_temperature": round(avg_temp, 2),
-                        "min_temperature": round(min_temp, 2),
-                        "max_temperature": round(max_temp, 2),
-                        "average_humidity": round(avg_humidity, 2),
+                        "average_temperature": round(stats.average_temperature, 2),
+                        "min_temperature": round(stats.min_temperature, 2),
+                        "max_temperature": round(stats.max_temperature, 2),
+                        "average_humidity": round(stats.average_humidity, 2),
                         "temperature_unit": "Celsius",
                         "humidity_unit": "percentage"
                     },
@@ -108,7 +107,7 @@ class WeatherAgentTools:
                             "wind_speed": w.wind_speed,
                             "condition": w.condition
                         }
-                        for w in weather_records[:10]  # Return max 10 detailed records
+                        for w in stats.recent_records
                     ],
                     "source": "storage"
                 }
@@ -0,0 +1,206 @@
+"""Column-oriented generator for synthetic historical weather"""
+import fcntl
+import json
+import logging
+import os
+import tempfile
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List
+import numpy as np
+from app.models import WeatherBatch, WeatherData, normalize_city
+
+logger = logging.getLogger(__name__)
+
+_HOUR_US = 3_600_000_000
+
+
+def _mix(values: np.ndarray) -> np.ndarray:
+    """splitmix64 finalizer: a fast, stable integer hash over uint64 arrays"""
+    values = values.astype(np.uint64, copy=True)
+    with np.errstate(over="ignore"):
+        values ^= values >> np.uint64(30)
+        values *= np.uint64(0xBF58476D1CE4E5B9)
+        values ^= values >> np.uint64(27)
+        values *= np.uint64(0x94D049BB133111EB)
+        values ^= values >> np.uint64(31)
+    return values
+
+
+def generate_backfill_batches(
+    baselines: List[WeatherData],
+    start_time: datetime,
+    end_time: datetime,
+    batch_rows: int
+) -> Iterator[WeatherBatch]:
+    """
+    Yield synthetic hourly snapshots for every city as fixed-size batches
+
+    Each city gets one row per hour from `start_time` up to and including
+    `end_time`, varied around its current observation (±5°C, ±10%
+    humidity, ±3 m/s wind). Variation is derived from a stable hash of
+    (city, timestamp), so re-running a window reproduces the same values.
+    Only one batch of columns exists at a time, so memory stays flat no
+    matter how long the backfill period is.
+
+    Args:
+        baselines: Current observation per city to vary around
+        start_time: First snapshot time (timezone-aware)
+        end_time: Last possible snapshot time (timezone-aware)
+        batch_rows: Approximate number of rows per batch (rounded to whole hours)
+
+    Returns:
+        Iterator of WeatherBatch objects
+    """
+    baseline_by_city = {record.city: record for record in baselines}
+    if not baseline_by_city or end_time < start_time:
+        return
+
+    records = list(baseline_by_city.values())
+    city = np.array([record.city for record in records], dtype=object)
+    city_key = np.array([normalize_city(record.city) for record in records], dtype=object)
+    condition = np.array([record.condition for record in records], dtype=object)
+    base_temperature = np.array([record.temperature for record in records], dtype=np.float64)
+    base_humidity = np.array([record.humidity for record in records], dtype=np.int64)
+    base_wind_speed = np.array([record.wind_speed for record in records], dtype=np.float64)
+    city_seed = np.array(
+        [zlib.crc32(key.encode()) for key in city_key], dtype=np.uint64
+    ) << np.uint64(32)
+
+    city_count = len(records)
+    total_hours = int((end_time - start_time) // timedelta(hours=1)) + 1
+    hours_per_batch = max(1, batch_rows // city_count)
+    start_us = int(start_time.timestamp() * 1_000_000)
+
+    for first_hour in range(0, total_hours, hours_per_batch):
+        hours = np.arange(first_hour, min(first_hour + hours_per_batch, total_hours), dtype=np.int64)
+        timestamp_us = start_us + hours * _HOUR_US
+
+        # (hours, cities) grid flattened row-major: time-major, city-minor
+        noise = _mix((timestamp_us // _HOUR_US).astype(np.uint64)[:, None] ^ city_seed[None, :])
+
+        temperature = base_temperature + (noise % np.uint64(10)).astype(np.int64) - 5
+        humidity = base_humidity + ((noise >> np.uint64(8)) % np.uint64(20)).astype(np.int64) - 10
+        wind_speed = base_wind_speed + ((noise >> np.uint64(16)) % np.uint64(6)).astype(np.int64) - 3
+
+        yield WeatherBatch(
+            city=np.tile(city, len(hours)),
+            city_key=np.tile(city_key, len(hours)),
+            timestamp=np.repeat(timestamp_us, city_count).astype("datetime64[us]"),
+            temperature=np.round(temperature, 2).ravel(),
+            humidity=np.clip(humidity, 0, 100).ravel(),
+            wind_speed=np.round(np.maximum(wind_speed, 0), 2).ravel(),
+            condition=np.tile(condition, len(hours))
+        )
+
+
+class BackfillCheckpoint:
+    """
+    Persisted record of how far the backfill has got for each city
+
+    Maps normalized city name to the last hour known to have a stored
+    row. Hours are filled oldest-first and the checkpoint only moves
+    forward after a batch load succeeds, so everything up to the stored
+    hour is known to be written and a restart resumes from the next hour.
+    Real observations stored by the hourly update move it forward too
+    (see `record_observations`), so a restart or a new leader never
+    synthesizes hours that already hold a real observation.
+
+    Sharded workers share the file, so reads and read-merge-writes hold an
+    exclusive flock on a `<name>.lock` file next to it, and each write goes
+    through its own temporary file before the atomic replace.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + ".lock")
+        self.completed: Dict[str, datetime] = {}
+        self.reload()
+
+    @contextmanager
+    def _locked(self):
+        """Hold the cross-process checkpoint lock; proceeds unlocked if the lock file can't be opened"""
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            lock_fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        except OSError as e:
+            logger.warning(f"Backfill checkpoint lock unavailable: {str(e)}")
+            yield
+            return
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(lock_fd)  # Releases the flock
+
+    def _load(self) -> Dict[str, datetime]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return {
+                    city_key: datetime.fromisoformat(completed_at)
+                    for city_key, completed_at in json.load(f).items()
+                }
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError, AttributeError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable backfill checkpoint {self.path}: {str(e)}")
+            return {}
+
+    def reload(self):
+        """Re-read the file, picking up progress made by another process"""
+        with self._locked():
+            self.completed = self._load()
+
+    def resume_from(self, city: str, start_time: datetime) -> datetime:
+        """First hour still to fill for a city in a window starting at `start_time`"""
+        completed_at = self.completed.get(normalize_city(city))
+        if completed_at is None or completed_at < start_time:
+            return start_time
+        return completed_at + timedelta(hours=1)
+
+    def advance(self, cities: List[str], completed_at: datetime):
+        """Mark every hour up to `completed_at` as written for `cities` and persist (atomic replace)"""
+        self._merge({normalize_city(city): completed_at for city in cities})
+
+    def record_observations(self, weather_records: Iterable[WeatherData]):
+        """Mark the hour of each stored real observation (and every hour before it) as filled"""
+        hours: Dict[str, datetime] = {}
+        for record in weather_records:
+            timestamp = record.timestamp
+            if timestamp.tzinfo is None:
+                timestamp = timestamp.replace(tzinfo=timezone.utc)
+            hour = timestamp.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+            key = normalize_city(record.city)
+            if key not in hours or hour > hours[key]:
+                hours[key] = hour
+        if hours:
+            self._merge(hours)
+
+    def _merge(self, updates: Dict[str, datetime]):
+        with self._locked():
+            # Merge with the file first: sharded workers advance it concurrently
+            for key, value in self._load().items():
+                if key not in self.completed or value > self.completed[key]:
+                    self.completed[key] = value
+            for key, completed_at in updates.items():
+                current = self.completed.get(key)
+                if current is None or completed_at > current:
+                    self.completed[key] = completed_at
+            self._write()
+
+    def _write(self):
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=self.path.name + ".", suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(
+                    {key: value.isoformat() for key, value in self.completed.items()},
+                    f, ensure_ascii=False, indent=2, sort_keys=True
+                )
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            logger.warning(f"Failed to save backfill checkpoint: {str(e)}")
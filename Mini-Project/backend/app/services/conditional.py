@@ -0,0 +1,87 @@
+"""HTTP validators for weather responses derived from the latest observations"""
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable, Mapping, Optional, Tuple
+from app.models import WeatherData, normalize_city
+
+
+def observation_validators(
+    records: Iterable[WeatherData],
+    variant: str,
+    sliding_window: bool = False,
+    now: Optional[datetime] = None,
+    generation: int = 0
+) -> Tuple[str, datetime]:
+    """
+    Build an ETag and Last-Modified time for a response
+
+    A weather response only changes when a newer observation is ingested
+    for one of its cities, so the validators are derived from those
+    observations rather than from the serialized body. Responses over a
+    sliding `days` window also change as old rows age out; for those the
+    current hour is folded in, so validators roll over at most hourly.
+    Rows written behind the latest observation (backfill) change a
+    history response without changing its records, so a write
+    generation can be folded in as well.
+
+    Args:
+        records: Latest observation for every city in the response
+        variant: Distinguishes responses over the same cities (path and query)
+        sliding_window: Whether the response covers a window ending now
+        now: Current time, for tests and benchmarks
+        generation: Write generation of the cities (LatestObservationStore.generation)
+
+    Returns:
+        (weak ETag, Last-Modified datetime in UTC)
+    """
+    digest = hashlib.sha1(variant.encode("utf-8"))
+    last_modified = datetime.fromtimestamp(0, timezone.utc)
+    for record in sorted(records, key=lambda record: normalize_city(record.city)):
+        digest.update(b"|" + record.id.encode("ascii"))
+        last_modified = max(last_modified, record.timestamp)
+
+    if generation:
+        digest.update(b"#" + str(generation).encode("ascii"))
+
+    if sliding_window:
+        hour = (now or datetime.now(timezone.utc)).replace(minute=0, second=0, microsecond=0)
+        digest.update(b"@" + hour.isoformat().encode("ascii"))
+        last_modified = max(last_modified, hour)
+
+    return f'W/"{digest.hexdigest()[:24]}"', last_modified.replace(microsecond=0)
+
+
+def validator_headers(etag: str, last_modified: datetime) -> dict:
+    """Response headers carrying the validators; clients must revalidate before reuse"""
+    return {
+        "ETag": etag,
+        "Last-Modified": format_datetime(last_modified, usegmt=True),
+        "Cache-Control": "no-cache"
+    }
+
+
+def is_not_modified(request_headers: Mapping[str, str], etag: str, last_modified: datetime) -> bool:
+    """
+    Evaluate If-None-Match, or If-Modified-Since when no ETag was sent
+
+    ETags are compared weakly (RFC 9110 section 13.1.2), since the body of a
+    matching response may differ in encoding.
+    """
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+        return "*" in candidates or any(
+            candidate.removeprefix("W/") == etag.removeprefix("W/") for candidate in candidates
+        )
+
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified <= since
@@ -0,0 +1,151 @@
+"""Streaming fetch-to-store pipeline for scheduled weather updates"""
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable, List, Optional, Tuple
+from app.models import WeatherData
+
+logger = logging.getLogger(__name__)
+
+_END = object()
+
+
+class IngestPipeline:
+    """
+    Streams fetched records through a bounded queue into batched writes
+
+    A producer drains the fetch results as they complete while a writer
+    stores them in batches, flushing once `flush_records` records are
+    buffered or `flush_seconds` after the oldest one arrived. A flush also
+    takes everything queued behind it, so when writes have a high fixed
+    cost (a BigQuery load job) batches grow instead of backing up. Writes
+    overlap the remaining fetches, so early cities are stored without
+    waiting for the slowest one and a run takes about max(fetch, write)
+    instead of their sum. When the writer falls behind, the full queue
+    stops the producer from taking more results. One pipeline object
+    serves a single run.
+    """
+
+    def __init__(
+        self,
+        write: Callable[[List[WeatherData]], Awaitable[int]],
+        queue_records: int,
+        flush_records: int,
+        flush_seconds: float
+    ):
+        self.write = write
+        self.queue_records = max(1, queue_records)
+        self.flush_records = max(1, flush_records)
+        self.flush_seconds = flush_seconds
+        self.fetched = 0
+        self.failed = 0
+        self.written = 0
+        self.batches = 0
+        self.earliest: Optional[datetime] = None
+        self.fetch_seconds = 0.0
+        self.write_seconds = 0.0
+        self.first_write_seconds: Optional[float] = None
+        self.seconds = 0.0
+        self._started = 0.0
+
+    async def run(self, results: AsyncIterator[Tuple[str, Optional[WeatherData]]]) -> int:
+        """
+        Consume (city, WeatherData or None) results until exhausted
+
+        If a write fails, the remaining fetches are cancelled and the
+        error is raised; batches already written stay written.
+
+        Returns:
+            Number of records written
+        """
+        self._started = time.monotonic()
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_records)
+        producer = asyncio.create_task(self._produce(results, queue))
+        writer = asyncio.create_task(self._write_batches(queue))
+        try:
+            done, _ = await asyncio.wait({producer, writer}, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                # Raises the first failure; the finally cancels the other side
+                task.result()
+            await writer
+        finally:
+            for task in (producer, writer):
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(producer, writer, return_exceptions=True)
+            self.seconds = time.monotonic() - self._started
+        return self.written
+
+    async def _produce(self, results: AsyncIterator[Tuple[str, Optional[WeatherData]]], queue: asyncio.Queue):
+        try:
+            async for city, weather_data in results:
+                if weather_data is None:
+                    self.failed += 1
+                    logger.warning(f"Failed to fetch weather for {city}")
+                    continue
+                self.fetched += 1
+                await queue.put(weather_data)
+        finally:
+            # Cancelled while blocked on the queue: close the generator so it cancels its fetches
+            aclose = getattr(results, "aclose", None)
+            if aclose is not None:
+                await aclose()
+        self.fetch_seconds = time.monotonic() - self._started
+        await queue.put(_END)
+
+    async def _write_batches(self, queue: asyncio.Queue):
+        batch: List[WeatherData] = []
+        deadline = None
+        finished = False
+        while not finished:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                item = None
+
+            if item is _END:
+                finished = True
+            elif item is not None:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_seconds
+
+            if finished or len(batch) >= self.flush_records or (deadline is not None and time.monotonic() >= deadline):
+                # Group commit: take everything that queued up during the previous write,
+                # so a slow store gets fewer, larger batches instead of falling behind
+                while not finished and not queue.empty():
+                    item = queue.get_nowait()
+                    if item is _END:
+                        finished = True
+                    else:
+                        batch.append(item)
+                await self._flush(batch)
+                batch = []
+                deadline = None
+
+    async def _flush(self, batch: List[WeatherData]):
+        if not batch:
+            return
+        started = time.monotonic()
+        self.written += await self.write(batch)
+        finished = time.monotonic()
+        self.write_seconds += finished - started
+        self.batches += 1
+        if self.first_write_seconds is None:
+            self.first_write_seconds = finished - self._started
+        earliest = min(record.timestamp for record in batch)
+        self.earliest = earliest if self.earliest is None else min(self.earliest, earliest)
+
+    def report(self) -> dict:
+        """Timing and counts of the run"""
+        return {
+            "records": self.written,
+            "failed_cities": self.failed,
+            "batches": self.batches,
+            "seconds": round(self.seconds, 2),
+            "fetch_seconds": round(self.fetch_seconds, 2),
+            "write_seconds": round(self.write_seconds, 2),
+            "first_write_seconds": round(self.first_write_seconds, 2) if self.first_write_seconds is not None else None
+        }
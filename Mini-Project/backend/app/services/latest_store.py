@@ -0,0 +1,203 @@
+"""Process-local store of the latest weather observation per city"""
+import logging
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.models import WeatherData, normalize_city
+from app.repositories.base import WeatherRepository
+
+logger = logging.getLogger(__name__)
+
+
+class LatestObservationStore:
+    """
+    Hot in-memory copy of the newest WeatherData for each city
+
+    The scheduler feeds it once records are stored (after the spool
+    flush, when spooling) and it is warmed from one bulk query at
+    startup, so latest-weather reads normally never reach BigQuery. An
+    entry not refreshed within `max_age_seconds` is treated as stale and
+    re-read from the repository. A process that does not run the
+    scheduler learns of other processes' writes through
+    SharedWriteGenerations, which calls `invalidate`; the age bound is
+    the fallback if that is disabled or failing.
+
+    Each city also has a write generation, bumped whenever its entry
+    changes or `mark_written` reports rows that don't touch the latest
+    observation (backfilled history), so validators over a city's
+    history change with every write.
+    """
+
+    def __init__(self, max_age_seconds: float):
+        self.max_age_seconds = max_age_seconds
+        self._entries: Dict[str, Tuple[WeatherData, float]] = {}
+        self._generations: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+        self.stale_reads = 0
+        self.warmed = False
+
+    def update(self, records: Iterable[WeatherData]) -> int:
+        """
+        Record observations, keeping only the newest one per city
+
+        Returns:
+            Number of cities whose entry was written
+        """
+        now = time.monotonic()
+        updated = 0
+        for record in records:
+            key = normalize_city(record.city)
+            current = self._entries.get(key)
+            if current is None or record.timestamp >= current[0].timestamp:
+                self._entries[key] = (record, now)
+                updated += 1
+                if current is None or record.id != current[0].id:
+                    self._generations[key] = self._generations.get(key, 0) + 1
+            else:
+                # Older than what we hold, but confirms the entry is current
+                self._entries[key] = (current[0], now)
+        return updated
+
+    def mark_written(self, city_keys: Iterable[str]):
+        """Record that rows other than the latest observation were stored for these cities"""
+        for key in city_keys:
+            self._generations[key] = self._generations.get(key, 0) + 1
+
+    def invalidate(self, city_keys: Iterable[str]):
+        """Treat these cities' entries as stale, e.g. after another process wrote them"""
+        for key in city_keys:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries[key] = (entry[0], float("-inf"))
+            self._generations[key] = self._generations.get(key, 0) + 1
+
+    def generation(self, cities: Iterable[str]) -> int:
+        """Combined write generation of `cities`; changes whenever one of them is written"""
+        return sum(self._generations.get(normalize_city(city), 0) for city in cities)
+
+    def get(self, city: str) -> Optional[WeatherData]:
+        """Return the stored observation if present and within the staleness bound"""
+        entry = self._entries.get(normalize_city(city))
+        if entry is None:
+            return None
+        record, refreshed_at = entry
+        if time.monotonic() - refreshed_at > self.max_age_seconds:
+            return None
+        return record
+
+    def get_all_fresh(self, cities: Optional[List[str]] = None) -> Optional[List[WeatherData]]:
+        """
+        Return stored observations only if every requested city is fresh
+
+        Does not touch the hit/miss counters or the repository.
+
+        Args:
+            cities: City names, or None for every city once the store is warmed
+
+        Returns:
+            One observation per city, or None if any is missing or stale
+        """
+        if cities is None:
+            if not self.warmed:
+                return None
+            records = [self.get(key) for key in self._entries]
+        else:
+            records = [self.get(city) for city in cities]
+        if any(record is None for record in records):
+            return None
+        return records
+
+    async def get_or_load(self, city: str, repository: WeatherRepository) -> Optional[WeatherData]:
+        """
+        Serve the latest observation from memory, falling back to the repository
+
+        Args:
+            city: City name
+            repository: Repository used on a miss or stale entry
+
+        Returns:
+            WeatherData object or None if the city has no data
+        """
+        record = self.get(city)
+        if record is not None:
+            self.hits += 1
+            return record
+
+        if normalize_city(city) in self._entries:
+            self.stale_reads += 1
+        else:
+            self.misses += 1
+
+        record = await repository.get_latest_weather(city)
+        if record is not None:
+            self.update([record])
+        return record
+
+    async def get_many_or_load(
+        self,
+        cities: Optional[List[str]],
+        repository: WeatherRepository
+    ) -> List[WeatherData]:
+        """
+        Serve the latest observation for many cities with at most one bulk query
+
+        Fresh entries come from memory; everything else is fetched with a
+        single windowed query and written back to the store.
+
+        Args:
+            cities: City names, or None for every city
+            repository: Repository used for missing or stale entries
+
+        Returns:
+            List of WeatherData objects, one per city found
+        """
+        if cities is None:
+            records = [self.get(key) for key in self._entries]
+            if self.warmed and all(record is not None for record in records):
+                self.hits += len(records)
+                return records
+            self.misses += 1
+            records = await repository.get_latest_weather_bulk()
+            self.update(records)
+            self.warmed = True
+            return records
+
+        found: Dict[str, WeatherData] = {}
+        missing = []
+        for city in cities:
+            record = self.get(city)
+            if record is None:
+                missing.append(city)
+            else:
+                found[normalize_city(record.city)] = record
+        self.hits += len(found)
+
+        if missing:
+            self.misses += len(missing)
+            loaded = await repository.get_latest_weather_bulk(missing)
+            self.update(loaded)
+            for record in loaded:
+                found[normalize_city(record.city)] = record
+
+        return list(found.values())
+
+    async def warm(self, repository: WeatherRepository):
+        """Load the newest row for every city with one bulk query"""
+        try:
+            records = await repository.get_latest_weather_bulk()
+            self.update(records)
+            self.warmed = True
+            logger.info(f"Latest observation store warmed with {len(records)} cities")
+        except Exception as e:
+            logger.error(f"Failed to warm latest observation store: {str(e)}")
+
+    def stats(self) -> dict:
+        """Store counters for monitoring"""
+        return {
+            "cities": len(self._entries),
+            "warmed": self.warmed,
+            "max_age_seconds": self.max_age_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_reads": self.stale_reads
+        }
@@ -0,0 +1,213 @@
+"""Single-runner leader election between processes through a SQLite lease"""
+import asyncio
+import logging
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from pathlib import Path
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+LEASE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS leases (
+  name TEXT PRIMARY KEY,
+  holder TEXT NOT NULL,
+  expires_at REAL NOT NULL,  -- epoch seconds
+  acquired_at REAL NOT NULL
+)
+"""
+
+
+def default_holder_id() -> str:
+    """Identity unique to this process, readable in the lease table"""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class SQLiteLease:
+    """
+    Named lease with an expiry, shared through a SQLite file
+
+    Every process on the host opens the same database file. Acquire and
+    renew are single statements inside an IMMEDIATE transaction, so the
+    holder check and the update can't interleave between processes. Expiry
+    uses wall-clock time because the value is compared across processes.
+    """
+
+    def __init__(self, path: str, name: str, holder_id: str, ttl_seconds: float):
+        self.path = path
+        self.name = name
+        self.holder_id = holder_id
+        self.ttl_seconds = ttl_seconds
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=self.ttl_seconds, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(LEASE_SCHEMA)
+        return connection
+
+    def _execute(self, statement: str, params: tuple) -> int:
+        connection = self._connect()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            changed = connection.execute(statement, params).rowcount
+            connection.execute("COMMIT")
+            return changed
+        finally:
+            connection.close()
+
+    def try_acquire(self) -> bool:
+        """Take the lease if it is free, expired or already ours"""
+        now = time.time()
+        return self._execute(
+            """
+            INSERT INTO leases (name, holder, expires_at, acquired_at) VALUES (?, ?, ?, ?)
+            ON CONFLICT (name) DO UPDATE SET
+              holder = excluded.holder,
+              expires_at = excluded.expires_at,
+              acquired_at = CASE WHEN leases.holder = excluded.holder
+                                 THEN leases.acquired_at ELSE excluded.acquired_at END
+            WHERE leases.holder = excluded.holder OR leases.expires_at < ?
+            """,
+            (self.name, self.holder_id, now + self.ttl_seconds, now, now)
+        ) > 0
+
+    def renew(self) -> bool:
+        """Extend the lease; False means it expired and someone else took it"""
+        return self._execute(
+            """
+            UPDATE leases SET expires_at = ?
+            WHERE name = ? AND holder = ?
+            """,
+            (time.time() + self.ttl_seconds, self.name, self.holder_id)
+        ) > 0
+
+    def release(self):
+        """Give the lease up so another process can take over immediately"""
+        self._execute(
+            "DELETE FROM leases WHERE name = ? AND holder = ?",
+            (self.name, self.holder_id)
+        )
+
+    def current_holder(self) -> Optional[str]:
+        """Holder of an unexpired lease, or None"""
+        connection = self._connect()
+        try:
+            row = connection.execute(
+                "SELECT holder FROM leases WHERE name = ? AND expires_at >= ?",
+                (self.name, time.time())
+            ).fetchone()
+            return row[0] if row else None
+        finally:
+            connection.close()
+
+
+class LeaderElector:
+    """
+    Keeps trying to hold a lease and reports leadership changes
+
+    Renews every `heartbeat_seconds` while leading; a process that dies or
+    stalls stops renewing, and another takes over once the lease's TTL
+    runs out. Graceful shutdown releases the lease so the handover is
+    immediate. Callbacks run on the event loop and should return quickly.
+    """
+
+    def __init__(
+        self,
+        lease: SQLiteLease,
+        heartbeat_seconds: float,
+        on_elected: Callable[[], Awaitable[None]],
+        on_demoted: Callable[[], Awaitable[None]]
+    ):
+        self.lease = lease
+        self.heartbeat_seconds = heartbeat_seconds
+        self.on_elected = on_elected
+        self.on_demoted = on_demoted
+        self.is_leader = False
+        self.elected_at: Optional[float] = None
+        self.elections = 0
+        self.demotions = 0
+        self.lease_errors = 0
+        self._last_renewed = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Start campaigning in the background"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop campaigning; step down and release the lease if leading"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.is_leader:
+            await self._step_down()
+            await self._release()
+
+    async def _release(self):
+        try:
+            await asyncio.to_thread(self.lease.release)
+        except Exception as e:
+            # It expires on its own after the TTL
+            logger.error(f"Failed to release scheduler lease: {str(e)}")
+
+    async def _step_down(self):
+        self.is_leader = False
+        self.elected_at = None
+        self.demotions += 1
+        try:
+            await self.on_demoted()
+        except Exception as e:
+            logger.error(f"Error while stepping down as scheduler leader: {str(e)}")
+
+    async def _run(self):
+        while True:
+            try:
+                if self.is_leader:
+                    held = await asyncio.to_thread(self.lease.renew)
+                else:
+                    held = await asyncio.to_thread(self.lease.try_acquire)
+                if held:
+                    self._last_renewed = time.monotonic()
+            except Exception as e:
+                # Can't tell whether we still hold it; keep running until the renew deadline passes
+                self.lease_errors += 1
+                logger.error(f"Scheduler lease check failed: {str(e)}")
+                held = self.is_leader and time.monotonic() - self._last_renewed < self.lease.ttl_seconds
+
+            if held and not self.is_leader:
+                self.is_leader = True
+                self.elected_at = time.time()
+                self.elections += 1
+                logger.info(f"Elected scheduler leader as {self.lease.holder_id}")
+                try:
+                    await self.on_elected()
+                except Exception as e:
+                    logger.error(f"Failed to start as scheduler leader, releasing lease: {str(e)}")
+                    await self._step_down()
+                    await self._release()
+            elif not held and self.is_leader:
+                logger.warning(f"Lost scheduler lease held as {self.lease.holder_id}")
+                await self._step_down()
+
+            await asyncio.sleep(self.heartbeat_seconds)
+
+    def stats(self) -> dict:
+        """Leadership state for monitoring"""
+        return {
+            "holder_id": self.lease.holder_id,
+            "is_leader": self.is_leader,
+            "leader_for_seconds": round(time.time() - self.elected_at, 1) if self.elected_at else None,
+            "elections": self.elections,
+            "demotions": self.demotions,
+            "lease_errors": self.lease_errors
+        }
@@ -0,0 +1,127 @@
+"""Client-side rate limiting and retry bookkeeping for outbound API calls"""
+import asyncio
+import random
+import time
+from dataclasses import dataclass, asdict, field
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    Async token-bucket rate limiter
+
+    Tokens refill continuously at `calls_per_minute / 60` per second up to
+    `burst`. Each call consumes one token; callers wait when the bucket is
+    empty, so the sustained rate never exceeds the configured budget.
+    """
+
+    def __init__(self, calls_per_minute: float, burst: int = 1):
+        self.rate = max(calls_per_minute, 1e-6) / 60.0
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self) -> float:
+        """
+        Take one token, waiting until one is available
+
+        Returns:
+            Seconds spent waiting (0.0 if the call was not throttled)
+        """
+        waited = 0.0
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._refill(now)
+                delay = self.paused_until - now
+                if delay <= 0 and self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                if delay <= 0:
+                    delay = (1 - self.tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+
+    def set_rate(self, calls_per_minute: float):
+        """Change the sustained rate; tokens already earned at the old rate are kept"""
+        self._refill(time.monotonic())
+        self.rate = max(calls_per_minute, 1e-6) / 60.0
+
+    def pause(self, seconds: float):
+        """Hold all callers for `seconds`, e.g. after the server signalled 429"""
+        now = time.monotonic()
+        self.paused_until = max(self.paused_until, now + seconds)
+        self.tokens = 0.0
+        self.updated_at = now
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """
+    Full-jitter exponential backoff delay
+
+    Args:
+        attempt: Zero-based retry attempt
+        base: Base delay in seconds
+        cap: Maximum delay in seconds
+
+    Returns:
+        Delay in seconds drawn uniformly from [0, min(cap, base * 2**attempt)]
+    """
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header given either as seconds or an HTTP date
+
+    Returns:
+        Seconds to wait, or None if the header is missing or malformed
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+@dataclass
+class FetchRunStats:
+    """Counters for outbound API calls, per fetch run or as client totals"""
+    started_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    calls: int = 0
+    succeeded: int = 0
+    throttled: int = 0
+    throttle_wait_seconds: float = 0.0
+    retried: int = 0
+    failed: int = 0
+
+    def add(self, other: "FetchRunStats"):
+        """Accumulate another set of counters into this one"""
+        self.calls += other.calls
+        self.succeeded += other.succeeded
+        self.throttled += other.throttled
+        self.throttle_wait_seconds += other.throttle_wait_seconds
+        self.retried += other.retried
+        self.failed += other.failed
+
+    def as_dict(self) -> dict:
+        report = asdict(self)
+        report["started_at"] = self.started_at.isoformat()
+        report["throttle_wait_seconds"] = round(self.throttle_wait_seconds, 3)
+        return report
@@ -0,0 +1,245 @@
+"""Consistent-hash partitioning of tracked cities across ingest workers"""
+import asyncio
+import bisect
+import hashlib
+import logging
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from app.models import normalize_city
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+MEMBERSHIP_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingest_members (
+  member_id TEXT PRIMARY KEY,
+  instance TEXT NOT NULL,
+  expires_at REAL NOT NULL,  -- epoch seconds
+  joined_at REAL NOT NULL
+)
+"""
+
+
+def ingest_member_id() -> str:
+    """
+    This worker's ID in the ingest ring
+
+    INGEST_MEMBER_ID if set, otherwise hostname and process ID, so several
+    workers on one host (uvicorn --workers, several app.worker processes)
+    each get a shard instead of all but one being refused.
+    """
+    return settings.INGEST_MEMBER_ID or f"{socket.gethostname()}-{os.getpid()}"
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.sha1(value.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """
+    Consistent-hash ring over member IDs
+
+    Each member is placed at `vnodes` points; a key belongs to the first
+    member point at or after its hash. Adding or removing one of N members
+    moves only about 1/N of the keys, and virtual nodes keep the largest
+    shard within roughly 10-20% of the mean.
+    """
+
+    def __init__(self, members: Iterable[str], vnodes: int = 160):
+        self.members = sorted(set(members))
+        points = sorted(
+            (_hash(f"{member}#{index}"), member)
+            for member in self.members
+            for index in range(vnodes)
+        )
+        self._hashes = [point for point, _ in points]
+        self._owners = [member for _, member in points]
+
+    def owner(self, key: str) -> Optional[str]:
+        """Member responsible for a key, or None if the ring is empty"""
+        if not self._hashes:
+            return None
+        index = bisect.bisect_left(self._hashes, _hash(key)) % len(self._hashes)
+        return self._owners[index]
+
+    def assign(self, cities: Iterable[str]) -> Dict[str, List[str]]:
+        """Partition cities by owning member, keyed on the normalized name"""
+        shards: Dict[str, List[str]] = {member: [] for member in self.members}
+        for city in cities:
+            owner = self.owner(normalize_city(city))
+            if owner is not None:
+                shards[owner].append(city)
+        return shards
+
+
+class ShardMembership:
+    """
+    Live ingest workers registered in a shared SQLite file, and this worker's shard
+
+    Each worker upserts a row with an expiry every `heartbeat_seconds`;
+    rows not renewed within `ttl_seconds` drop out of the ring. The shard
+    is recomputed from the live members whenever it is read, so it
+    rebalances on the next run after a worker joins or leaves. A second
+    live process claiming the same member ID is refused, since both would
+    fetch the same shard and share one spool directory.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        member_id: str,
+        ttl_seconds: float,
+        heartbeat_seconds: float,
+        vnodes: int = 160
+    ):
+        self.path = path
+        self.member_id = member_id
+        self.instance = uuid.uuid4().hex
+        self.ttl_seconds = ttl_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.vnodes = vnodes
+        self.registered = False
+        self.heartbeats = 0
+        self.heartbeat_errors = 0
+        self.last_members: List[str] = []
+        self.last_shard_size = 0
+        self.rebalances = 0
+        self._task: Optional[asyncio.Task] = None
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=self.ttl_seconds, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(MEMBERSHIP_SCHEMA)
+        return connection
+
+    def heartbeat(self) -> bool:
+        """
+        Register or renew this worker
+
+        Returns:
+            False if another live process holds the same member ID
+        """
+        now = time.time()
+        connection = self._connect()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            changed = connection.execute(
+                """
+                INSERT INTO ingest_members (member_id, instance, expires_at, joined_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT (member_id) DO UPDATE SET
+                  instance = excluded.instance,
+                  expires_at = excluded.expires_at,
+                  joined_at = CASE WHEN ingest_members.instance = excluded.instance
+                                   THEN ingest_members.joined_at ELSE excluded.joined_at END
+                WHERE ingest_members.instance = excluded.instance OR ingest_members.expires_at < ?
+                """,
+                (self.member_id, self.instance, now + self.ttl_seconds, now, now)
+            ).rowcount
+            connection.execute("COMMIT")
+            return changed > 0
+        finally:
+            connection.close()
+
+    def leave(self):
+        """Remove this worker so the others take over its shard on their next run"""
+        connection = self._connect()
+        try:
+            connection.execute(
+                "DELETE FROM ingest_members WHERE member_id = ? AND instance = ?",
+                (self.member_id, self.instance)
+            )
+        finally:
+            connection.close()
+
+    def live_members(self) -> List[str]:
+        """Member IDs with an unexpired registration"""
+        connection = self._connect()
+        try:
+            rows = connection.execute(
+                "SELECT member_id FROM ingest_members WHERE expires_at >= ? ORDER BY member_id",
+                (time.time(),)
+            ).fetchall()
+            return [row[0] for row in rows]
+        finally:
+            connection.close()
+
+    async def shard(self, cities: List[str]) -> List[str]:
+        """
+        Cities this worker should ingest right now
+
+        Returns an empty shard until this worker is registered, so a
+        duplicate member ID never ingests.
+        """
+        if not self.registered:
+            return []
+        members = await asyncio.to_thread(self.live_members)
+        if self.member_id not in members:
+            # Our row lapsed (e.g. a stalled loop); keep our share until the next heartbeat
+            members.append(self.member_id)
+        members.sort()
+        if members != self.last_members:
+            if self.last_members:
+                self.rebalances += 1
+            logger.info(f"Ingest ring has {len(members)} member(s): {', '.join(members)}")
+            self.last_members = members
+        shard = HashRing(members, self.vnodes).assign(cities)[self.member_id]
+        self.last_shard_size = len(shard)
+        return shard
+
+    async def start(self):
+        """Register now, then keep renewing in the background"""
+        await self._beat()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop renewing and leave the ring"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.registered:
+            self.registered = False
+            try:
+                await asyncio.to_thread(self.leave)
+            except Exception as e:
+                # The row expires on its own after the TTL
+                logger.error(f"Failed to leave ingest ring: {str(e)}")
+
+    async def _beat(self):
+        try:
+            registered = await asyncio.to_thread(self.heartbeat)
+        except Exception as e:
+            self.heartbeat_errors += 1
+            logger.error(f"Ingest membership heartbeat failed: {str(e)}")
+            return
+        if not registered and (self.registered or self.heartbeats == 0):
+            logger.error(f"Ingest member ID {self.member_id} is held by another live process; not ingesting")
+        self.registered = registered
+        self.heartbeats += 1
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            await self._beat()
+
+    def stats(self) -> dict:
+        """Membership state for monitoring"""
+        return {
+            "member_id": self.member_id,
+            "registered": self.registered,
+            "members": self.last_members,
+            "shard_size": self.last_shard_size,
+            "rebalances": self.rebalances,
+            "heartbeat_errors": self.heartbeat_errors
+        }
@@ -0,0 +1,429 @@
+"""Durable on-disk write-ahead spool between ingestion and BigQuery"""
+import asyncio
+import fcntl
+import logging
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from pydantic import ValidationError
+from app.models import WeatherData
+from app.repositories.base import WeatherRepository
+from app.services.rate_limiter import backoff_delay
+from app.services.sharding import ingest_member_id
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+SEGMENT_GLOB = "segment-*"
+OPEN_SUFFIX = ".ndjson"
+CLAIMED_SUFFIX = ".claimed"
+LOCK_FILE = ".lock"
+
+
+class WriteAheadSpool:
+    """
+    Append-only segment files holding observations not yet in BigQuery
+
+    Each append writes one newline-delimited JSON record per observation
+    to the active segment. Appends that arrive while an fsync is running
+    are made durable by the next single fsync (group commit), so the cost
+    is one fsync per burst rather than per record or per caller. The
+    active segment is sealed once it exceeds `segment_max_bytes` or when
+    the flusher drains the spool.
+
+    Several processes may share the directory (e.g. uvicorn workers that
+    trade the scheduler lease), so ownership is held with flock: a writer
+    keeps an exclusive lock on its active segment until it seals it, and a
+    flusher claims a sealed segment by locking it and renaming it to
+    `.claimed`, keeping the lock until the segment is deleted or released.
+    Creating and claiming segments happen under the directory's `.lock`
+    file. A segment whose owner died is unlocked by the kernel and
+    claimed by the next flusher, `.claimed` ones included.
+    """
+
+    def __init__(self, directory: str, segment_max_bytes: int):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.segment_max_bytes = segment_max_bytes
+        self._active_path: Optional[Path] = None
+        self._active_file = None
+        self._active_bytes = 0
+        self._claims: Dict[Path, int] = {}
+        self._write_lock = asyncio.Lock()
+        self._sync_lock = asyncio.Lock()
+        self._written_sequence = 0
+        self._synced_sequence = 0
+        self.appended_records = 0
+        self.fsyncs = 0
+
+    @staticmethod
+    def _sequence(path: Path) -> int:
+        return int(path.stem.split("-", 1)[1])
+
+    @classmethod
+    def _segment_paths(cls, directory: Path) -> List[Path]:
+        """Open and claimed segments in `directory`, oldest first"""
+        return sorted(
+            (path for path in directory.glob(SEGMENT_GLOB) if path.suffix in (OPEN_SUFFIX, CLAIMED_SUFFIX)),
+            key=cls._sequence
+        )
+
+    @staticmethod
+    @contextmanager
+    def _directory_lock(directory: Path):
+        """Serialize segment creation and claims in `directory` across processes"""
+        lock_fd = os.open(directory / LOCK_FILE, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(lock_fd, fcntl.LOCK_EX)
+            yield
+        finally:
+            os.close(lock_fd)
+
+    def _open_segment(self):
+        """Create and lock the next segment; the lock marks it as being written"""
+        with self._directory_lock(self.directory):
+            existing = self._segment_paths(self.directory)
+            sequence = self._sequence(existing[-1]) + 1 if existing else 1
+            path = self.directory / f"segment-{sequence:012d}{OPEN_SUFFIX}"
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | os.O_APPEND, 0o644)
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return path, os.fdopen(fd, "ab")
+
+    async def append(self, weather_records: List[WeatherData]) -> int:
+        """
+        Durably append observations; returns once they are fsynced to disk
+
+        Args:
+            weather_records: Observations to spool
+
+        Returns:
+            Number of records appended
+        """
+        if not weather_records:
+            return 0
+
+        data = b"".join(record.model_dump_json().encode() + b"\n" for record in weather_records)
+        loop = asyncio.get_running_loop()
+
+        async with self._write_lock:
+            if self._active_bytes >= self.segment_max_bytes:
+                await self._seal_locked()
+            if self._active_file is None:
+                self._active_path, self._active_file = await loop.run_in_executor(None, self._open_segment)
+                self._active_bytes = 0
+            await loop.run_in_executor(None, self._write, self._active_file, data)
+            self._active_bytes += len(data)
+            self._written_sequence += 1
+            sequence = self._written_sequence
+
+        await self._sync_through(sequence)
+        self.appended_records += len(weather_records)
+        return len(weather_records)
+
+    @staticmethod
+    def _write(file, data: bytes):
+        file.write(data)
+        file.flush()
+
+    async def _sync_through(self, sequence: int):
+        """fsync the active segment unless a later fsync already covered `sequence`"""
+        async with self._sync_lock:
+            if self._synced_sequence >= sequence:
+                return
+            target = self._written_sequence
+            await asyncio.get_running_loop().run_in_executor(None, os.fsync, self._active_file.fileno())
+            self.fsyncs += 1
+            self._synced_sequence = target
+
+    async def seal(self):
+        """Close the active segment so a flusher can claim it"""
+        async with self._write_lock:
+            await self._seal_locked()
+
+    async def _seal_locked(self):
+        """Seal the active segment; caller holds the write lock"""
+        async with self._sync_lock:
+            if self._active_file is None:
+                return
+            if self._synced_sequence < self._written_sequence:
+                await asyncio.get_running_loop().run_in_executor(None, os.fsync, self._active_file.fileno())
+                self.fsyncs += 1
+                self._synced_sequence = self._written_sequence
+            self._active_file.close()  # Releases the writer's lock
+            self._active_file = None
+            self._active_path = None
+            self._active_bytes = 0
+
+    def claim_next(self, directory: Optional[Path] = None) -> Optional[Path]:
+        """
+        Claim the oldest segment no other process holds, or None
+
+        Skips segments still being written (including this spool's own
+        active one) and segments claimed by a live flusher. The claim
+        lasts until `remove` or `release`.
+
+        Args:
+            directory: Spool directory to claim from; defaults to this spool's
+
+        Returns:
+            Path of the claimed segment, now ending in `.claimed`
+        """
+        directory = self.directory if directory is None else Path(directory)
+        with self._directory_lock(directory):
+            for path in self._segment_paths(directory):
+                if path in self._claims:
+                    continue
+                try:
+                    fd = os.open(path, os.O_RDONLY)
+                except FileNotFoundError:
+                    continue
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    os.close(fd)
+                    continue
+                if not path.exists():
+                    # Removed by its previous claimer between our listing and locking it
+                    os.close(fd)
+                    continue
+                claimed = path.with_suffix(CLAIMED_SUFFIX)
+                if path != claimed:
+                    os.rename(path, claimed)
+                self._claims[claimed] = fd
+                return claimed
+        return None
+
+    @staticmethod
+    def read_segment(path: Path) -> List[WeatherData]:
+        """
+        Parse a segment, skipping lines that do not decode
+
+        A crash mid-append can leave a torn final line; everything before
+        it was fsynced and is returned.
+        """
+        records = []
+        with open(path, "rb") as f:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    records.append(WeatherData.model_validate_json(line))
+                except ValidationError:
+                    logger.warning(f"Skipping unreadable line {line_number} in spool segment {path.name}")
+        return records
+
+    def remove(self, paths: List[Path]):
+        """Delete claimed segments whose records are stored"""
+        for path in paths:
+            # Unlink before unlocking so no other flusher can claim it in between
+            path.unlink(missing_ok=True)
+            fd = self._claims.pop(path, None)
+            if fd is not None:
+                os.close(fd)
+
+    def release(self, paths: List[Path]):
+        """Give up claims without deleting, e.g. after a failed load"""
+        for path in paths:
+            fd = self._claims.pop(path, None)
+            if fd is not None:
+                os.close(fd)
+
+    async def close(self):
+        """Seal the active segment and release any claims"""
+        await self.seal()
+        self.release(list(self._claims))
+
+    def stats(self) -> dict:
+        """Spool counters for monitoring"""
+        segments = self._segment_paths(self.directory)
+        pending_bytes = 0
+        for path in segments:
+            try:
+                pending_bytes += path.stat().st_size
+            except FileNotFoundError:
+                pass
+        return {
+            "segments": len(segments),
+            "claimed_segments": sum(1 for path in segments if path.suffix == CLAIMED_SUFFIX),
+            "pending_bytes": pending_bytes,
+            "appended_records": self.appended_records,
+            "fsyncs": self.fsyncs
+        }
+
+
+class SpoolFlusher:
+    """
+    Background task draining the spool into the repository
+
+    Sealed segments are claimed oldest-first and combined into batches of
+    at least `batch_records` (whole segments only) so hours that piled up
+    during an outage go out as a few large load jobs. A failed batch is
+    released back to disk and retried with full-jitter exponential
+    backoff; segments are only deleted after the load succeeds. Claims
+    make it safe for a demoted leader's final flush to overlap the new
+    leader's. Redelivery after a crash between load and delete is absorbed
+    by deterministic record IDs in merge write mode. With
+    `orphan_directories`, each flush also drains the spool directories it
+    returns (those of departed sharded workers) through the same claims.
+    """
+
+    def __init__(
+        self,
+        spool: WriteAheadSpool,
+        repository: WeatherRepository,
+        batch_records: int,
+        interval_seconds: float,
+        backoff_base_seconds: float,
+        backoff_max_seconds: float,
+        on_flushed: Optional[Callable[[List[WeatherData]], Awaitable[None]]] = None,
+        orphan_directories: Optional[Callable[[], Awaitable[List[Path]]]] = None
+    ):
+        self.spool = spool
+        self.repository = repository
+        self.batch_records = max(1, batch_records)
+        self.interval_seconds = interval_seconds
+        self.backoff_base_seconds = backoff_base_seconds
+        self.backoff_max_seconds = backoff_max_seconds
+        self.on_flushed = on_flushed
+        self.orphan_directories = orphan_directories
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.flushed_records = 0
+        self.flushed_batches = 0
+        self.orphan_records = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.last_error: Optional[str] = None
+
+    def start(self):
+        """Start draining in the background"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def wake(self):
+        """Flush now instead of waiting for the next interval"""
+        self._wake.set()
+
+    async def stop(self):
+        """Stop the background task and make one last attempt to drain"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.flush()
+        except Exception as e:
+            logger.error(f"Spool not drained at shutdown, will retry on next start: {str(e)}")
+        await self.spool.close()
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+            try:
+                await self.flush()
+                self.consecutive_failures = 0
+            except Exception as e:
+                delay = backoff_delay(
+                    self.consecutive_failures,
+                    self.backoff_base_seconds,
+                    self.backoff_max_seconds
+                )
+                self.failures += 1
+                self.consecutive_failures += 1
+                self.last_error = str(e)
+                logger.error(f"Spool flush failed (attempt {self.consecutive_failures}), retrying in {delay:.1f}s: {str(e)}")
+                await asyncio.sleep(delay)
+
+    def _next_batch(self, directory: Optional[Path] = None) -> Tuple[List[Path], List[WeatherData]]:
+        paths, records = [], []
+        while len(records) < self.batch_records:
+            path = self.spool.claim_next(directory)
+            if path is None:
+                break
+            paths.append(path)
+            try:
+                records.extend(self.spool.read_segment(path))
+            except OSError:
+                self.spool.release(paths)
+                raise
+        return paths, records
+
+    async def flush(self) -> int:
+        """
+        Load everything currently spooled, in as few batches as possible
+
+        Returns:
+            Number of records loaded
+        """
+        await self.spool.seal()
+        flushed = await self._drain()
+        if self.orphan_directories is not None:
+            for directory in await self.orphan_directories():
+                drained = await self._drain(directory)
+                if drained:
+                    logger.info(f"Drained {drained} records left in {directory} by a departed ingest member")
+                    self.orphan_records += drained
+                flushed += drained
+        return flushed
+
+    async def _drain(self, directory: Optional[Path] = None) -> int:
+        """Claim, load and delete segments in `directory` (default: our spool's) until none are left"""
+        loop = asyncio.get_running_loop()
+        flushed = 0
+
+        while True:
+            paths, records = await loop.run_in_executor(None, self._next_batch, directory)
+            if not paths:
+                return flushed
+
+            try:
+                if records:
+                    await self.repository.insert_weather_data(records)
+            except BaseException:
+                self.spool.release(paths)
+                raise
+            self.spool.remove(paths)
+            flushed += len(records)
+            self.flushed_records += len(records)
+            self.flushed_batches += 1
+            logger.info(f"Flushed {len(records)} spooled records from {len(paths)} segment(s)")
+
+            if records and self.on_flushed is not None:
+                await self.on_flushed(records)
+
+    def stats(self) -> dict:
+        """Spool and flusher counters for monitoring"""
+        return {
+            **self.spool.stats(),
+            "flushed_records": self.flushed_records,
+            "flushed_batches": self.flushed_batches,
+            "orphan_records": self.orphan_records,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error
+        }
+
+
+def create_spool() -> Optional[WriteAheadSpool]:
+    """
+    Build the spool configured by SPOOL_ENABLED and SPOOL_DIR, or None
+
+    Sharded workers write concurrently, so each gets a subdirectory named
+    after its member ID. Directories of members that left the ring are
+    drained by the live members' flushers (see `orphan_directories`).
+    """
+    if not settings.SPOOL_ENABLED:
+        return None
+    directory = settings.SPOOL_DIR
+    if settings.INGEST_SHARDING_ENABLED:
+        directory = os.path.join(directory, ingest_member_id())
+    return WriteAheadSpool(directory, settings.SPOOL_SEGMENT_MAX_BYTES)
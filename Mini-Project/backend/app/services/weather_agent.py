@@ -4,7 +4,10 @@ import json
 from typing import List, Dict, Any, Optional
 from openai import AsyncOpenAI
 from app.config import settings
+from app.repositories.base import WeatherRepository
 from app.services.agent_tools import WeatherAgentTools, get_tool_definitions
+from app.services.latest_store import LatestObservationStore
+from app.services.weather_api import WeatherAPIClient
 
 logger = logging.getLogger(__name__)
 
@@ -37,9 +40,14 @@ When responding:
 Example refusal: "I'm sorry, but I can only help with weather-related questions. Please ask me about current weather, forecasts, or historical weather data for specific cities."
 """
 
-    def __init__(self):
+    def __init__(
+        self,
+        repository: WeatherRepository,
+        weather_client: WeatherAPIClient,
+        latest_store: LatestObservationStore
+    ):
         self.client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
-        self.tools = WeatherAgentTools()
+        self.tools = WeatherAgentTools(repository, weather_client, latest_store)
         self.tool_definitions = get_tool_definitions()
         self.model = "gpt-4o-mini"  # model with function calling
 
@@ -226,14 +234,3 @@ Examples of NOT weather-related: "What's the capital of France?", "Who won the g
                 "error": f"Tool execution failed: {str(e)}"
             }
 
-
-# Singleton instance
-_weather_agent_instance: Optional[WeatherAgent] = None
-
-
-def get_weather_agent() -> WeatherAgent:
-    """Get or create the weather agent singleton instance"""
-    global _weather_agent_instance
-    if _weather_agent_instance is None:
-        _weather_agent_instance = WeatherAgent()
-    return _weather_agent_instance
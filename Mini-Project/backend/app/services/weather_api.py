@@ -1,74 +1,275 @@
 """OpenWeatherMap API client"""
+import asyncio
 import httpx
+import json
 import logging
 from datetime import datetime, timezone
-from typing import Optional
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from app.models import WeatherData, OpenWeatherResponse
 from app.config import settings
+from app.services.weather_cache import WeatherResponseCache, weather_response_cache
+from app.services.rate_limiter import (
+    TokenBucket,
+    FetchRunStats,
+    backoff_delay,
+    parse_retry_after,
+)
 
 logger = logging.getLogger(__name__)
 
 
 class WeatherAPIClient:
     """Client for fetching weather data from OpenWeatherMap"""
-    
+
     BASE_URL = "https://api.openweathermap.org/data/2.5"
-    
-    def __init__(self):
+
+    def __init__(self, cache: Optional[WeatherResponseCache] = None):
         self.api_key = settings.OPENWEATHER_API_KEY
+        self.base_url = settings.OPENWEATHER_BASE_URL or self.BASE_URL
         self.timeout = httpx.Timeout(30.0)
-    
-    async def fetch_current_weather(self, city: str) -> Optional[WeatherData]:
+        self.max_concurrency = max(1, settings.WEATHER_API_MAX_CONCURRENCY)
+        self.city_timeout = settings.WEATHER_API_CITY_TIMEOUT_SECONDS
+        self.max_retries = settings.OPENWEATHER_MAX_RETRIES
+        self.rate_limiter = TokenBucket(
+            calls_per_minute=settings.OPENWEATHER_CALLS_PER_MINUTE,
+            burst=settings.OPENWEATHER_BURST
+        )
+        self.cache = cache if cache is not None else weather_response_cache
+        self.total_stats = FetchRunStats()  # Every call made by this client
+        self.last_run_report: Optional[dict] = None
+        self.use_group_endpoint = settings.OPENWEATHER_USE_GROUP_ENDPOINT
+        self.group_size = max(1, min(20, settings.OPENWEATHER_GROUP_SIZE))
+        self.city_id_cache_path = Path(settings.CITY_ID_CACHE_PATH)
+        self.city_ids = self._load_city_ids()
+        self._city_ids_dirty = False
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
         """
-        Fetch current weather data for a city
-        
+        Get the shared HTTP client, creating it on first use
+
+        One keep-alive connection pool is reused for the lifetime of this
+        client, so fan-out requests do not pay a TLS handshake per city.
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.max_concurrency,
+                    keepalive_expiry=60.0
+                )
+            )
+        return self._client
+
+    async def aclose(self):
+        """Close the shared HTTP connection pool"""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
+    def _load_city_ids(self) -> Dict[str, int]:
+        """Load the city name -> OpenWeatherMap ID cache from disk"""
+        try:
+            with open(self.city_id_cache_path, encoding="utf-8") as f:
+                return {city: int(city_id) for city, city_id in json.load(f).items()}
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError, AttributeError) as e:
+            logger.warning(f"Ignoring unreadable city ID cache {self.city_id_cache_path}: {str(e)}")
+            return {}
+
+    def _save_city_ids(self):
+        """Persist newly resolved city IDs (atomic replace)"""
+        if not self._city_ids_dirty:
+            return
+        try:
+            self.city_id_cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.city_id_cache_path.with_suffix(".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.city_ids, f, ensure_ascii=False, indent=2, sort_keys=True)
+            tmp_path.replace(self.city_id_cache_path)
+            self._city_ids_dirty = False
+            logger.info(f"Saved {len(self.city_ids)} city IDs to {self.city_id_cache_path}")
+        except OSError as e:
+            logger.warning(f"Failed to save city ID cache: {str(e)}")
+
+    def _record_city_id(self, city: str, data: dict):
+        """Remember the OpenWeatherMap ID returned for a city name"""
+        city_id = data.get("id")
+        if isinstance(city_id, int) and self.city_ids.get(city) != city_id:
+            self.city_ids[city] = city_id
+            self._city_ids_dirty = True
+
+    async def _get_json(
+        self,
+        path: str,
+        params: dict,
+        label: str,
+        run_stats: Optional[FetchRunStats] = None
+    ) -> Optional[dict]:
+        """
+        GET an OpenWeatherMap endpoint under the rate limiter, with retries
+
+        HTTP 429, 5xx, transport errors and per-attempt timeouts are retried
+        with jittered exponential backoff, waiting at least as long as any
+        Retry-After header asks. Other 4xx responses fail immediately.
+
         Args:
-            city: City name
-            
+            path: Endpoint path relative to the base URL (e.g. "weather")
+            params: Query parameters (API key and units are added)
+            label: Description used in log messages
+            run_stats: Counters of the fetch run this call belongs to, if any
+
         Returns:
-            WeatherData object or None if failed
+            Decoded JSON payload or None if all attempts failed
         """
-        url = f"{self.BASE_URL}/weather"
+        url = f"{self.base_url}/{path}"
         params = {
-            "q": city,
+            **params,
             "appid": self.api_key,
             "units": "metric"  # Get temperature in Celsius
         }
-        
+        # Counted locally, then added to the run and client totals, so
+        # overlapping runs never see each other's calls
+        stats = FetchRunStats()
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.get(url, params=params)
+            return await self._get_json_attempts(url, params, label, stats)
+        finally:
+            self.total_stats.add(stats)
+            if run_stats is not None:
+                run_stats.add(stats)
+
+    async def _get_json_attempts(
+        self,
+        url: str,
+        params: dict,
+        label: str,
+        stats: FetchRunStats
+    ) -> Optional[dict]:
+        """Request loop of _get_json, counting into `stats`"""
+        error = "unknown error"
+
+        for attempt in range(self.max_retries + 1):
+            waited = await self.rate_limiter.acquire()
+            if waited > 0:
+                stats.throttled += 1
+                stats.throttle_wait_seconds += waited
+            stats.calls += 1
+
+            retry_after = None
+            over_quota = False
+            try:
+                response = await asyncio.wait_for(
+                    self._get_client().get(url, params=params),
+                    timeout=self.city_timeout
+                )
                 response.raise_for_status()
-                
                 data = response.json()
-                return self._normalize_weather_data(data)
-                
-        except httpx.HTTPStatusError as e:
-            logger.error(f"HTTP error fetching weather for {city}: {e.response.status_code}")
-            return None
-        except httpx.RequestError as e:
-            logger.error(f"Request error fetching weather for {city}: {str(e)}")
+                stats.succeeded += 1
+                return data
+
+            except httpx.HTTPStatusError as e:
+                status = e.response.status_code
+                if status != 429 and status < 500:
+                    logger.error(f"HTTP error fetching weather for {label}: {status}")
+                    stats.failed += 1
+                    return None
+                retry_after = parse_retry_after(e.response.headers.get("Retry-After"))
+                over_quota = status == 429
+                error = f"HTTP {status}"
+            except httpx.RequestError as e:
+                error = f"request error: {str(e) or type(e).__name__}"
+            except asyncio.TimeoutError:
+                error = f"timeout after {self.city_timeout}s"
+            except Exception as e:
+                logger.error(f"Unexpected error fetching weather for {label}: {str(e)}")
+                stats.failed += 1
+                return None
+
+            if attempt == self.max_retries:
+                break
+
+            delay = backoff_delay(
+                attempt,
+                settings.OPENWEATHER_BACKOFF_BASE_SECONDS,
+                settings.OPENWEATHER_BACKOFF_MAX_SECONDS
+            )
+            if retry_after is not None:
+                delay = max(delay, retry_after)
+            if over_quota:
+                # The server says we are over quota: hold every caller, not just this one
+                self.rate_limiter.pause(delay)
+
+            stats.retried += 1
+            logger.warning(
+                f"Retrying {label} in {delay:.1f}s after {error} "
+                f"(attempt {attempt + 1}/{self.max_retries})"
+            )
+            await asyncio.sleep(delay)
+
+        logger.error(f"Giving up on {label} after {self.max_retries + 1} attempts: {error}")
+        stats.failed += 1
+        return None
+
+    async def fetch_current_weather(
+        self,
+        city: str,
+        run_stats: Optional[FetchRunStats] = None
+    ) -> Optional[WeatherData]:
+        """
+        Fetch current weather data for a city
+
+        Served from the response cache while the last observation is still
+        current; concurrent calls for the same city share one request.
+
+        Args:
+            city: City name
+            run_stats: Counters of the fetch run this call belongs to, if any
+
+        Returns:
+            WeatherData object or None if failed
+        """
+        return await self.cache.get_or_fetch(city, lambda: self._request_current_weather(city, run_stats))
+
+    async def _request_current_weather(
+        self,
+        city: str,
+        run_stats: Optional[FetchRunStats] = None
+    ) -> Optional[WeatherData]:
+        """Request current weather for a city from OpenWeatherMap, bypassing the cache"""
+        data = await self._get_json("weather", {"q": city}, city, run_stats)
+        if data is None:
             return None
+
+        self._record_city_id(city, data)
+        return self._parse_weather_data(city, data)
+
+    def _parse_weather_data(self, city: str, data: dict) -> Optional[WeatherData]:
+        """Normalize a payload, logging instead of raising on malformed data"""
+        try:
+            return self._normalize_weather_data(data)
         except Exception as e:
-            logger.error(f"Unexpected error fetching weather for {city}: {str(e)}")
+            logger.error(f"Unexpected error normalizing weather for {city}: {str(e)}")
             return None
-    
+
     def _normalize_weather_data(self, data: dict) -> WeatherData:
         """
         Normalize OpenWeatherMap response to WeatherData model
-        
+
         Args:
             data: Raw API response
-            
+
         Returns:
             WeatherData object
         """
         # Extract weather condition description
         condition = data["weather"][0]["description"] if data.get("weather") else "Unknown"
-        
+
         # Convert Unix timestamp to datetime
         timestamp = datetime.fromtimestamp(data["dt"], tz=timezone.utc)
-        
+
         return WeatherData(
             city=data["name"],
             timestamp=timestamp,
@@ -77,25 +278,167 @@ class WeatherAPIClient:
             wind_speed=round(float(data["wind"]["speed"]), 2),
             condition=condition
         )
-    
+
+    async def _fetch_by_name(
+        self,
+        cities: List[str],
+        semaphore: asyncio.Semaphore,
+        run_stats: Optional[FetchRunStats] = None
+    ) -> List[Tuple[str, Optional[WeatherData]]]:
+        """
+        Fetch cities one request per name, each holding a fan-out semaphore slot
+
+        Args:
+            cities: City names
+            semaphore: Semaphore bounding the number of requests in flight
+            run_stats: Counters of the fetch run, if any
+
+        Returns:
+            List of (city, WeatherData or None) tuples
+        """
+        async def fetch_one(city: str) -> Tuple[str, Optional[WeatherData]]:
+            async with semaphore:
+                return city, await self.fetch_current_weather(city, run_stats)
+
+        return list(await asyncio.gather(*(fetch_one(city) for city in cities)))
+
+    async def _fetch_group(
+        self,
+        cities: List[str],
+        semaphore: asyncio.Semaphore,
+        run_stats: Optional[FetchRunStats] = None
+    ) -> List[Tuple[str, Optional[WeatherData]]]:
+        """
+        Fetch up to 20 resolved cities with a single /group call
+
+        Cities missing from the group response (or all of them, if the call
+        fails) fall back to per-name requests.
+
+        Args:
+            cities: City names with known OpenWeatherMap IDs
+            semaphore: Semaphore bounding the number of requests in flight
+            run_stats: Counters of the fetch run, if any
+
+        Returns:
+            List of (city, WeatherData or None) tuples
+        """
+        cities_by_id: Dict[int, List[str]] = {}
+        for city in cities:
+            cities_by_id.setdefault(self.city_ids[city], []).append(city)
+
+        async with semaphore:
+            data = await self._get_json(
+                "group",
+                {"id": ",".join(str(city_id) for city_id in cities_by_id)},
+                f"group of {len(cities)} cities",
+                run_stats
+            )
+
+        results = []
+        for item in (data or {}).get("list", []):
+            names = cities_by_id.get(item.get("id"))
+            if not names:
+                continue
+            weather_data = self._parse_weather_data(names[0], item)
+            if weather_data:
+                for city in names:
+                    self.cache.put(city, weather_data)
+                    results.append((city, weather_data))
+                del cities_by_id[item["id"]]
+
+        if cities_by_id:
+            missing = [city for names in cities_by_id.values() for city in names]
+            logger.warning(f"Group fetch missed {len(missing)} cities, falling back to per-name requests")
+            results.extend(await self._fetch_by_name(missing, semaphore, run_stats))
+
+        return results
+
+    async def iter_multiple_cities(
+        self,
+        cities: list[str],
+        run_stats: Optional[FetchRunStats] = None
+    ) -> AsyncIterator[Tuple[str, Optional[WeatherData]]]:
+        """
+        Fetch current weather for multiple cities concurrently
+
+        At most WEATHER_API_MAX_CONCURRENCY requests are in flight at once
+        and the call rate is capped by the client's token bucket. Cities
+        with a cached OpenWeatherMap ID are fetched in batches through the
+        /group endpoint; the rest use one /weather request per name, which
+        also resolves and caches their IDs for the next run. Results are
+        yielded in completion order, not input order. Cities with a current
+        entry in the response cache are yielded first without a request.
+
+        Calls are counted in this run's own FetchRunStats, so overlapping
+        runs on the shared client keep separate numbers; the finished run's
+        report is published as `last_run_report` and every call is also
+        added to `total_stats`.
+
+        Args:
+            cities: List of city names
+            run_stats: Counters to fill in for the caller; a new set if omitted
+
+        Yields:
+            Tuples of (city, WeatherData or None if the fetch failed)
+        """
+        if run_stats is None:
+            run_stats = FetchRunStats()
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        if self.use_group_endpoint:
+            resolved = [city for city in cities if city in self.city_ids]
+        else:
+            resolved = []
+        resolved_set = set(resolved)
+        unresolved = [city for city in cities if city not in resolved_set]
+
+        # Per-name fetches consult the cache themselves; group batches are filtered here
+        cached = [(city, self.cache.lookup(city)) for city in resolved]
+        resolved = [city for city, weather_data in cached if weather_data is None]
+
+        tasks = [
+            asyncio.create_task(self._fetch_group(resolved[i:i + self.group_size], semaphore, run_stats))
+            for i in range(0, len(resolved), self.group_size)
+        ]
+        tasks.extend(
+            asyncio.create_task(self._fetch_by_name([city], semaphore, run_stats))
+            for city in unresolved
+        )
+
+        try:
+            for city, weather_data in cached:
+                if weather_data is not None:
+                    yield city, weather_data
+
+            for next_done in asyncio.as_completed(tasks):
+                for result in await next_done:
+                    yield result
+        finally:
+            # Cancel outstanding fetches if the consumer stops early
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            self._save_city_ids()
+            self.last_run_report = run_stats.as_dict()
+            logger.info(f"Fetch run report: {self.last_run_report}")
+
     async def fetch_multiple_cities(self, cities: list[str]) -> list[WeatherData]:
         """
         Fetch current weather for multiple cities
-        
+
         Args:
             cities: List of city names
-            
+
         Returns:
             List of WeatherData objects (only successful fetches)
         """
         results = []
-        
-        for city in cities:
-            weather_data = await self.fetch_current_weather(city)
+
+        async for city, weather_data in self.iter_multiple_cities(cities):
             if weather_data:
                 results.append(weather_data)
                 logger.info(f"Successfully fetched weather for {city}")
             else:
                 logger.warning(f"Failed to fetch weather for {city}")
-        
-        return results
\ No newline at end of file
+
+        return results
@@ -0,0 +1,155 @@
+"""Freshness-aware in-process cache for current weather responses"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from app.models import WeatherData, normalize_city
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class WeatherResponseCache:
+    """
+    Bounded LRU cache of current weather keyed by normalized city name
+
+    OpenWeatherMap refreshes a station roughly every `refresh_seconds`, so
+    an entry expires at its observation time (`dt`) plus that interval
+    rather than on a fixed timer. Observations that are already older than
+    that stay cached for `min_ttl_seconds` so a lagging station is not
+    re-requested on every call. Concurrent misses for the same city share
+    a single in-flight fetch.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 512,
+        refresh_seconds: float = 600,
+        min_ttl_seconds: float = 60
+    ):
+        self.max_entries = max(0, max_entries)
+        self.refresh_seconds = refresh_seconds
+        self.min_ttl_seconds = min_ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[WeatherData, float]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    def _expires_at(self, weather_data: WeatherData) -> float:
+        observed_at = weather_data.timestamp.timestamp()
+        return max(observed_at + self.refresh_seconds, time.time() + self.min_ttl_seconds)
+
+    def get(self, city: str) -> Optional[WeatherData]:
+        """
+        Return a fresh cached observation for a city, or None
+
+        Does not touch the hit/miss counters; use lookup or get_or_fetch for that.
+        """
+        key = normalize_city(city)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        weather_data, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return weather_data
+
+    def lookup(self, city: str) -> Optional[WeatherData]:
+        """Like get, but counted as a cache hit or miss"""
+        weather_data = self.get(city)
+        if weather_data is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return weather_data
+
+    def put(self, city: str, weather_data: WeatherData):
+        """Store an observation, evicting the least recently used entries"""
+        if self.max_entries == 0:
+            return
+        key = normalize_city(city)
+        self._entries[key] = (weather_data, self._expires_at(weather_data))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_fetch(
+        self,
+        city: str,
+        fetch: Callable[[], Awaitable[Optional[WeatherData]]]
+    ) -> Optional[WeatherData]:
+        """
+        Return the cached observation for a city or fetch it once
+
+        Args:
+            city: City name
+            fetch: Coroutine factory performing the upstream request
+
+        Returns:
+            WeatherData object or None if the fetch failed
+        """
+        cached = self.get(city)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        key = normalize_city(city)
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                # The leader was cancelled, not us: fetch on our own behalf
+                if inflight.cancelled() and not asyncio.current_task().cancelling():
+                    return await self.get_or_fetch(city, fetch)
+                raise
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            weather_data = await fetch()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an unobserved failure is not logged as lost
+            future.exception()
+            raise
+        else:
+            if weather_data is not None:
+                self.put(city, weather_data)
+            future.set_result(weather_data)
+            return weather_data
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self) -> dict:
+        """Cache counters for monitoring"""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "inflight": len(self._inflight),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+            "hit_ratio": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0
+        }
+
+
+# Shared cache instance so the scheduler, backfill and agent reuse each other's fetches
+weather_response_cache = WeatherResponseCache(
+    max_entries=settings.WEATHER_CACHE_MAX_ENTRIES,
+    refresh_seconds=settings.WEATHER_CACHE_REFRESH_SECONDS,
+    min_ttl_seconds=settings.WEATHER_CACHE_MIN_TTL_SECONDS
+)
@@ -0,0 +1,172 @@
+"""Write generations shared between processes, so every process can drop what another one wrote"""
+import asyncio
+import logging
+import sqlite3
+from pathlib import Path
+from typing import Awaitable, Callable, Iterable, List, Optional
+from app.config import settings
+from app.services.leader import default_holder_id
+
+logger = logging.getLogger(__name__)
+
+WRITE_GENERATIONS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS write_generations (
+  scope TEXT PRIMARY KEY,  -- normalized city key, or ROLLUPS_SCOPE
+  generation INTEGER NOT NULL,
+  writer TEXT NOT NULL
+)
+"""
+
+# Scope published after a rollup refresh; rollups aren't invalidated per city
+ROLLUPS_SCOPE = "*rollups"
+
+
+class SharedWriteGenerations:
+    """
+    Per-city write generations in a SQLite file, polled by readers
+
+    LatestObservationStore and the result cache are per process, and
+    only the process that ran a write invalidates its own copies. The
+    writer publishes the city keys it stored to this table (one row per
+    city, stamped with a rising generation and its own ID); every process
+    polls for rows newer than the last generation it saw that another
+    process wrote, and hands those city keys to `on_remote_writes`. A
+    standby API worker, or an API whose ingestion runs in
+    `python -m app.worker`, then re-reads a city within `poll_seconds` of
+    it being written rather than once its cached copy ages out.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        holder_id: str,
+        poll_seconds: float,
+        on_remote_writes: Optional[Callable[[List[str]], Awaitable[None]]] = None
+    ):
+        self.path = path
+        self.holder_id = holder_id
+        self.poll_seconds = poll_seconds
+        self.on_remote_writes = on_remote_writes
+        self.seen_generation: Optional[int] = None
+        self.published = 0
+        self.remote_writes = 0
+        self.errors = 0
+        self._task: Optional[asyncio.Task] = None
+        if path != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=30.0, isolation_level=None)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute(WRITE_GENERATIONS_SCHEMA)
+        return connection
+
+    def publish(self, scopes: Iterable[str]) -> int:
+        """
+        Record that this process wrote `scopes` (city keys or ROLLUPS_SCOPE)
+
+        Returns:
+            The generation stamped on them
+        """
+        scopes = sorted(set(scopes))
+        connection = self._connect()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            generation = connection.execute(
+                "SELECT COALESCE(MAX(generation), 0) + 1 FROM write_generations"
+            ).fetchone()[0]
+            connection.executemany(
+                """
+                INSERT INTO write_generations (scope, generation, writer) VALUES (?, ?, ?)
+                ON CONFLICT (scope) DO UPDATE SET
+                  generation = excluded.generation,
+                  writer = excluded.writer
+                """,
+                [(scope, generation, self.holder_id) for scope in scopes]
+            )
+            connection.execute("COMMIT")
+        finally:
+            connection.close()
+        self.published += 1
+        return generation
+
+    def remote_changes(self) -> List[str]:
+        """
+        Scopes written by other processes since the last call
+
+        The first call only records the current generation: everything
+        before it was written before this process read anything.
+        """
+        connection = self._connect()
+        try:
+            if self.seen_generation is None:
+                self.seen_generation = connection.execute(
+                    "SELECT COALESCE(MAX(generation), 0) FROM write_generations"
+                ).fetchone()[0]
+                return []
+            rows = connection.execute(
+                "SELECT scope, generation, writer FROM write_generations WHERE generation > ?",
+                (self.seen_generation,)
+            ).fetchall()
+        finally:
+            connection.close()
+        if rows:
+            self.seen_generation = max(generation for _, generation, _ in rows)
+        return [scope for scope, _, writer in rows if writer != self.holder_id]
+
+    def start(self):
+        """Start polling for other processes' writes in the background"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop polling"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def poll(self):
+        """Hand scopes written elsewhere since the last poll to `on_remote_writes`"""
+        scopes = await asyncio.to_thread(self.remote_changes)
+        if scopes and self.on_remote_writes is not None:
+            self.remote_writes += len(scopes)
+            await self.on_remote_writes(scopes)
+
+    async def _run(self):
+        while True:
+            try:
+                await self.poll()
+            except Exception as e:
+                # Caches still expire on their own max age
+                self.errors += 1
+                logger.error(f"Failed to poll shared write generations: {str(e)}")
+            await asyncio.sleep(self.poll_seconds)
+
+    def stats(self) -> dict:
+        """Publish and poll counters for monitoring"""
+        return {
+            "holder_id": self.holder_id,
+            "seen_generation": self.seen_generation,
+            "poll_seconds": self.poll_seconds,
+            "published": self.published,
+            "remote_writes": self.remote_writes,
+            "errors": self.errors
+        }
+
+
+def create_write_generations(
+    on_remote_writes: Optional[Callable[[List[str]], Awaitable[None]]] = None
+) -> Optional[SharedWriteGenerations]:
+    """Build the shared write generations configured by SHARED_INVALIDATION_ENABLED, or None"""
+    if not settings.SHARED_INVALIDATION_ENABLED:
+        return None
+    return SharedWriteGenerations(
+        settings.SCHEDULER_LEASE_PATH,
+        holder_id=default_holder_id(),
+        poll_seconds=settings.SHARED_INVALIDATION_POLL_SECONDS,
+        on_remote_writes=on_remote_writes
+    )
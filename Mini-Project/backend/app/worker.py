@@ -0,0 +1,132 @@
+"""Standalone ingest worker: runs WeatherScheduler without the API
+
+Usage:
+    python -m app.worker
+
+Pair it with API processes started with EMBEDDED_SCHEDULER_ENABLED=false,
+so API restarts and scale-out never pause or duplicate ingestion. The
+worker serves its own /health and /stats on WORKER_METRICS_PORT.
+"""
+import asyncio
+import logging
+import signal
+import sys
+from typing import Optional
+import uvicorn
+from fastapi import FastAPI
+from app.config import settings
+from app.repositories import create_repository
+from app.scheduler import WeatherScheduler
+from app.services.latest_store import LatestObservationStore
+from app.services.spool import create_spool
+from app.services.weather_api import WeatherAPIClient
+from app.services.write_generations import create_write_generations
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+logger = logging.getLogger(__name__)
+
+
+def create_metrics_app(
+    weather_scheduler: WeatherScheduler,
+    weather_client: WeatherAPIClient,
+    repository
+) -> FastAPI:
+    """Minimal app exposing the worker's health and ingestion counters"""
+    metrics_app = FastAPI(title="Weather Ingest Worker", docs_url=None, redoc_url=None)
+
+    @metrics_app.get("/health")
+    async def health_check():
+        return {"status": "healthy", "scheduler": "running" if weather_scheduler.scheduler.running else "standby"}
+
+    @metrics_app.get("/stats")
+    async def worker_stats():
+        flusher = weather_scheduler.flusher
+        return {
+            "last_fetch_run": weather_client.last_run_report,
+            "fetch_totals": weather_client.total_stats.as_dict(),
+            "scheduler": weather_scheduler.stats(),
+            "spool": flusher.stats() if flusher else None,
+            "shared_invalidation": generations.stats() if (generations := weather_scheduler.write_generations) else None,
+            "repository": repository.stats()
+        }
+
+    return metrics_app
+
+
+async def serve_metrics(server: uvicorn.Server):
+    """
+    Serve the metrics app, carrying on without it if the port can't be bound
+
+    Several workers on one host all default to WORKER_METRICS_PORT, and
+    uvicorn exits the process when the port is taken. Losing /stats is
+    better than losing a worker, so only the first one serves metrics
+    unless each gets its own port.
+    """
+    try:
+        await server.serve()
+    except (OSError, SystemExit):
+        logger.error(
+            f"Worker metrics disabled: could not serve on {server.config.host}:{server.config.port}; "
+            "set a distinct WORKER_METRICS_PORT per worker"
+        )
+
+
+async def run_worker(stop: Optional[asyncio.Event] = None):
+    """
+    Run the scheduler until `stop` is set (by default on SIGINT or SIGTERM)
+
+    Leader election and sharding apply as they do inside the API, so
+    several workers can run side by side.
+    """
+    loop = asyncio.get_running_loop()
+    if stop is None:
+        stop = asyncio.Event()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(signum, lambda *_: loop.call_soon_threadsafe(stop.set))
+
+    logger.info("Starting weather ingest worker")
+    repository = create_repository()
+    weather_client = WeatherAPIClient()
+    latest_store = LatestObservationStore(max_age_seconds=settings.LATEST_STORE_MAX_AGE_SECONDS)
+    # Publishes this worker's writes so the API processes drop their cached reads
+    weather_scheduler = WeatherScheduler(
+        repository, weather_client, latest_store, create_spool(), create_write_generations()
+    )
+
+    server = None
+    server_task = None
+    try:
+        await weather_scheduler.start()
+
+        if settings.WORKER_METRICS_PORT:
+            server = uvicorn.Server(uvicorn.Config(
+                create_metrics_app(weather_scheduler, weather_client, repository),
+                host=settings.WORKER_METRICS_HOST,
+                port=settings.WORKER_METRICS_PORT,
+                log_config=None,
+                access_log=False
+            ))
+            # uvicorn captures SIGINT/SIGTERM while serving and re-raises them on exit,
+            # so the handlers above still set `stop`
+            server_task = asyncio.create_task(serve_metrics(server))
+
+        await stop.wait()
+    finally:
+        logger.info("Stopping weather ingest worker")
+        if server is not None:
+            server.should_exit = True
+            await server_task
+        await weather_scheduler.shutdown()
+        await weather_client.aclose()
+        await repository.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(run_worker())
@@ -0,0 +1,149 @@
+"""
+Benchmark adaptive per-city polling against the fixed hourly schedule
+
+Simulates `--hours` of weather for `--cities` cities with no network:
+a `--volatile` fraction of them follows a fast random walk (fronts,
+gusts, condition flips), the rest barely moves. Upstream publishes a new
+observation every 10 minutes. Each minute, the fixed mode polls every
+city once per UPDATE_INTERVAL_HOURS and the adaptive mode polls what
+AdaptivePollPlanner says is due.
+
+Reports polls per hour and the time-averaged error of the stored
+observation against upstream (change units as scored by change_score,
+and temperature in C), split into volatile and flat cities.
+
+Run from the backend directory:
+    python -m benchmarks.bench_adaptive_polling --cities 145 --hours 48
+"""
+import argparse
+import os
+import random
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("OPENWEATHER_API_KEY", "benchmark")
+
+from app.config import settings  # noqa: E402
+from app.models import WeatherData  # noqa: E402
+from app.services.adaptive_polling import AdaptivePollPlanner, change_score  # noqa: E402
+
+CONDITIONS = ["clear sky", "few clouds", "broken clouds", "light rain", "moderate rain", "thunderstorm"]
+PUBLISH_MINUTES = 10
+
+
+class SimulatedCity:
+    """Random-walk weather for one city, published every PUBLISH_MINUTES"""
+
+    def __init__(self, name: str, volatile: bool, rng: random.Random, start: datetime):
+        self.name = name
+        self.volatile = volatile
+        self.rng = rng
+        self.temperature = rng.uniform(-5, 30)
+        self.humidity = rng.randint(30, 90)
+        self.wind_speed = rng.uniform(0, 8)
+        self.condition = rng.randrange(len(CONDITIONS))
+        self.observation = self._observe(start)
+
+    def _observe(self, timestamp: datetime) -> WeatherData:
+        return WeatherData(
+            city=self.name,
+            timestamp=timestamp,
+            temperature=round(self.temperature, 2),
+            humidity=self.humidity,
+            wind_speed=round(self.wind_speed, 2),
+            condition=CONDITIONS[self.condition]
+        )
+
+    def publish(self, timestamp: datetime):
+        scale = 1.0 if self.volatile else 0.05
+        self.temperature += self.rng.gauss(0, 0.8 * scale)
+        self.humidity = min(100, max(5, round(self.humidity + self.rng.gauss(0, 3 * scale))))
+        self.wind_speed = max(0.0, self.wind_speed + self.rng.gauss(0, 0.8 * scale))
+        if self.rng.random() < 0.15 * scale:
+            self.condition = min(len(CONDITIONS) - 1, max(0, self.condition + self.rng.choice((-1, 1))))
+        self.observation = self._observe(timestamp)
+
+
+def simulate(args, adaptive: bool) -> dict:
+    rng = random.Random(args.seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    volatile_count = round(args.cities * args.volatile)
+    cities = [
+        SimulatedCity(f"City {index}", index < volatile_count, rng, start)
+        for index in range(args.cities)
+    ]
+    by_name = {city.name: city for city in cities}
+    names = list(by_name)
+
+    planner = AdaptivePollPlanner(
+        min_interval_seconds=settings.ADAPTIVE_POLL_MIN_INTERVAL_MINUTES * 60,
+        max_interval_seconds=settings.ADAPTIVE_POLL_MAX_INTERVAL_MINUTES * 60,
+        default_interval_seconds=settings.UPDATE_INTERVAL_HOURS * 3600,
+        change_per_poll=args.change_per_poll,
+        max_polls_per_hour=args.budget
+    )
+    stored = {}
+    polls = 0
+    errors = {True: [0.0, 0.0, 0], False: [0.0, 0.0, 0]}  # volatile -> [units, temperature, samples]
+    fixed_every = settings.UPDATE_INTERVAL_HOURS * 60
+
+    for minute in range(args.hours * 60):
+        now = start + timedelta(minutes=minute)
+        if minute and minute % PUBLISH_MINUTES == 0:
+            for city in cities:
+                city.publish(now)
+
+        if adaptive:
+            due = planner.due(names, now=minute * 60.0)
+        else:
+            due = names if minute % fixed_every == 0 else []
+        for name in due:
+            observation = by_name[name].observation
+            stored[name] = observation
+            polls += 1
+            if adaptive:
+                planner.record(name, observation, now=minute * 60.0)
+
+        for city in cities:
+            error = errors[city.volatile]
+            error[0] += change_score(stored[city.name], city.observation)
+            error[1] += abs(stored[city.name].temperature - city.observation.temperature)
+            error[2] += 1
+
+    return {
+        "polls_per_hour": polls / args.hours,
+        "volatile": errors[True],
+        "flat": errors[False],
+        "stats": planner.stats(now=args.hours * 3600.0) if adaptive else None
+    }
+
+
+def mean(error) -> str:
+    units, temperature, samples = error
+    if not samples:
+        return "      n/a"
+    return f"{units / samples:5.2f}u {temperature / samples:4.2f}C"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cities", type=int, default=145)
+    parser.add_argument("--hours", type=int, default=48)
+    parser.add_argument("--volatile", type=float, default=0.2, help="Fraction of cities with fast-changing weather")
+    parser.add_argument("--change-per-poll", type=float, default=settings.ADAPTIVE_POLL_CHANGE_PER_POLL)
+    parser.add_argument("--budget", type=float, default=settings.ADAPTIVE_POLL_MAX_POLLS_PER_HOUR,
+                        help="Max city polls per hour in adaptive mode")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    print(f"{'mode':10s} {'polls/h':>8s}   {'volatile error':>14s}   {'flat error':>14s}")
+    for label, adaptive in (("fixed", False), ("adaptive", True)):
+        result = simulate(args, adaptive)
+        print(f"{label:10s} {result['polls_per_hour']:8.1f}   {mean(result['volatile']):>14s}   {mean(result['flat']):>14s}")
+        if result["stats"]:
+            stats = result["stats"]
+            print(f"{'':10s} intervals {stats['min_interval_minutes']}-{stats['max_interval_minutes']} min, "
+                  f"budget scale {stats['budget_scale']}, planned {stats['planned_polls_per_hour']} polls/h")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark API cold start with and without the embedded scheduler
+
+Spawns `uvicorn app.main:app` on the sqlite backend and times how long
+after process start the first `GET /health` returns 200, against the
+time to just import `app.main` (route import time, the lower bound).
+With the embedded scheduler it also reports when `/stats` first shows the
+scheduler's jobs, i.e. how much start-up work now runs after the API is
+already serving. OpenWeatherMap calls go to an unreachable address, so no
+quota is used.
+
+Run from the backend directory:
+    python -m benchmarks.bench_api_cold_start --runs 5
+"""
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def base_env(directory: str) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "OPENWEATHER_API_KEY": "benchmark",
+        "OPENWEATHER_BASE_URL": "http://127.0.0.1:9",
+        "STORAGE_BACKEND": "sqlite",
+        "SQLITE_PATH": os.path.join(directory, "weather.db"),
+        "SCHEDULER_LEASE_PATH": os.path.join(directory, "lease.db"),
+        "BACKFILL_CHECKPOINT_PATH": os.path.join(directory, "checkpoint.json"),
+        "SPOOL_DIR": os.path.join(directory, "spool"),
+        "CITY_ID_CACHE_PATH": os.path.join(directory, "city_ids.json"),
+    })
+    return env
+
+
+def time_import(env: dict) -> float:
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import app.main"], env=env, check=True, capture_output=True)
+    return time.perf_counter() - start
+
+
+def time_startup(env: dict, embedded: bool, timeout: float) -> tuple[float, float | None]:
+    """Seconds from spawn to the first /health 200, and to scheduler jobs appearing"""
+    port = free_port()
+    env = {**env, "EMBEDDED_SCHEDULER_ENABLED": "true" if embedded else "false"}
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    healthy = None
+    scheduled = None
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=1.0) as client:
+            while time.perf_counter() - start < timeout:
+                try:
+                    if healthy is None and client.get("/health").status_code == 200:
+                        healthy = time.perf_counter() - start
+                    if healthy is not None:
+                        if not embedded:
+                            break
+                        scheduler = client.get("/stats").json()["scheduler"]
+                        if scheduler and scheduler["jobs"]:
+                            scheduled = time.perf_counter() - start
+                            break
+                except httpx.TransportError:
+                    pass
+                time.sleep(0.005)
+    finally:
+        process.terminate()
+        process.wait()
+    if healthy is None:
+        raise RuntimeError(f"API did not become healthy within {timeout}s")
+    return healthy, scheduled
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        env = base_env(directory)
+        imports = [time_import(env) for _ in range(args.runs)]
+        print(f"import app.main:                   {statistics.median(imports) * 1000:8.0f} ms")
+
+        for embedded in (True, False):
+            results = [time_startup(env, embedded, args.timeout) for _ in range(args.runs)]
+            label = "embedded scheduler" if embedded else "EMBEDDED_SCHEDULER_ENABLED=false"
+            print(f"{label:34s} first /health {statistics.median(r[0] for r in results) * 1000:8.0f} ms", end="")
+            if embedded:
+                print(f"   jobs scheduled {statistics.median(r[1] for r in results) * 1000:8.0f} ms")
+            else:
+                print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Benchmark backfill generation: per-row WeatherData loop vs NumPy column batches
+
+Both paths generate the same number of synthetic hourly rows and convert
+every batch into the JSON rows a load job would upload; the load itself
+is replaced by a sink that discards the rows. Each path runs in its own
+subprocess so peak RSS (ru_maxrss) is measured independently.
+
+Run from the backend directory:
+    python -m benchmarks.bench_backfill --days 90 365 --cities 50
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("OPENWEATHER_API_KEY", "benchmark")
+
+from app.models import WeatherData, normalize_city  # noqa: E402
+from app.services.backfill import generate_backfill_batches  # noqa: E402
+
+
+def baselines(city_count: int) -> list[WeatherData]:
+    now = datetime.now(timezone.utc)
+    return [
+        WeatherData(
+            city=f"City {i}",
+            timestamp=now,
+            temperature=10 + i % 15,
+            humidity=40 + i % 50,
+            wind_speed=2.5 + i % 5,
+            condition="Clouds"
+        )
+        for i in range(city_count)
+    ]
+
+
+def legacy_rows(records: list[WeatherData]) -> list[dict]:
+    """Row conversion as done by insert_weather_data"""
+    return [
+        {
+            "id": record.id,
+            "city": record.city,
+            "city_key": normalize_city(record.city),
+            "timestamp": record.timestamp.isoformat(),
+            "temperature": record.temperature,
+            "humidity": record.humidity,
+            "wind_speed": record.wind_speed,
+            "condition": record.condition
+        }
+        for record in records
+    ]
+
+
+def run_legacy(base: list[WeatherData], start_time: datetime, end_time: datetime) -> int:
+    """Previous scheduler loop: one WeatherData per city-hour, 1,000-row batches"""
+    city_weather_map = {record.city: record for record in base}
+    all_historical_records = []
+    current_time = start_time
+    rows = 0
+    while current_time <= end_time:
+        for city, base_weather in city_weather_map.items():
+            all_historical_records.append(WeatherData(
+                city=city,
+                timestamp=current_time,
+                temperature=round(base_weather.temperature + ((hash(str(current_time)) % 10) - 5), 2),
+                humidity=max(0, min(100, base_weather.humidity + ((hash(str(current_time)) % 20) - 10))),
+                wind_speed=round(max(0, base_weather.wind_speed + ((hash(str(current_time)) % 6) - 3)), 2),
+                condition=base_weather.condition
+            ))
+        if len(all_historical_records) >= 1000:
+            rows += len(legacy_rows(all_historical_records))
+            all_historical_records = []
+        current_time += timedelta(hours=1)
+    if all_historical_records:
+        rows += len(legacy_rows(all_historical_records))
+    return rows
+
+
+def run_columnar(base: list[WeatherData], start_time: datetime, end_time: datetime, batch_rows: int) -> int:
+    rows = 0
+    for batch in generate_backfill_batches(base, start_time, end_time, batch_rows):
+        rows += len(batch.to_rows())
+    return rows
+
+
+def worker(args) -> dict:
+    base = baselines(args.cities)
+    end_time = datetime.now(timezone.utc)
+    start_time = end_time - timedelta(days=args.days[0])
+    rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    started = time.perf_counter()
+    if args.worker == "legacy":
+        rows = run_legacy(base, start_time, end_time)
+    else:
+        rows = run_columnar(base, start_time, end_time, args.batch_rows)
+    elapsed = time.perf_counter() - started
+    rss_after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        "rows": rows,
+        "seconds": elapsed,
+        "peak_rss_mib": rss_after / 1024,
+        "rss_growth_mib": (rss_after - rss_before) / 1024
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--days", type=int, nargs="+", default=[90, 365])
+    parser.add_argument("--cities", type=int, default=50)
+    parser.add_argument("--batch-rows", type=int, default=10000)
+    parser.add_argument("--worker", choices=["legacy", "columnar"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(worker(args)))
+        return
+
+    for days in args.days:
+        for mode in ("legacy", "columnar"):
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_backfill", "--worker", mode,
+                 "--days", str(days), "--cities", str(args.cities),
+                 "--batch-rows", str(args.batch_rows)],
+                check=True, capture_output=True, text=True
+            ).stdout
+            result = json.loads(output)
+            print(f"{days:>4} days x {args.cities} cities {mode:>8}: {result['rows']:>9} rows "
+                  f"{result['rows'] / result['seconds']:>10,.0f} rows/s  "
+                  f"peak RSS {result['peak_rss_mib']:6.1f}MiB (+{result['rss_growth_mib']:.1f})")
+
+
+if __name__ == "__main__":
+    main()
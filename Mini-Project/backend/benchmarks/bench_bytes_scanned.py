@@ -0,0 +1,95 @@
+"""
+Report bytes scanned per query for the legacy and partitioned layouts
+
+Runs each query shape as a BigQuery dry run (free) and prints the bytes
+it would process. "legacy" is the previous query form: LOWER(city)
+filters with no partition bound, which defeats clustering. "current" is
+the city_key filter with a partition-pruning timestamp bound.
+
+Dry runs report the partition-pruned upper bound; pass --execute to run
+the queries for real with the cache disabled and report bytes billed,
+which also reflects cluster pruning. Requires GCP credentials.
+
+Run from the backend directory:
+    python -m benchmarks.bench_bytes_scanned --city London [--legacy-table PROJECT.DATASET.TABLE]
+"""
+import argparse
+import os
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("OPENWEATHER_API_KEY", "benchmark")
+
+from google.cloud import bigquery  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.models import normalize_city  # noqa: E402
+
+
+def legacy_queries(table: str) -> dict:
+    return {
+        "latest": f"""
+            SELECT * FROM `{table}`
+            WHERE LOWER(city) = LOWER(@city)
+            ORDER BY timestamp DESC LIMIT 1""",
+        "history": f"""
+            SELECT * FROM `{table}`
+            WHERE LOWER(city) = LOWER(@city) AND timestamp >= @start_date
+            ORDER BY timestamp DESC""",
+    }
+
+
+def current_queries(table: str) -> dict:
+    return {
+        "latest": f"""
+            SELECT * FROM `{table}`
+            WHERE city_key = @city_key AND timestamp >= @since
+            ORDER BY timestamp DESC LIMIT 1""",
+        "history": f"""
+            SELECT * FROM `{table}`
+            WHERE city_key = @city_key AND timestamp >= @start_date
+            ORDER BY timestamp DESC""",
+    }
+
+
+def bytes_processed(client: bigquery.Client, query: str, params: list, execute: bool) -> int:
+    job_config = bigquery.QueryJobConfig(
+        query_parameters=[param for param in params if f"@{param.name}" in query],
+        dry_run=not execute,
+        use_query_cache=False
+    )
+    job = client.query(query, job_config=job_config)
+    if not execute:
+        return job.total_bytes_processed
+    job.result()
+    return job.total_bytes_billed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--city", default="London")
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--legacy-table", help="Legacy table (defaults to the current table)")
+    parser.add_argument("--execute", action="store_true", help="Run queries and report bytes billed")
+    args = parser.parse_args()
+
+    table = f"{settings.GCP_PROJECT_ID}.{settings.BIGQUERY_DATASET}.{settings.BIGQUERY_TABLE}"
+    legacy_table = args.legacy_table or table
+    now = datetime.now(timezone.utc)
+    params = [
+        bigquery.ScalarQueryParameter("city", "STRING", args.city),
+        bigquery.ScalarQueryParameter("city_key", "STRING", normalize_city(args.city)),
+        bigquery.ScalarQueryParameter("start_date", "TIMESTAMP", now - timedelta(days=args.days)),
+        bigquery.ScalarQueryParameter(
+            "since", "TIMESTAMP", now - timedelta(days=settings.LATEST_LOOKBACK_DAYS)
+        ),
+    ]
+
+    client = bigquery.Client(project=settings.GCP_PROJECT_ID)
+    legacy, current = legacy_queries(legacy_table), current_queries(table)
+    for name in legacy:
+        before = bytes_processed(client, legacy[name], params, args.execute)
+        after = bytes_processed(client, current[name], params, args.execute)
+        print(f"{name:>8}: legacy {before / 1e6:.2f} MB -> current {after / 1e6:.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Benchmark response size and server time for weather polls
+
+Serves the weather routes from an in-process app backed by a temporary
+sqlite database (default 100 cities x 30 days) and a warmed latest store,
+with the same GZip middleware as app.main. For each endpoint it times
+sequential requests over an in-memory ASGI transport and reports bytes on
+the wire for:
+  - plain: no Accept-Encoding, no validators (the previous behaviour)
+  - gzip: Accept-Encoding: gzip, at HTTP_GZIP_LEVEL and at level 9
+  - revalidate: gzip plus If-None-Match from the previous response (304)
+
+Run from the backend directory:
+    python -m benchmarks.bench_conditional_requests --cities 100 --days 30
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("OPENWEATHER_API_KEY", "benchmark")
+
+import httpx  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+from fastapi.middleware.gzip import GZipMiddleware  # noqa: E402
+
+from app.config import settings  # noqa: E402
+from app.models import WeatherData  # noqa: E402
+from app.repositories import create_repository  # noqa: E402
+from app.routes.weather import router as weather_router  # noqa: E402
+from app.services.backfill import generate_backfill_batches  # noqa: E402
+from app.services.latest_store import LatestObservationStore  # noqa: E402
+
+ENDPOINTS = [
+    "/weather/latest/City 7",
+    "/weather/latest",
+    "/weather/history/City 7?days=7",
+    "/weather/history/City 7?days=30&resolution=hourly",
+]
+
+
+def build_app(repository, latest_store, compresslevel: int) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(GZipMiddleware, minimum_size=settings.HTTP_GZIP_MINIMUM_BYTES, compresslevel=compresslevel)
+    app.include_router(weather_router)
+    app.state.repository = repository
+    app.state.latest_store = latest_store
+    return app
+
+
+async def poll(app: FastAPI, path: str, headers: dict, repeat: int) -> tuple[float, int, int]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            response = await client.get(path, headers=headers)
+            samples.append(time.perf_counter() - start)
+        # Body bytes as sent, before httpx decodes the content encoding
+        return statistics.median(samples), response.status_code, response.num_bytes_downloaded
+
+
+async def run(args):
+    repository = create_repository("sqlite")
+    await repository.initialize_schema()
+    end_time = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    baselines = [
+        WeatherData(city=f"City {i}", timestamp=end_time, temperature=10 + i % 15,
+                    humidity=40 + i % 50, wind_speed=2.5 + i % 5, condition="Clouds")
+        for i in range(args.cities)
+    ]
+    start_time = end_time - timedelta(days=args.days)
+    for batch in generate_backfill_batches(baselines, start_time, end_time, settings.BACKFILL_BATCH_ROWS):
+        await repository.insert_weather_batch(batch)
+    await repository.refresh_rollups(start_time)
+
+    latest_store = LatestObservationStore(max_age_seconds=3600)
+    await latest_store.warm(repository)
+    default_app = build_app(repository, latest_store, settings.HTTP_GZIP_LEVEL)
+    level9_app = build_app(repository, latest_store, 9)
+
+    for path in ENDPOINTS:
+        transport = httpx.ASGITransport(app=default_app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            etag = (await client.get(path)).headers.get("etag")
+        cases = [
+            ("plain", default_app, {"Accept-Encoding": "identity", "Cache-Control": "no-cache"}),
+            (f"gzip-{settings.HTTP_GZIP_LEVEL}", default_app, {"Accept-Encoding": "gzip"}),
+            ("gzip-9", level9_app, {"Accept-Encoding": "gzip"}),
+            ("revalidate", default_app, {"Accept-Encoding": "gzip", "If-None-Match": etag or ""}),
+        ]
+        print(path)
+        for name, app, headers in cases:
+            median, status, size = await poll(app, path, headers, args.repeat)
+            print(f"  {name:>11}: {status}  {size:>9} bytes  median {median * 1000:8.3f}ms")
+
+    await repository.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cities", type=int, default=100)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        settings.SQLITE_PATH = os.path.join(directory, "weather.db")
+        # Measure the HTTP layer, not the repository result cache
+        settings.RESULT_CACHE_MAX_BYTES = 0
+        asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
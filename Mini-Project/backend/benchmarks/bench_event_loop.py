@@ -0,0 +1,111 @@
+"""
+Benchmark /health latency while slow BigQuery queries are in flight
+
+Compares the previous behaviour (synchronous client calls made inline on
+the event loop) against BigQueryRepository's thread-pool offloading.
+A stand-in client sleeps for --query-seconds per query so no GCP project
+is needed.
+
+Run from the backend directory:
+    python -m benchmarks.bench_event_loop --query-seconds 1 --queries 8
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+import httpx
+
+os.environ.setdefault("OPENWEATHER_API_KEY", "benchmark")
+
+from fastapi import FastAPI  # noqa: E402
+from benchmarks.mock_openweather import MockServer  # noqa: E402
+from app.repositories.bigquery_repo import BigQueryRepository  # noqa: E402
+
+
+class SlowJob:
+    """Query job stand-in whose result() blocks like a real round trip"""
+
+    job_id = "benchmark-job"
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    def result(self, timeout=None):
+        time.sleep(self.seconds)
+        return []
+
+    def cancel(self):
+        return True
+
+
+class SlowClient:
+    """Synchronous client stand-in returning SlowJob for every query"""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+
+    def query(self, query, job_config=None):
+        return SlowJob(self.seconds)
+
+    def close(self):
+        pass
+
+
+def create_app(query_seconds: float) -> FastAPI:
+    app = FastAPI()
+    client = SlowClient(query_seconds)
+    repository = BigQueryRepository(client=client)
+
+    @app.get("/health")
+    async def health():
+        return {"status": "healthy"}
+
+    @app.get("/latest-inline/{city}")
+    async def latest_inline(city: str):
+        # What the repository did before: block the loop on .result()
+        list(client.query("SELECT 1").result())
+        return None
+
+    @app.get("/latest/{city}")
+    async def latest(city: str):
+        return await repository.get_latest_weather(city)
+
+    return app
+
+
+async def measure(base_url: str, path: str, queries: int, duration: float) -> list[float]:
+    """Fire `queries` slow requests and probe /health until they all finish"""
+    latencies = []
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as http:
+        slow = [asyncio.create_task(http.get(f"{path}/City{i}")) for i in range(queries)]
+        await asyncio.sleep(0.05)
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline or not all(task.done() for task in slow):
+            start = time.perf_counter()
+            await http.get("/health")
+            latencies.append((time.perf_counter() - start) * 1000)
+            await asyncio.sleep(0.01)
+        await asyncio.gather(*slow)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--query-seconds", type=float, default=1.0)
+    parser.add_argument("--queries", type=int, default=8)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    with MockServer(create_app(args.query_seconds), port=args.port) as server:
+        for label, path in (("inline", "/latest-inline"), ("thread pool", "/latest")):
+            latencies = sorted(asyncio.run(
+                measure(server.base_url, path, args.queries, args.query_seconds)
+            ))
+            p99 = latencies[int(len(latencies) * 0.99) - 1]
+            print(f"{label:>12}: /health p50={statistics.median(latencies):.1f}ms "
+                  f"p99={p99:.1f}ms max={latencies[-1]:.1f}ms over {len(latencies)} probes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark sequential vs bounded-concurrency vs /group city fetches
+
+Run from the backend directory:
+    python -m benchmarks.bench_fetch_fanout --latency 0.1 --concurrency 10
+
+Pass --error-rate to inject 429/503 responses and check that retries
+recover every city. The first concurrent run resolves city IDs into a
+temporary cache; the grouped run then batches them 20 per request. The
+client's rate limit is lifted unless
+--calls-per-minute is given, so the numbers isolate fan-out speed.
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+os.environ.setdefault("OPENWEATHER_API_KEY", "benchmark")
+
+from benchmarks.mock_openweather import MockServer, create_mock_app  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.services.weather_api import WeatherAPIClient  # noqa: E402
+from app.services.weather_cache import WeatherResponseCache  # noqa: E402
+
+
+async def sequential_baseline(client: WeatherAPIClient, cities: list[str]) -> int:
+    """Previous behaviour: one fresh AsyncClient per city, awaited one by one"""
+    import httpx
+
+    fetched = 0
+    for city in cities:
+        await client.rate_limiter.acquire()
+        async with httpx.AsyncClient(timeout=client.timeout) as http:
+            response = await http.get(
+                f"{client.base_url}/weather",
+                params={"q": city, "appid": client.api_key, "units": "metric"}
+            )
+            response.raise_for_status()
+            client._normalize_weather_data(response.json())
+            fetched += 1
+    return fetched
+
+
+async def concurrent_fanout(client: WeatherAPIClient, cities: list[str]) -> int:
+    """Pooled, bounded-concurrency fan-out"""
+    try:
+        fetched = len(await client.fetch_multiple_cities(cities))
+        print(f"            run report: {client.last_run_report}")
+        return fetched
+    finally:
+        await client.aclose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--latency", type=float, default=0.05, help="Mock upstream latency (s)")
+    parser.add_argument("--concurrency", type=int, default=settings.WEATHER_API_MAX_CONCURRENCY)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of 429/503 replies")
+    parser.add_argument("--calls-per-minute", type=int, default=1_000_000)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    cities = settings.CITIES
+    settings.WEATHER_API_MAX_CONCURRENCY = args.concurrency
+    settings.OPENWEATHER_CALLS_PER_MINUTE = args.calls_per_minute
+    settings.OPENWEATHER_BURST = args.concurrency
+    settings.OPENWEATHER_BACKOFF_BASE_SECONDS = 0.1
+    settings.CITY_ID_CACHE_PATH = os.path.join(tempfile.mkdtemp(), "city_ids.json")
+
+    runners = [("concurrent", concurrent_fanout), ("grouped", concurrent_fanout)]
+    if args.error_rate == 0:
+        runners.insert(0, ("sequential", sequential_baseline))
+
+    mock_app = create_mock_app(args.latency, args.error_rate)
+    with MockServer(mock_app, port=args.port) as server:
+        settings.OPENWEATHER_BASE_URL = server.base_url
+
+        for label, runner in runners:
+            # Caching disabled so every run reaches the mock server
+            client = WeatherAPIClient(cache=WeatherResponseCache(max_entries=0))
+            requests_before = mock_app.state.request_count
+            start = time.perf_counter()
+            fetched = asyncio.run(runner(client, cities))
+            elapsed = time.perf_counter() - start
+            requests = mock_app.state.request_count - requests_before
+            print(f"{label:>10}: {fetched}/{len(cities)} cities in {elapsed:.2f}s "
+                  f"({fetched / elapsed:.1f} cities/s, {requests} requests)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Benchmark client-side cost of history statistics: Python loops vs SQL aggregates
+
+The agent's history tool used to receive every row for the period, build
+a WeatherData per row and compute avg/min/max in Python. It now receives
+one aggregate row with a 10-record sample. This script reproduces the
+client-side work of both paths from synthetic result rows at several
+history sizes and reports time and peak Python memory (tracemalloc).
+Network transfer and query time are not included.
+
+Run from the backend directory:
+    python -m benchmarks.bench_history_stats --sizes 72 168 720 1440 8760
+"""
+import argparse
+import os
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("OPENWEATHER_API_KEY", "benchmark")
+
+from app.models import WeatherData, WeatherStatistics  # noqa: E402
+
+
+def synthetic_rows(count: int) -> list[dict]:
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "id": f"row-{i}",
+            "city": "London",
+            "timestamp": now - timedelta(hours=i),
+            "temperature": 10 + i % 7,
+            "humidity": 50 + i % 30,
+            "wind_speed": 3.5,
+            "condition": "clear sky"
+        }
+        for i in range(count)
+    ]
+
+
+def python_path(rows: list[dict]) -> dict:
+    """Previous path: materialize every row, aggregate in Python"""
+    records = [WeatherData(**row) for row in rows]
+    temperatures = [w.temperature for w in records]
+    humidities = [w.humidity for w in records]
+    return {
+        "average_temperature": sum(temperatures) / len(temperatures),
+        "min_temperature": min(temperatures),
+        "max_temperature": max(temperatures),
+        "average_humidity": sum(humidities) / len(humidities),
+        "records": records[:10]
+    }
+
+
+def sql_path(aggregate_row: dict) -> WeatherStatistics:
+    """Current path: one aggregate row with a bounded sample"""
+    return WeatherStatistics(
+        city="London",
+        record_count=aggregate_row["record_count"],
+        average_temperature=aggregate_row["average_temperature"],
+        min_temperature=aggregate_row["min_temperature"],
+        max_temperature=aggregate_row["max_temperature"],
+        average_humidity=aggregate_row["average_humidity"],
+        recent_records=[WeatherData(**record) for record in aggregate_row["recent_records"]]
+    )
+
+
+def measure(func, arg, repeat: int) -> tuple[float, int]:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func(arg)
+    elapsed = (time.perf_counter() - start) / repeat
+    tracemalloc.start()
+    func(arg)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[72, 168, 720, 1440, 8760])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        rows = synthetic_rows(size)
+        aggregate_row = {
+            "record_count": size,
+            "average_temperature": 13.0,
+            "min_temperature": 10.0,
+            "max_temperature": 16.0,
+            "average_humidity": 64.5,
+            "recent_records": rows[:10]
+        }
+        old_time, old_peak = measure(python_path, rows, args.repeat)
+        new_time, new_peak = measure(sql_path, aggregate_row, args.repeat)
+        print(f"{size:>6} rows: python {old_time * 1000:8.2f}ms {old_peak / 1024:8.1f}KiB | "
+              f"sql aggregate {new_time * 1000:6.3f}ms {new_peak / 1024:6.1f}KiB")
+
+
+if __name__ == "__main__":
+    main()
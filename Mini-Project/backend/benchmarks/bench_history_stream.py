@@ -0,0 +1,143 @@
+"""
+Benchmark time to first byte and peak memory of history responses
+
+Fills a temporary sqlite database with one city observed every
+`--interval-minutes` over 60 days (86,400 rows at the default of 1 minute),
+then requests the full 60-day raw history from the weather routes served
+by an in-process uvicorn server on localhost as:
+  - json: one document built from the whole result list
+  - ndjson: rows streamed in HISTORY_STREAM_CHUNK_ROWS chunks
+  - pages: walking next_cursor with limit=HISTORY_PAGE_DEFAULT_ROWS
+Each mode is run once for timing and once under tracemalloc for the peak
+Python heap allocated while serving the request.
+
+Run from the backend directory:
+    python -m benchmarks.bench_history_stream --interval-minutes 1
+"""
+import argparse
+import asyncio
+import os
+import socket
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("OPENWEATHER_API_KEY", "benchmark")
+
+import httpx  # noqa: E402
+import uvicorn  # noqa: E402
+from fastapi import FastAPI  # noqa: E402
+
+from app.config import settings  # noqa: E402
+from app.models import WeatherData  # noqa: E402
+from app.repositories import create_repository  # noqa: E402
+from app.routes.weather import router as weather_router  # noqa: E402
+from app.services.latest_store import LatestObservationStore  # noqa: E402
+
+CITY = "Bench City"
+PATH = f"/weather/history/{CITY}"
+
+
+async def request_json(client: httpx.AsyncClient) -> tuple[float, int, int]:
+    async with client.stream("GET", PATH, params={"days": 60}) as response:
+        first_byte = None
+        size = 0
+        async for data in response.aiter_raw():
+            first_byte = first_byte or time.perf_counter()
+            size += len(data)
+    return first_byte, size, 1
+
+
+async def request_ndjson(client: httpx.AsyncClient) -> tuple[float, int, int]:
+    async with client.stream("GET", PATH, params={"days": 60, "format": "ndjson"}) as response:
+        first_byte = None
+        size = 0
+        async for data in response.aiter_raw():
+            first_byte = first_byte or time.perf_counter()
+            size += len(data)
+    return first_byte, size, 1
+
+
+async def request_pages(client: httpx.AsyncClient) -> tuple[float, int, int]:
+    first_byte = None
+    size = 0
+    pages = 0
+    params = {"days": 60, "limit": settings.HISTORY_PAGE_DEFAULT_ROWS}
+    while True:
+        response = await client.get(PATH, params=params)
+        first_byte = first_byte or time.perf_counter()
+        size += len(response.content)
+        pages += 1
+        next_cursor = response.json()["next_cursor"]
+        if not next_cursor:
+            return first_byte, size, pages
+        params["cursor"] = next_cursor
+
+
+async def run(args):
+    repository = create_repository("sqlite")
+    await repository.initialize_schema()
+    end_time = datetime.now(timezone.utc).replace(second=0, microsecond=0)
+    steps = 60 * 24 * 60 // args.interval_minutes
+    for offset in range(0, steps, 10000):
+        await repository.insert_weather_data([
+            WeatherData(
+                city=CITY,
+                timestamp=end_time - timedelta(minutes=step * args.interval_minutes),
+                temperature=10 + step % 15,
+                humidity=40 + step % 50,
+                wind_speed=2.5 + step % 5,
+                condition="Clouds"
+            )
+            for step in range(offset, min(steps, offset + 10000))
+        ])
+    print(f"loaded {steps} rows")
+
+    app = FastAPI()
+    app.include_router(weather_router)
+    app.state.repository = repository
+    app.state.latest_store = LatestObservationStore(max_age_seconds=3600)
+
+    # A real server: the in-memory ASGI transport buffers whole bodies
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=None) as client:
+        for name, call in {"json": request_json, "ndjson": request_ndjson, "pages": request_pages}.items():
+            start = time.perf_counter()
+            first_byte, size, requests = await call(client)
+            total = time.perf_counter() - start
+
+            tracemalloc.start()
+            await call(client)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+            print(f"{name:>7}: first byte {(first_byte - start) * 1000:8.1f}ms  total {total * 1000:8.1f}ms  "
+                  f"{size / 1024 / 1024:6.1f}MiB in {requests:>3} requests  peak heap {peak / 1024 / 1024:7.1f}MiB")
+
+    server.should_exit = True
+    await server_task
+    await repository.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--interval-minutes", type=int, default=1)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        settings.SQLITE_PATH = os.path.join(directory, "weather.db")
+        # Measure the response path, not the repository result cache
+        settings.RESULT_CACHE_MAX_BYTES = 0
+        asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""
+Benchmark the hourly update: fetch-all-then-insert vs the streaming pipeline
+
+Fetches `--cities` synthetic cities from the local mock OpenWeatherMap
+server and stores them through a simulated load job that takes
+`--job-seconds` plus `--record-ms` per record (a BigQuery load job's
+fixed overhead dominates). The sequential mode is the previous
+behaviour: one insert after every fetch has finished. The pipeline mode
+runs IngestPipeline with the configured queue and flush thresholds.
+
+Reports total run time against fetch time, write time and max(fetch,
+write), when the first records were stored, and the mean time from the
+start of the run until a record was stored (freshness).
+
+Run from the backend directory:
+    python -m benchmarks.bench_ingest_pipeline --cities 190 --latency 0.2 --job-seconds 2
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("OPENWEATHER_API_KEY", "benchmark")
+
+from benchmarks.mock_openweather import MockServer, create_mock_app  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.services.ingest_pipeline import IngestPipeline  # noqa: E402
+from app.services.weather_api import WeatherAPIClient  # noqa: E402
+from app.services.weather_cache import WeatherResponseCache  # noqa: E402
+
+
+class SimulatedLoadJob:
+    """Write sink with a fixed per-job cost; records when each record became durable"""
+
+    def __init__(self, job_seconds: float, record_ms: float):
+        self.job_seconds = job_seconds
+        self.record_seconds = record_ms / 1000
+        self.started = 0.0
+        self.stored_at = []
+        self.jobs = 0
+        self.busy_seconds = 0.0
+
+    async def write(self, records) -> int:
+        started = time.perf_counter()
+        await asyncio.sleep(self.job_seconds + self.record_seconds * len(records))
+        finished = time.perf_counter()
+        self.busy_seconds += finished - started
+        self.jobs += 1
+        self.stored_at.extend([finished - self.started] * len(records))
+        return len(records)
+
+
+async def run_sequential(client: WeatherAPIClient, sink: SimulatedLoadJob, cities: list[str]):
+    sink.started = time.perf_counter()
+    records = await client.fetch_multiple_cities(cities)
+    fetch_seconds = time.perf_counter() - sink.started
+    await sink.write(records)
+    return time.perf_counter() - sink.started, fetch_seconds
+
+
+async def run_pipeline(client: WeatherAPIClient, sink: SimulatedLoadJob, cities: list[str]):
+    sink.started = time.perf_counter()
+    pipeline = IngestPipeline(
+        sink.write,
+        queue_records=settings.INGEST_PIPELINE_QUEUE_RECORDS,
+        flush_records=settings.INGEST_PIPELINE_FLUSH_RECORDS,
+        flush_seconds=settings.INGEST_PIPELINE_FLUSH_SECONDS
+    )
+    await pipeline.run(client.iter_multiple_cities(cities))
+    return time.perf_counter() - sink.started, pipeline.fetch_seconds
+
+
+async def run(args, base_url: str):
+    settings.OPENWEATHER_BASE_URL = base_url
+    settings.WEATHER_API_MAX_CONCURRENCY = args.concurrency
+    settings.OPENWEATHER_BURST = args.concurrency
+    settings.OPENWEATHER_CALLS_PER_MINUTE = 1_000_000
+    settings.OPENWEATHER_USE_GROUP_ENDPOINT = False
+    settings.INGEST_PIPELINE_FLUSH_RECORDS = args.flush_records
+    settings.INGEST_PIPELINE_FLUSH_SECONDS = args.flush_seconds
+    cities = [f"Bench City {index}" for index in range(args.cities)]
+
+    for label, mode in (("fetch-all-then-insert", run_sequential), ("pipeline", run_pipeline)):
+        sink = SimulatedLoadJob(args.job_seconds, args.record_ms)
+        client = WeatherAPIClient(cache=WeatherResponseCache(max_entries=0))
+        try:
+            total, fetch_seconds = await mode(client, sink, cities)
+        finally:
+            await client.aclose()
+        print(f"{label:22s} total {total:6.2f}s  fetch {fetch_seconds:6.2f}s  write {sink.busy_seconds:6.2f}s "
+              f"({sink.jobs} jobs)  max(fetch, write) {max(fetch_seconds, sink.busy_seconds):6.2f}s  "
+              f"first stored {min(sink.stored_at):6.2f}s  mean stored {statistics.mean(sink.stored_at):6.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cities", type=int, default=190)
+    parser.add_argument("--latency", type=float, default=0.2, help="Mock upstream latency (s)")
+    parser.add_argument("--concurrency", type=int, default=settings.WEATHER_API_MAX_CONCURRENCY)
+    parser.add_argument("--job-seconds", type=float, default=2.0, help="Fixed cost per simulated load job")
+    parser.add_argument("--record-ms", type=float, default=1.0, help="Added cost per record in a load job")
+    parser.add_argument("--flush-records", type=int, default=settings.INGEST_PIPELINE_FLUSH_RECORDS)
+    parser.add_argument("--flush-seconds", type=float, default=settings.INGEST_PIPELINE_FLUSH_SECONDS)
+    parser.add_argument("--port", type=int, default=8767)
+    args = parser.parse_args()
+
+    with MockServer(create_mock_app(args.latency), port=args.port) as server, \
+            tempfile.TemporaryDirectory() as directory:
+        settings.CITY_ID_CACHE_PATH = os.path.join(directory, "city_ids.json")
+        asyncio.run(run(args, server.base_url))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark load job payloads: JSON rows vs Parquet
+
+For each size, encodes the same rows the way BigQueryRepository does for
+BIGQUERY_LOAD_FORMAT=json (dict rows, serialized to newline-delimited
+JSON as load_table_from_json does before upload) and =parquet (Arrow
+table written to Snappy Parquet), from both WeatherData records (hourly
+inserts) and NumPy column batches (backfill). Reports client-side
+serialization time and bytes uploaded. Server-side parse time is not
+measured.
+
+Run from the backend directory:
+    python -m benchmarks.bench_load_format --sizes 1000 10000 100000
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("OPENWEATHER_API_KEY", "benchmark")
+
+from app.models import WeatherData  # noqa: E402
+from app.repositories.load_formats import (  # noqa: E402
+    batch_to_arrow,
+    records_to_arrow,
+    records_to_json_rows,
+    to_parquet_bytes,
+)
+from app.services.backfill import generate_backfill_batches  # noqa: E402
+
+CITY_COUNT = 100
+
+
+def ndjson_bytes(rows: list[dict]) -> bytes:
+    """Same serialization load_table_from_json applies before uploading"""
+    return "\n".join(json.dumps(row, ensure_ascii=False) for row in rows).encode("utf-8")
+
+
+def sample_inputs(size: int):
+    end_time = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    baselines = [
+        WeatherData(
+            city=f"City {i}",
+            timestamp=end_time,
+            temperature=10 + i % 15,
+            humidity=40 + i % 50,
+            wind_speed=2.5 + i % 5,
+            condition="Clouds"
+        )
+        for i in range(CITY_COUNT)
+    ]
+    hours = max(1, size // CITY_COUNT)
+    start_time = end_time - timedelta(hours=hours - 1)
+    batch = next(generate_backfill_batches(baselines, start_time, end_time, hours * CITY_COUNT))
+    records = [WeatherData(**row) for row in batch.to_rows()]
+    return records, batch
+
+
+def timed(func, repeat: int):
+    result = func()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    ingested_at = datetime.now(timezone.utc)
+    for size in args.sizes:
+        records, batch = sample_inputs(size)
+        cases = {
+            "records json": lambda: ndjson_bytes(records_to_json_rows(records, ingested_at)),
+            "records parquet": lambda: to_parquet_bytes(records_to_arrow(records, ingested_at)),
+            "batch json": lambda: ndjson_bytes(batch.to_rows()),
+            "batch parquet": lambda: to_parquet_bytes(batch_to_arrow(batch, ingested_at)),
+        }
+        for name, encode in cases.items():
+            seconds, payload = timed(encode, args.repeat)
+            print(f"{len(batch):>7} rows {name:>16}: {seconds * 1000:9.1f}ms "
+                  f"{len(payload) / 1024:10.1f}KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Benchmark per-request vs application-scoped repository instances
+
+Before, every /weather request built a new BigQueryRepository (a new
+bigquery.Client with fresh auth and HTTP sessions). Now one instance is
+created in the lifespan hook and injected into every route.
+
+Without credentials this measures construction overhead only, using
+anonymous credentials. With --live (and GOOGLE_APPLICATION_CREDENTIALS
+set) it also times get_latest_weather end to end.
+
+Run from the backend directory:
+    python -m benchmarks.bench_request_overhead --requests 50 [--live --city London]
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+os.environ.setdefault("OPENWEATHER_API_KEY", "benchmark")
+
+_import_start = time.perf_counter()
+import app.main  # noqa: E402,F401
+_import_seconds = time.perf_counter() - _import_start
+
+from google.auth.credentials import AnonymousCredentials  # noqa: E402
+from google.cloud import bigquery  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.repositories.bigquery_repo import BigQueryRepository  # noqa: E402
+
+
+def build_repository(live: bool) -> BigQueryRepository:
+    if live:
+        return BigQueryRepository()
+    client = bigquery.Client(project=settings.GCP_PROJECT_ID, credentials=AnonymousCredentials())
+    return BigQueryRepository(client=client)
+
+
+async def per_request(args) -> list[float]:
+    """Previous behaviour: a new repository for every request"""
+    timings = []
+    for _ in range(args.requests):
+        start = time.perf_counter()
+        repository = build_repository(args.live)
+        if args.live:
+            await repository.get_latest_weather(args.city)
+        timings.append(time.perf_counter() - start)
+        await repository.close()
+    return timings
+
+
+async def shared(args) -> list[float]:
+    """Current behaviour: one repository reused by every request"""
+    repository = build_repository(args.live)
+    timings = []
+    try:
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            if args.live:
+                await repository.get_latest_weather(args.city)
+            timings.append(time.perf_counter() - start)
+    finally:
+        await repository.close()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--live", action="store_true", help="Query BigQuery for real")
+    parser.add_argument("--city", default="London")
+    args = parser.parse_args()
+
+    print(f"app.main import (API cold start before lifespan): {_import_seconds * 1000:.0f}ms")
+
+    start = time.perf_counter()
+    asyncio.run(build_repository(args.live).close())
+    print(f"one-time repository construction at startup: {(time.perf_counter() - start) * 1000:.1f}ms")
+
+    for label, runner in (("per-request", per_request), ("shared", shared)):
+        timings = asyncio.run(runner(args))
+        print(f"{label:>12}: mean {statistics.mean(timings) * 1000:.2f}ms, "
+              f"max {max(timings) * 1000:.2f}ms per request over {len(timings)} requests")
+
+
+if __name__ == "__main__":
+    main()
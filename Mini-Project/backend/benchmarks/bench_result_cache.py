@@ -0,0 +1,99 @@
+"""
+Benchmark the repository result cache under dashboard-style polling
+
+Loads a synthetic backfill into a temporary sqlite database, then
+simulates `--hours` hours of traffic: each hour the scheduler inserts one
+row per city, followed by `--polls` history/statistics reads spread over
+the cities with a skewed (Zipf-like) popularity. Runs once without and
+once with the result cache, reporting read throughput, median and p99
+latency, and the cache's hit ratio and memory use.
+
+Run from the backend directory:
+    python -m benchmarks.bench_result_cache --cities 100 --hours 6 --polls 2000
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("OPENWEATHER_API_KEY", "benchmark")
+
+from app.config import settings  # noqa: E402
+from app.models import WeatherData  # noqa: E402
+from app.repositories import create_repository  # noqa: E402
+from app.services.backfill import generate_backfill_batches  # noqa: E402
+
+
+def baselines(cities: int, timestamp: datetime) -> list[WeatherData]:
+    return [
+        WeatherData(
+            city=f"City {i}",
+            timestamp=timestamp,
+            temperature=10 + i % 15,
+            humidity=40 + i % 50,
+            wind_speed=2.5 + i % 5,
+            condition="Clouds"
+        )
+        for i in range(cities)
+    ]
+
+
+async def run(args, cache_bytes: int, path: str):
+    settings.SQLITE_PATH = path
+    settings.RESULT_CACHE_MAX_BYTES = cache_bytes
+    repository = create_repository("sqlite")
+    await repository.initialize_schema()
+
+    end_time = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0) - timedelta(hours=args.hours)
+    start_time = end_time - timedelta(days=args.days)
+    for batch in generate_backfill_batches(baselines(args.cities, end_time), start_time, end_time,
+                                           settings.BACKFILL_BATCH_ROWS):
+        await repository.insert_weather_batch(batch)
+
+    rng = random.Random(42)
+    weights = [1 / (rank + 1) for rank in range(args.cities)]
+    samples = []
+    started = time.perf_counter()
+    for hour in range(1, args.hours + 1):
+        await repository.insert_weather_data(baselines(args.cities, end_time + timedelta(hours=hour)))
+        for city in rng.choices(range(args.cities), weights, k=args.polls):
+            read_started = time.perf_counter()
+            if rng.random() < 0.8:
+                await repository.get_weather_history(f"City {city}", 7)
+            else:
+                await repository.get_weather_statistics(f"City {city}", 7)
+            samples.append(time.perf_counter() - read_started)
+    elapsed = time.perf_counter() - started
+
+    samples.sort()
+    label = "cached" if cache_bytes else "uncached"
+    print(f"{label:>8}: {len(samples) / elapsed:9.0f} reads/s  "
+          f"median {statistics.median(samples) * 1000:7.3f}ms  "
+          f"p99 {samples[int(len(samples) * 0.99)] * 1000:7.3f}ms")
+    cache_stats = repository.stats().get("result_cache")
+    if cache_stats:
+        print(f"          hit ratio {cache_stats['hit_ratio']:.3f}, {cache_stats['entries']} entries, "
+              f"{cache_stats['bytes'] / 1024 / 1024:.1f}MiB, {cache_stats['invalidations']} invalidations")
+    await repository.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cities", type=int, default=100)
+    parser.add_argument("--days", type=int, default=14)
+    parser.add_argument("--hours", type=int, default=6)
+    parser.add_argument("--polls", type=int, default=2000, help="Reads per simulated hour")
+    parser.add_argument("--cache-mib", type=int, default=64)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        asyncio.run(run(args, 0, os.path.join(directory, "uncached.db")))
+        asyncio.run(run(args, args.cache_mib * 1024 * 1024, os.path.join(directory, "cached.db")))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark sharded ingestion: run time per interval vs number of workers
+
+Starts the mock OpenWeatherMap server, then for each worker count spawns
+that many processes. Each registers in a shared membership database
+through ShardMembership, waits until every worker is live, and fetches
+only its consistent-hash shard of `--cities` synthetic city names with
+its own WeatherAPIClient. The interval's run time is the slowest worker's
+fetch time. Also reports shard size spread and the fraction of cities
+that move when one more worker joins.
+
+Per-worker throughput is bounded by --concurrency and --latency (the mock
+upstream latency) and the response cache and /group batching are off, so
+a single worker is the bottleneck the way it would be with thousands of
+cities.
+
+Run from the backend directory:
+    python -m benchmarks.bench_sharded_ingest --cities 2000 --workers 1 2 4 8
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import tempfile
+import time
+
+os.environ.setdefault("OPENWEATHER_API_KEY", "benchmark")
+
+from benchmarks.mock_openweather import MockServer, create_mock_app  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.services.sharding import HashRing, ShardMembership  # noqa: E402
+
+
+def configure(base_url: str, concurrency: int, directory: str):
+    settings.OPENWEATHER_BASE_URL = base_url
+    settings.WEATHER_API_MAX_CONCURRENCY = concurrency
+    settings.OPENWEATHER_BURST = concurrency
+    settings.OPENWEATHER_CALLS_PER_MINUTE = 1_000_000
+    settings.OPENWEATHER_USE_GROUP_ENDPOINT = False
+    settings.CITY_ID_CACHE_PATH = os.path.join(directory, f"city_ids-{os.getpid()}.json")
+
+
+async def ingest_shard(member_id: str, workers: int, cities: list[str], membership_path: str) -> tuple[int, float]:
+    from app.services.weather_api import WeatherAPIClient
+    from app.services.weather_cache import WeatherResponseCache
+
+    membership = ShardMembership(membership_path, member_id, ttl_seconds=30, heartbeat_seconds=5)
+    await membership.start()
+    while len(membership.live_members()) < workers:
+        await asyncio.sleep(0.05)
+
+    client = WeatherAPIClient(cache=WeatherResponseCache(max_entries=0))
+    try:
+        shard = await membership.shard(cities)
+        start = time.perf_counter()
+        fetched = await client.fetch_multiple_cities(shard)
+        elapsed = time.perf_counter() - start
+    finally:
+        await client.aclose()
+        await membership.stop()
+    return len(fetched), elapsed
+
+
+def worker_main(member_id, workers, cities, membership_path, base_url, concurrency, directory, results):
+    configure(base_url, concurrency, directory)
+    results.put(asyncio.run(ingest_shard(member_id, workers, cities, membership_path)))
+
+
+def ring_report(cities: list[str], workers: int):
+    members = [f"worker-{index}" for index in range(workers)]
+    shards = HashRing(members).assign(cities)
+    sizes = [len(shard) for shard in shards.values()]
+    grown = HashRing(members + [f"worker-{workers}"])
+    moved = sum(1 for city in cities if grown.owner(city.lower()) != HashRing(members).owner(city.lower()))
+    return min(sizes), max(sizes), moved / len(cities)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--cities", type=int, default=2000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--latency", type=float, default=0.05, help="Mock upstream latency (s)")
+    parser.add_argument("--concurrency", type=int, default=settings.WEATHER_API_MAX_CONCURRENCY)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    cities = [f"Bench City {index}" for index in range(args.cities)]
+    context = multiprocessing.get_context("spawn")
+
+    with MockServer(create_mock_app(args.latency), port=args.port) as server, \
+            tempfile.TemporaryDirectory() as directory:
+        baseline = None
+        for workers in args.workers:
+            membership_path = os.path.join(directory, f"members-{workers}.db")
+            results = context.Queue()
+            processes = [
+                context.Process(
+                    target=worker_main,
+                    args=(f"worker-{index}", workers, cities, membership_path,
+                          server.base_url, args.concurrency, directory, results)
+                )
+                for index in range(workers)
+            ]
+            for process in processes:
+                process.start()
+            outcomes = [results.get() for _ in processes]
+            for process in processes:
+                process.join()
+
+            fetched = sum(count for count, _ in outcomes)
+            run_time = max(elapsed for _, elapsed in outcomes)
+            baseline = baseline or run_time * workers
+            smallest, largest, moved = ring_report(cities, workers)
+            print(f"{workers:>2} worker(s): {fetched}/{len(cities)} cities, run time {run_time:6.2f}s "
+                  f"(speedup {baseline / run_time:4.1f}x), shard sizes {smallest}-{largest}, "
+                  f"{moved:.1%} move when one more joins")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Benchmark read latency of the repository interface on a storage backend
+
+Loads a synthetic backfill (default 100 cities x 90 days of hourly rows)
+into the selected backend, then times the calls the API and agent make:
+latest for one city, latest for every city, 7-day history, 7-day
+statistics and a 30-day daily rollup. The sqlite backend runs fully
+offline in a temporary file; --backend bigquery uses the configured
+project and needs GCP credentials (and loads into the configured table).
+
+Run from the backend directory:
+    python -m benchmarks.bench_storage_backend --backend sqlite --days 90 --cities 100
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("OPENWEATHER_API_KEY", "benchmark")
+
+from app.config import settings  # noqa: E402
+from app.models import WeatherData  # noqa: E402
+from app.repositories import create_repository  # noqa: E402
+from app.services.backfill import generate_backfill_batches  # noqa: E402
+
+
+async def timed(call, repeat: int) -> tuple[float, float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await call()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), max(samples)
+
+
+async def run(args):
+    repository = create_repository(args.backend)
+    await repository.initialize_schema()
+
+    end_time = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    start_time = end_time - timedelta(days=args.days)
+    baselines = [
+        WeatherData(
+            city=f"City {i}",
+            timestamp=end_time,
+            temperature=10 + i % 15,
+            humidity=40 + i % 50,
+            wind_speed=2.5 + i % 5,
+            condition="Clouds"
+        )
+        for i in range(args.cities)
+    ]
+
+    started = time.perf_counter()
+    rows = 0
+    for batch in generate_backfill_batches(baselines, start_time, end_time, settings.BACKFILL_BATCH_ROWS):
+        rows += await repository.insert_weather_batch(batch)
+    await repository.refresh_rollups(start_time)
+    print(f"loaded {rows} rows and rollups in {time.perf_counter() - started:.2f}s")
+
+    calls = {
+        "latest (1 city)": lambda: repository.get_latest_weather("City 7"),
+        "latest (all cities)": lambda: repository.get_latest_weather_bulk(),
+        "history 7d": lambda: repository.get_weather_history("City 7", 7),
+        "statistics 7d": lambda: repository.get_weather_statistics("City 7", 7),
+        "daily rollup 30d": lambda: repository.get_weather_rollups("City 7", 30, "daily"),
+    }
+    for name, call in calls.items():
+        median, worst = await timed(call, args.repeat)
+        print(f"{args.backend:>8} {name:>20}: median {median * 1000:8.2f}ms  max {worst * 1000:8.2f}ms")
+
+    await repository.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--backend", choices=["sqlite", "bigquery"], default="sqlite")
+    parser.add_argument("--days", type=int, default=90)
+    parser.add_argument("--cities", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    # Time the backend itself, not the result cache in front of it
+    settings.RESULT_CACHE_MAX_BYTES = 0
+    with tempfile.TemporaryDirectory() as directory:
+        if args.backend == "sqlite":
+            settings.SQLITE_PATH = os.path.join(directory, "weather.db")
+        asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Local mock of the OpenWeatherMap current weather API for benchmarks"""
+import asyncio
+import random
+import threading
+import time
+import zlib
+import uvicorn
+from fastapi import FastAPI, Query
+from fastapi.responses import JSONResponse
+
+
+def create_mock_app(latency_seconds: float = 0.05, error_rate: float = 0.0) -> FastAPI:
+    """
+    Build a mock OpenWeatherMap app
+
+    Args:
+        latency_seconds: Simulated upstream latency per request
+        error_rate: Fraction of requests answered with 429 or 503
+
+    Returns:
+        FastAPI application serving /weather and /group
+    """
+    app = FastAPI()
+    app.state.request_count = 0
+    app.state.cities_by_id = {}
+
+    def injected_error():
+        if random.random() >= error_rate:
+            return None
+        if random.random() < 0.5:
+            return JSONResponse({"cod": 429}, status_code=429, headers={"Retry-After": "1"})
+        return JSONResponse({"cod": 503}, status_code=503)
+
+    @app.get("/weather")
+    async def current_weather(q: str = Query(...)):
+        app.state.request_count += 1
+        await asyncio.sleep(latency_seconds)
+        error = injected_error()
+        if error:
+            return error
+        payload = build_payload(q)
+        app.state.cities_by_id[payload["id"]] = q
+        return payload
+
+    @app.get("/group")
+    async def group_weather(id: str = Query(...)):
+        app.state.request_count += 1
+        await asyncio.sleep(latency_seconds)
+        error = injected_error()
+        if error:
+            return error
+        ids = [int(city_id) for city_id in id.split(",")][:20]
+        items = [
+            build_payload(app.state.cities_by_id[city_id], city_id)
+            for city_id in ids
+            if city_id in app.state.cities_by_id
+        ]
+        return {"cnt": len(items), "list": items}
+
+    return app
+
+
+def build_payload(city: str, city_id: int = None) -> dict:
+    """Build a deterministic OpenWeatherMap-shaped payload for a city"""
+    seed = zlib.crc32(city.encode("utf-8"))
+    return {
+        "coord": {"lon": 0.0, "lat": 0.0},
+        "weather": [{"id": 800, "main": "Clear", "description": "clear sky", "icon": "01d"}],
+        "base": "stations",
+        "main": {"temp": 10 + seed % 20, "humidity": 40 + seed % 50},
+        "visibility": 10000,
+        "wind": {"speed": (seed % 100) / 10},
+        "clouds": {"all": 0},
+        "dt": int(time.time()) // 600 * 600,
+        "sys": {"country": "XX"},
+        "timezone": 0,
+        "id": city_id if city_id is not None else seed % 10_000_000,
+        "name": city,
+        "cod": 200
+    }
+
+
+class MockServer:
+    """Run a mock app with uvicorn on a background thread"""
+
+    def __init__(self, app: FastAPI, port: int = 8765):
+        self.app = app
+        self.port = port
+        self.server = uvicorn.Server(
+            uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning")
+        )
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join()
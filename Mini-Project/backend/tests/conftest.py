@@ -0,0 +1,47 @@
+"""Shared fixtures; settings need an API key before any app module is imported"""
+import os
+from datetime import datetime, timedelta, timezone
+
+os.environ.setdefault("OPENWEATHER_API_KEY", "test")
+
+import pytest  # noqa: E402
+from app.models import WeatherData  # noqa: E402
+
+
+@pytest.fixture
+def make_record():
+    """Factory for WeatherData rows, one hour apart by default"""
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    def make(city: str = "London", hour: int = 0, temperature: float = 10.0) -> WeatherData:
+        return WeatherData(
+            city=city,
+            timestamp=start + timedelta(hours=hour),
+            temperature=temperature,
+            humidity=50,
+            wind_speed=3.0,
+            condition="clear sky"
+        )
+
+    return make
+
+
+class RecordingRepository:
+    """Stand-in repository that keeps inserted rows and can be told to fail"""
+
+    def __init__(self):
+        self.rows = []
+        self.loads = 0
+        self.fail_with = None
+
+    async def insert_weather_data(self, weather_records):
+        if self.fail_with is not None:
+            raise self.fail_with
+        self.loads += 1
+        self.rows.extend(weather_records)
+        return len(weather_records)
+
+
+@pytest.fixture
+def repository():
+    return RecordingRepository()
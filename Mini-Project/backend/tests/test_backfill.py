@@ -0,0 +1,40 @@
+"""BackfillCheckpoint resume points from backfill batches and real observations"""
+from datetime import datetime, timedelta, timezone
+
+from app.services.backfill import BackfillCheckpoint
+
+START = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def test_backfill_batches_advance_the_checkpoint(tmp_path):
+    checkpoint = BackfillCheckpoint(str(tmp_path / "checkpoint.json"))
+    assert checkpoint.resume_from("London", START) == START
+
+    checkpoint.advance(["London", "Paris"], START + timedelta(hours=5))
+    reloaded = BackfillCheckpoint(str(tmp_path / "checkpoint.json"))
+    assert reloaded.resume_from(" london ", START) == START + timedelta(hours=6)
+    assert reloaded.resume_from("Berlin", START) == START
+
+
+def test_real_observations_cover_their_hour(tmp_path, make_record):
+    checkpoint = BackfillCheckpoint(str(tmp_path / "checkpoint.json"))
+    checkpoint.advance(["London"], START + timedelta(hours=2))
+
+    observation = make_record("London", 7).model_copy(
+        update={"timestamp": START + timedelta(hours=7, minutes=47)}
+    )
+    checkpoint.record_observations([observation, make_record("London", 3)])
+
+    # A restart resumes after the real observation's hour instead of re-synthesizing it
+    assert BackfillCheckpoint(str(tmp_path / "checkpoint.json")).resume_from("London", START) == START + timedelta(hours=8)
+
+
+def test_checkpoint_never_moves_backwards(tmp_path, make_record):
+    path = str(tmp_path / "checkpoint.json")
+    first, second = BackfillCheckpoint(path), BackfillCheckpoint(path)
+    first.advance(["London"], START + timedelta(hours=10))
+    second.record_observations([make_record("London", 4), make_record("Paris", 4)])
+
+    merged = BackfillCheckpoint(path)
+    assert merged.resume_from("London", START) == START + timedelta(hours=11)
+    assert merged.resume_from("Paris", START) == START + timedelta(hours=5)
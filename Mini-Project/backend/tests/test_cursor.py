@@ -0,0 +1,53 @@
+"""History page cursors: round-trip and rejection of edited cursors"""
+import base64
+from datetime import datetime, timezone
+
+import pytest
+from app.models import _cursor_check, decode_history_cursor, encode_history_cursor, weather_record_id
+
+TIMESTAMP = datetime(2024, 5, 1, 12, 30, 15, 250, tzinfo=timezone.utc)
+RECORD_ID = weather_record_id("London", TIMESTAMP)
+
+
+def encode_raw(text: str) -> str:
+    return base64.urlsafe_b64encode(text.encode()).decode().rstrip("=")
+
+
+def test_cursor_round_trip():
+    cursor = encode_history_cursor(TIMESTAMP, RECORD_ID)
+    assert decode_history_cursor(cursor) == (TIMESTAMP, RECORD_ID)
+    assert "=" not in cursor
+
+
+def test_naive_timestamps_are_treated_as_utc():
+    cursor = encode_history_cursor(TIMESTAMP.replace(tzinfo=None), RECORD_ID)
+    assert decode_history_cursor(cursor) == (TIMESTAMP, RECORD_ID)
+
+
+def test_edited_cursor_is_rejected():
+    decoded = base64.urlsafe_b64decode(encode_history_cursor(TIMESTAMP, RECORD_ID) + "==").decode()
+    timestamp_us, rest = decoded.split(":", 1)
+    # Same layout and a valid check digest for the original, but a different position
+    edited = encode_raw(f"{int(timestamp_us) + 1}:{rest}")
+    with pytest.raises(ValueError):
+        decode_history_cursor(edited)
+
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "not a cursor!",
+    encode_history_cursor(TIMESTAMP, RECORD_ID)[:-4],
+    encode_raw(f"1714566615000250:{RECORD_ID}"),  # Pre-checksum format
+    encode_raw("1714566615000250:not-a-uuid:00000000"),
+])
+def test_malformed_cursor_is_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_history_cursor(cursor)
+
+
+def test_out_of_range_timestamp_is_rejected():
+    # Even with a matching check digest, a timestamp past datetime's range is a ValueError
+    payload = f"{10 ** 20}:{RECORD_ID}"
+    cursor = encode_raw(f"{payload}:{_cursor_check(payload)}")
+    with pytest.raises(ValueError):
+        decode_history_cursor(cursor)
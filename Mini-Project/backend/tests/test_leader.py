@@ -0,0 +1,127 @@
+"""SQLiteLease expiry and takeover, and LeaderElector's single-leader invariant"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.services.leader import LeaderElector, SQLiteLease
+
+
+def make_lease(tmp_path, holder_id, ttl_seconds=5.0):
+    return SQLiteLease(str(tmp_path / "lease.db"), name="test", holder_id=holder_id, ttl_seconds=ttl_seconds)
+
+
+def test_lease_is_exclusive_until_released(tmp_path):
+    first, second = make_lease(tmp_path, "first"), make_lease(tmp_path, "second")
+
+    assert first.try_acquire()
+    assert first.try_acquire()  # Re-acquiring our own lease renews it
+    assert not second.try_acquire()
+    assert second.current_holder() == "first"
+
+    first.release()
+    assert first.current_holder() is None
+    assert second.try_acquire()
+    assert not first.renew()
+
+
+def test_expired_lease_is_taken_over(tmp_path):
+    first, second = make_lease(tmp_path, "first", ttl_seconds=0.2), make_lease(tmp_path, "second")
+
+    assert first.try_acquire()
+    assert not second.try_acquire()
+    time.sleep(0.3)
+
+    assert first.current_holder() is None
+    assert second.try_acquire()
+    assert not first.renew()  # The old holder learns it lost the lease
+    assert not first.try_acquire()
+
+
+def test_concurrent_acquires_elect_exactly_one_holder(tmp_path):
+    leases = [make_lease(tmp_path, f"holder-{index}") for index in range(8)]
+    leases[0].try_acquire()
+    leases[0].release()  # Create the database before the race
+
+    with ThreadPoolExecutor(max_workers=len(leases)) as pool:
+        results = list(pool.map(lambda lease: lease.try_acquire(), leases))
+
+    assert results.count(True) == 1
+    winner = leases[results.index(True)]
+    assert winner.current_holder() == winner.holder_id
+
+
+class Candidate:
+    def __init__(self, tmp_path, name, ttl_seconds=0.5, heartbeat_seconds=0.05):
+        self.running = False
+        self.elector = LeaderElector(
+            make_lease(tmp_path, name, ttl_seconds),
+            heartbeat_seconds=heartbeat_seconds,
+            on_elected=self._start,
+            on_demoted=self._stop
+        )
+
+    async def _start(self):
+        self.running = True
+
+    async def _stop(self):
+        self.running = False
+
+
+def test_only_one_elector_leads_and_a_successor_takes_over(tmp_path):
+    async def scenario():
+        candidates = [Candidate(tmp_path, f"worker-{index}") for index in range(3)]
+        for candidate in candidates:
+            candidate.elector.start()
+
+        leaders_seen = set()
+        for _ in range(20):
+            await asyncio.sleep(0.03)
+            leading = [candidate for candidate in candidates if candidate.elector.is_leader]
+            assert len(leading) <= 1
+            assert [candidate for candidate in candidates if candidate.running] == leading
+            leaders_seen.update(id(candidate) for candidate in leading)
+        assert len(leaders_seen) == 1
+
+        leader = next(candidate for candidate in candidates if candidate.elector.is_leader)
+        await leader.elector.stop()  # Releases the lease: a successor is elected right away
+        assert not leader.running
+
+        successor = None
+        for _ in range(40):
+            await asyncio.sleep(0.03)
+            leading = [candidate for candidate in candidates if candidate.elector.is_leader]
+            assert len(leading) <= 1
+            if leading:
+                successor = leading[0]
+                break
+        for candidate in candidates:
+            await candidate.elector.stop()
+        return leader, successor
+
+    leader, successor = asyncio.run(scenario())
+    assert successor is not None and successor is not leader
+    assert successor.elector.elections == 1
+
+
+def test_stalled_leader_is_replaced_after_the_ttl(tmp_path):
+    async def scenario():
+        stalled = Candidate(tmp_path, "stalled", ttl_seconds=0.3)
+        standby = Candidate(tmp_path, "standby", ttl_seconds=0.3)
+        stalled.elector.start()
+        while not stalled.elector.is_leader:
+            await asyncio.sleep(0.01)
+
+        # Stop renewing without releasing, as if the process hung
+        stalled.elector._task.cancel()
+        standby.elector.start()
+        await asyncio.sleep(0.1)
+        assert not standby.elector.is_leader
+
+        started = time.monotonic()
+        while not standby.elector.is_leader and time.monotonic() - started < 3:
+            await asyncio.sleep(0.02)
+        elected = standby.elector.is_leader
+        await standby.elector.stop()
+        return elected
+
+    assert asyncio.run(scenario())
@@ -0,0 +1,96 @@
+"""ReplicaSynchronizer: one syncing process per host, shared freshness and watermark"""
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from app.repositories import replicated_repo
+from app.repositories.replicated_repo import ReplicaSynchronizer
+from app.repositories.sqlite_repo import SQLiteRepository
+from app.services.leader import SQLiteLease
+
+
+class FakePrimary:
+    """Stands in for BigQuery's change feed; counts the queries each process makes"""
+
+    def __init__(self, records):
+        loaded = datetime.now(timezone.utc) - timedelta(minutes=5)
+        self.changes = [(record, loaded + timedelta(seconds=index)) for index, record in enumerate(records)]
+        self.queries = 0
+
+    async def read_changes(self, after_ingested_at, after_id, since, limit):
+        self.queries += 1
+        return [
+            (record, ingested_at) for record, ingested_at in self.changes
+            if after_ingested_at is None or (ingested_at, record.id) > (after_ingested_at, after_id)
+        ][:limit]
+
+
+def make_synchronizer(tmp_path, primary, holder_id):
+    return ReplicaSynchronizer(
+        primary,
+        SQLiteRepository(str(tmp_path / "replica.db")),
+        state_path=str(tmp_path / "replica_state.json"),
+        interval_seconds=60,
+        max_staleness_seconds=60,
+        overlap_seconds=0,
+        batch_rows=100,
+        retention_days=3650,
+        lease=SQLiteLease(str(tmp_path / "lease.db"), name="replica_sync", holder_id=holder_id, ttl_seconds=5),
+        lease_heartbeat_seconds=0.05
+    )
+
+
+@pytest.fixture(autouse=True)
+def recheck_state_immediately(monkeypatch):
+    monkeypatch.setattr(replicated_repo, "STATE_RECHECK_SECONDS", 0.0)
+
+
+def test_only_the_lease_holder_syncs_and_the_others_share_its_freshness(tmp_path, make_record):
+    primary = FakePrimary([make_record("London", hour) for hour in range(5)])
+
+    async def scenario():
+        synchronizers = [make_synchronizer(tmp_path, primary, f"worker-{index}") for index in range(3)]
+        await synchronizers[0].replica.initialize_schema()
+        assert not any(synchronizer.is_fresh() for synchronizer in synchronizers)
+
+        for synchronizer in synchronizers:
+            synchronizer.start()
+        for _ in range(100):
+            await asyncio.sleep(0.02)
+            if all(synchronizer.is_fresh() for synchronizer in synchronizers):
+                break
+        syncing = [synchronizer.syncing for synchronizer in synchronizers]
+        fresh = [synchronizer.is_fresh() for synchronizer in synchronizers]
+        rows = len(await synchronizers[1].replica.get_weather_history("London", 3650))
+        for synchronizer in synchronizers:
+            await synchronizer.stop()
+            await synchronizer.replica.close()
+        return syncing, fresh, rows
+
+    syncing, fresh, rows = asyncio.run(scenario())
+    assert syncing.count(True) == 1
+    assert fresh == [True, True, True]
+    assert rows == 5
+    assert primary.queries == 1  # One sync, not one per process
+    assert sorted(path.name for path in tmp_path.glob("replica_state.json*")) == [
+        "replica_state.json", "replica_state.json.lock"
+    ]
+
+
+def test_new_syncer_continues_from_the_shared_watermark(tmp_path, make_record):
+    primary = FakePrimary([make_record("London", hour) for hour in range(3)])
+
+    async def scenario():
+        first = make_synchronizer(tmp_path, primary, "first")
+        await first.replica.initialize_schema()
+        assert await first.sync_once() == 3
+
+        primary.changes.append((make_record("London", 3), datetime.now(timezone.utc)))
+        second = make_synchronizer(tmp_path, primary, "second")
+        rows = await second.sync_once()
+        await first.replica.close()
+        await second.replica.close()
+        return rows
+
+    # The row at the watermark (re-read at the overlap boundary) and the new one, not all four
+    assert asyncio.run(scenario()) == 2
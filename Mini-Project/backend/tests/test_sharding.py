@@ -0,0 +1,140 @@
+"""Consistent-hash ring assignment, ShardMembership registration and the per-worker quota share"""
+import asyncio
+from types import SimpleNamespace
+
+from app.config import settings
+from app.scheduler import WeatherScheduler
+from app.services.latest_store import LatestObservationStore
+from app.services.rate_limiter import TokenBucket
+from app.services.sharding import HashRing, ShardMembership
+
+CITIES = [f"City {index}" for index in range(400)]
+
+
+def make_member(tmp_path, member_id, ttl_seconds=30.0):
+    return ShardMembership(
+        str(tmp_path / "members.db"),
+        member_id=member_id,
+        ttl_seconds=ttl_seconds,
+        heartbeat_seconds=60.0
+    )
+
+
+def owners(ring):
+    return {city: member for member, cities in ring.assign(CITIES).items() for city in cities}
+
+
+def test_ring_assigns_every_city_exactly_once():
+    shards = HashRing(["a", "b", "c"]).assign(CITIES)
+
+    assigned = [city for cities in shards.values() for city in cities]
+    assert sorted(assigned) == sorted(CITIES)
+    assert all(len(cities) > len(CITIES) / 3 * 0.6 for cities in shards.values())
+
+
+def test_ring_lookup_ignores_case_and_spacing():
+    ring = HashRing(["a", "b", "c"])
+    assert ring.owner("new york") == HashRing(["c", "a", "b"]).owner("new york")
+    shards = ring.assign(["New  York", " new york"])
+    assert sum(len(cities) for cities in shards.values()) == 2
+    assert len([cities for cities in shards.values() if cities]) == 1
+
+
+def test_adding_a_member_moves_only_its_share():
+    before = owners(HashRing(["a", "b", "c"]))
+    after = owners(HashRing(["a", "b", "c", "d"]))
+
+    moved = [city for city in CITIES if before[city] != after[city]]
+    assert all(after[city] == "d" for city in moved)
+    assert len(CITIES) * 0.15 < len(moved) < len(CITIES) * 0.35
+
+
+def test_duplicate_member_id_is_refused_while_the_first_is_live(tmp_path):
+    first, duplicate = make_member(tmp_path, "worker-1"), make_member(tmp_path, "worker-1")
+
+    assert first.heartbeat()
+    assert not duplicate.heartbeat()
+    assert first.heartbeat()  # The original keeps renewing
+
+    first.leave()
+    assert duplicate.heartbeat()
+    assert not first.heartbeat()
+
+
+def test_expired_member_id_can_be_reused(tmp_path):
+    first = make_member(tmp_path, "worker-1", ttl_seconds=-1.0)  # Expires as soon as it registers
+    assert first.heartbeat()
+    assert make_member(tmp_path, "worker-1").heartbeat()
+
+
+def test_unregistered_member_gets_an_empty_shard(tmp_path):
+    async def scenario():
+        first, duplicate = make_member(tmp_path, "worker-1"), make_member(tmp_path, "worker-1")
+        await first.start()
+        await duplicate.start()
+        shard = await duplicate.shard(CITIES)
+        await duplicate.stop()
+        await first.stop()
+        return shard
+
+    assert asyncio.run(scenario()) == []
+
+
+def test_shards_rebalance_when_members_join_and_leave(tmp_path):
+    async def scenario():
+        a, b = make_member(tmp_path, "worker-a"), make_member(tmp_path, "worker-b")
+        await a.start()
+        alone = await a.shard(CITIES)
+
+        await b.start()
+        shard_a, shard_b = await a.shard(CITIES), await b.shard(CITIES)
+
+        await b.stop()
+        after_leave = await a.shard(CITIES)
+        await a.stop()
+        return alone, shard_a, shard_b, after_leave, a.rebalances
+
+    alone, shard_a, shard_b, after_leave, rebalances = asyncio.run(scenario())
+    assert alone == CITIES
+    assert not set(shard_a) & set(shard_b)
+    assert sorted(shard_a + shard_b) == sorted(CITIES)
+    assert after_leave == CITIES
+    assert rebalances == 2
+
+
+def test_sharded_workers_split_the_account_quota(tmp_path, monkeypatch, repository):
+    monkeypatch.setattr(settings, "INGEST_SHARDING_ENABLED", True)
+    monkeypatch.setattr(settings, "INGEST_MEMBERSHIP_PATH", str(tmp_path / "members.db"))
+    monkeypatch.setattr(settings, "ADAPTIVE_POLLING_ENABLED", True)
+    monkeypatch.setattr(settings, "OPENWEATHER_CALLS_PER_MINUTE", 60)
+    monkeypatch.setattr(settings, "ADAPTIVE_POLL_MAX_POLLS_PER_HOUR", 600.0)
+    monkeypatch.setattr(settings, "BACKFILL_CHECKPOINT_PATH", str(tmp_path / "checkpoint.json"))
+
+    def make_scheduler(member_id):
+        monkeypatch.setattr(settings, "INGEST_MEMBER_ID", member_id)
+        client = SimpleNamespace(rate_limiter=TokenBucket(settings.OPENWEATHER_CALLS_PER_MINUTE))
+        return WeatherScheduler(repository, client, LatestObservationStore(max_age_seconds=3900))
+
+    def budget(scheduler):
+        return round(scheduler.weather_client.rate_limiter.rate * 60, 6), scheduler.poll_planner.max_polls_per_hour
+
+    async def scenario():
+        a, b = make_scheduler("worker-a"), make_scheduler("worker-b")
+        await a.membership.start()
+        await a.assigned_cities()
+        alone = budget(a)
+
+        await b.membership.start()
+        await a.assigned_cities()
+        await b.assigned_cities()
+        shared = budget(a), budget(b)
+
+        await b.membership.stop()
+        await a.assigned_cities()
+        await a.membership.stop()
+        return alone, shared, budget(a)
+
+    alone, shared, after_leave = asyncio.run(scenario())
+    assert alone == (60, 600)
+    assert shared == ((30, 300), (30, 300))
+    assert after_leave == (60, 600)
@@ -0,0 +1,208 @@
+"""WriteAheadSpool segment ownership and SpoolFlusher draining"""
+import asyncio
+import multiprocessing
+from pathlib import Path
+
+import pytest
+from app.services.spool import SpoolFlusher, WriteAheadSpool
+
+
+def make_flusher(spool, repository, **kwargs):
+    return SpoolFlusher(
+        spool,
+        repository,
+        batch_records=kwargs.pop("batch_records", 1000),
+        interval_seconds=60,
+        backoff_base_seconds=0.01,
+        backoff_max_seconds=0.05,
+        **kwargs
+    )
+
+
+def segment_files(directory):
+    return sorted(path.name for path in Path(directory).glob("segment-*"))
+
+
+def test_flush_loads_spooled_records_and_deletes_segments(tmp_path, make_record, repository):
+    async def scenario():
+        spool = WriteAheadSpool(str(tmp_path), segment_max_bytes=1)
+        flushed = []
+
+        async def on_flushed(records):
+            flushed.extend(records)
+
+        flusher = make_flusher(spool, repository, on_flushed=on_flushed)
+        await spool.append([make_record("London", 0), make_record("Paris", 0)])
+        await spool.append([make_record("London", 1)])  # Over segment_max_bytes: a second segment
+        assert len(segment_files(tmp_path)) == 2
+
+        assert await flusher.flush() == 3
+        return flushed
+
+    flushed = asyncio.run(scenario())
+    assert [record.id for record in repository.rows] == [record.id for record in flushed]
+    assert len(repository.rows) == 3
+    assert repository.loads == 1  # Both segments went out as one batch
+    assert segment_files(tmp_path) == []
+
+
+def test_active_segment_cannot_be_claimed_until_sealed(tmp_path, make_record):
+    async def scenario():
+        spool = WriteAheadSpool(str(tmp_path), segment_max_bytes=1 << 20)
+        await spool.append([make_record()])
+        assert spool.claim_next() is None
+
+        await spool.seal()
+        claimed = spool.claim_next()
+        assert claimed is not None and claimed.suffix == ".claimed"
+        assert [record.city for record in spool.read_segment(claimed)] == ["London"]
+
+        # A second spool on the same directory (another process's flusher) can't take it
+        other = WriteAheadSpool(str(tmp_path), segment_max_bytes=1 << 20)
+        assert other.claim_next() is None
+
+        spool.remove([claimed])
+        assert not claimed.exists()
+        assert other.claim_next() is None
+
+    asyncio.run(scenario())
+
+
+def test_released_claim_is_claimed_again(tmp_path, make_record):
+    async def scenario():
+        spool = WriteAheadSpool(str(tmp_path), segment_max_bytes=1 << 20)
+        await spool.append([make_record()])
+        await spool.seal()
+        claimed = spool.claim_next()
+        spool.release([claimed])
+
+        other = WriteAheadSpool(str(tmp_path), segment_max_bytes=1 << 20)
+        assert other.claim_next() == claimed
+
+    asyncio.run(scenario())
+
+
+def test_failed_load_keeps_segments_for_retry(tmp_path, make_record, repository):
+    async def scenario():
+        spool = WriteAheadSpool(str(tmp_path), segment_max_bytes=1 << 20)
+        flusher = make_flusher(spool, repository)
+        await spool.append([make_record("London"), make_record("Paris")])
+
+        repository.fail_with = RuntimeError("load job failed")
+        with pytest.raises(RuntimeError):
+            await flusher.flush()
+        assert segment_files(tmp_path) == ["segment-000000000001.claimed"]
+
+        repository.fail_with = None
+        assert await flusher.flush() == 2
+
+    asyncio.run(scenario())
+    assert segment_files(tmp_path) == []
+
+
+def test_torn_final_line_is_skipped(tmp_path, make_record, repository):
+    good = [make_record("London", 0), make_record("Paris", 0)]
+    segment = tmp_path / "segment-000000000001.ndjson"
+    data = b"".join(record.model_dump_json().encode() + b"\n" for record in good)
+    torn = make_record("Berlin", 0).model_dump_json().encode()[:25]
+    segment.write_bytes(data + torn)
+
+    assert [record.city for record in WriteAheadSpool.read_segment(segment)] == ["London", "Paris"]
+
+    async def scenario():
+        spool = WriteAheadSpool(str(tmp_path), segment_max_bytes=1 << 20)
+        return await make_flusher(spool, repository).flush()
+
+    assert asyncio.run(scenario()) == 2
+    assert segment_files(tmp_path) == []
+
+
+def test_new_segments_follow_claimed_ones(tmp_path, make_record):
+    async def scenario():
+        spool = WriteAheadSpool(str(tmp_path), segment_max_bytes=1 << 20)
+        await spool.append([make_record()])
+        await spool.seal()
+        spool.claim_next()
+        await spool.append([make_record("Paris")])
+        await spool.close()
+
+    asyncio.run(scenario())
+    assert segment_files(tmp_path) == ["segment-000000000001.claimed", "segment-000000000002.ndjson"]
+
+
+def test_orphan_directories_are_drained(tmp_path, make_record, repository):
+    own = tmp_path / "worker-a"
+    departed = tmp_path / "worker-b"
+
+    async def scenario():
+        left_behind = WriteAheadSpool(str(departed), segment_max_bytes=1 << 20)
+        await left_behind.append([make_record("Paris")])
+        await left_behind.close()
+
+        async def orphan_directories():
+            return [departed]
+
+        spool = WriteAheadSpool(str(own), segment_max_bytes=1 << 20)
+        await spool.append([make_record("London")])
+        flusher = make_flusher(spool, repository, orphan_directories=orphan_directories)
+        assert await flusher.flush() == 2
+        return flusher.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["orphan_records"] == 1
+    assert sorted(record.city for record in repository.rows) == ["London", "Paris"]
+    assert segment_files(departed) == []
+
+
+def _append_and_hold(directory, appended, release):
+    """Child process: append to a shared spool and keep the segment active until told to stop"""
+    from datetime import datetime, timezone
+    from app.models import WeatherData
+
+    async def run():
+        spool = WriteAheadSpool(directory, segment_max_bytes=1 << 20)
+        await spool.append([
+            WeatherData(
+                city=f"City {index}",
+                timestamp=datetime(2024, 1, 1, tzinfo=timezone.utc),
+                temperature=1.0,
+                humidity=10,
+                wind_speed=1.0,
+                condition="clear sky"
+            )
+            for index in range(5)
+        ])
+        appended.set()
+        await asyncio.get_running_loop().run_in_executor(None, release.wait, 30)
+        await spool.close()
+
+    asyncio.run(run())
+
+
+def test_flusher_in_another_process_never_takes_an_active_segment(tmp_path, repository):
+    context = multiprocessing.get_context("spawn")
+    appended, release = context.Event(), context.Event()
+    writer = context.Process(target=_append_and_hold, args=(str(tmp_path), appended, release))
+    writer.start()
+    try:
+        assert appended.wait(30)
+
+        async def flush():
+            spool = WriteAheadSpool(str(tmp_path), segment_max_bytes=1 << 20)
+            return await make_flusher(spool, repository).flush()
+
+        # The writer still holds its segment: a standby's flush must leave it alone
+        assert asyncio.run(flush()) == 0
+        assert segment_files(tmp_path) == ["segment-000000000001.ndjson"]
+
+        release.set()
+        writer.join(30)
+        assert writer.exitcode == 0
+        assert asyncio.run(flush()) == 5
+    finally:
+        release.set()
+        writer.join(5)
+        if writer.is_alive():
+            writer.kill()
+    assert len(repository.rows) == 5
+    assert segment_files(tmp_path) == []
@@ -0,0 +1,132 @@
+"""WeatherResponseCache request coalescing and cancellation"""
+import asyncio
+from datetime import datetime, timezone
+
+import pytest
+from app.models import WeatherData
+from app.services.weather_cache import WeatherResponseCache
+
+
+def current_observation(city: str = "London") -> WeatherData:
+    return WeatherData(
+        city=city,
+        timestamp=datetime.now(timezone.utc),
+        temperature=12.0,
+        humidity=60,
+        wind_speed=4.0,
+        condition="few clouds"
+    )
+
+
+class SlowFetch:
+    """Upstream stand-in that blocks until released and counts calls"""
+
+    def __init__(self, result=None, error=None):
+        self.calls = 0
+        self.release = asyncio.Event()
+        self.result = result
+        self.error = error
+
+    async def __call__(self):
+        self.calls += 1
+        await self.release.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result if self.result is not None else current_observation()
+
+
+def test_concurrent_misses_share_one_fetch():
+    async def scenario():
+        cache = WeatherResponseCache()
+        fetch = SlowFetch()
+        waiters = [asyncio.create_task(cache.get_or_fetch("London", fetch)) for _ in range(10)]
+        await asyncio.sleep(0)
+        fetch.release.set()
+        results = await asyncio.gather(*waiters)
+        cached = await cache.get_or_fetch(" LONDON ", fetch)
+        return cache, fetch, results, cached
+
+    cache, fetch, results, cached = asyncio.run(scenario())
+    assert fetch.calls == 1
+    assert all(result is results[0] for result in results)
+    assert cached is results[0]
+    assert (cache.misses, cache.coalesced, cache.hits) == (1, 9, 1)
+    assert cache.stats()["inflight"] == 0
+
+
+def test_failed_fetch_reaches_every_waiter_and_is_not_cached():
+    async def scenario():
+        cache = WeatherResponseCache()
+        fetch = SlowFetch(error=RuntimeError("upstream down"))
+        waiters = [asyncio.create_task(cache.get_or_fetch("London", fetch)) for _ in range(3)]
+        await asyncio.sleep(0)
+        fetch.release.set()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        return cache, results
+
+    cache, results = asyncio.run(scenario())
+    assert all(isinstance(result, RuntimeError) for result in results)
+    assert cache.get("London") is None
+
+
+def test_cancelled_follower_does_not_cancel_the_shared_fetch():
+    async def scenario():
+        cache = WeatherResponseCache()
+        fetch = SlowFetch()
+        leader = asyncio.create_task(cache.get_or_fetch("London", fetch))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(cache.get_or_fetch("London", fetch))
+        await asyncio.sleep(0)
+
+        follower.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        fetch.release.set()
+        return fetch, await leader
+
+    fetch, result = asyncio.run(scenario())
+    assert fetch.calls == 1
+    assert result.city == "London"
+
+
+def test_followers_fetch_for_themselves_when_the_leader_is_cancelled():
+    async def scenario():
+        cache = WeatherResponseCache()
+        fetch = SlowFetch()
+        leader = asyncio.create_task(cache.get_or_fetch("London", fetch))
+        await asyncio.sleep(0)
+        followers = [asyncio.create_task(cache.get_or_fetch("London", fetch)) for _ in range(3)]
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        fetch.release.set()
+        return cache, fetch, await asyncio.gather(*followers)
+
+    cache, fetch, results = asyncio.run(scenario())
+    assert all(result.city == "London" for result in results)
+    assert fetch.calls == 2  # The cancelled leader's fetch, then one shared retry
+    assert cache.stats()["inflight"] == 0
+
+
+def test_entries_expire_from_observation_time():
+    cache = WeatherResponseCache(refresh_seconds=600, min_ttl_seconds=0)
+    stale = current_observation().model_copy(update={"timestamp": datetime(2024, 1, 1, tzinfo=timezone.utc)})
+    cache.put("London", stale)
+    assert cache.get("London") is None
+
+    cache.put("Paris", current_observation("Paris"))
+    assert cache.get("paris").city == "Paris"
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = WeatherResponseCache(max_entries=2)
+    for city in ("London", "Paris"):
+        cache.put(city, current_observation(city))
+    cache.get("London")
+    cache.put("Berlin", current_observation("Berlin"))
+
+    assert cache.get("Paris") is None
+    assert cache.get("London") is not None
+    assert cache.evictions == 1
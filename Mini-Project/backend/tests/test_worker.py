@@ -0,0 +1,18 @@
+"""Standalone worker: a taken metrics port doesn't stop the worker"""
+import asyncio
+import socket
+
+import uvicorn
+from fastapi import FastAPI
+from app.worker import serve_metrics
+
+
+def test_metrics_port_in_use_disables_metrics_only():
+    with socket.socket() as taken:
+        taken.bind(("127.0.0.1", 0))
+        taken.listen()
+        port = taken.getsockname()[1]
+        server = uvicorn.Server(uvicorn.Config(FastAPI(), host="127.0.0.1", port=port, log_config=None))
+
+        # Would raise SystemExit out of the event loop if it weren't caught
+        asyncio.run(asyncio.wait_for(serve_metrics(server), 10))
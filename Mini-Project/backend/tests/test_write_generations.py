@@ -0,0 +1,67 @@
+"""SharedWriteGenerations: standby processes drop cached reads of cities another process wrote"""
+import asyncio
+from datetime import datetime, timezone
+
+from app.models import WeatherData
+from app.repositories.sqlite_repo import SQLiteRepository
+from app.services.latest_store import LatestObservationStore
+from app.services.write_generations import ROLLUPS_SCOPE, SharedWriteGenerations
+
+
+def make_generations(tmp_path, holder_id, on_remote_writes=None):
+    return SharedWriteGenerations(
+        str(tmp_path / "lease.db"), holder_id=holder_id, poll_seconds=60, on_remote_writes=on_remote_writes
+    )
+
+
+def test_only_other_processes_writes_are_reported(tmp_path):
+    leader, standby = make_generations(tmp_path, "leader"), make_generations(tmp_path, "standby")
+    leader.publish(["paris"])
+    assert standby.remote_changes() == []  # Written before the standby started reading
+
+    leader.publish(["london", "paris"])
+    leader.publish([ROLLUPS_SCOPE])
+    assert sorted(standby.remote_changes()) == [ROLLUPS_SCOPE, "london", "paris"]
+    assert standby.remote_changes() == []
+
+    assert leader.remote_changes() == []
+    standby.publish(["berlin"])
+    assert leader.remote_changes() == ["berlin"]  # Its own writes are skipped
+
+
+def test_standby_latest_store_reloads_a_city_the_leader_wrote(tmp_path, make_record):
+    store = LatestObservationStore(max_age_seconds=3900)
+
+    async def drop(scopes):
+        store.invalidate(scopes)
+
+    leader = make_generations(tmp_path, "leader")
+    standby = make_generations(tmp_path, "standby", on_remote_writes=drop)
+
+    async def scenario():
+        repository = SQLiteRepository(str(tmp_path / "weather.db"))
+        await repository.initialize_schema()
+        await standby.poll()
+        store.update([make_record("London", 0)])
+        generation = store.generation(["London"])
+
+        # Recent enough for the repository's latest-observation lookback
+        newer = WeatherData(
+            city="London",
+            timestamp=datetime.now(timezone.utc).replace(microsecond=0),
+            temperature=12.0,
+            humidity=50,
+            wind_speed=3.0,
+            condition="light rain"
+        )
+        await repository.insert_weather_data([newer])
+        leader.publish(["london"])
+        await standby.poll()
+
+        assert store.get("London") is None
+        assert store.generation(["London"]) != generation  # ETags over London change too
+        assert (await store.get_or_load("London", repository)).id == newer.id
+        await repository.close()
+
+    asyncio.run(scenario())
+    assert store.stale_reads == 1
@@ -84,6 +84,14 @@ export const weatherApi = {
     return response.data;
   },
 
+  async getLatestWeatherBulk(cities?: string[]): Promise<WeatherData[]> {
+    const response = await axios.get<WeatherData[]>(`${API_URL}/weather/latest`, {
+      params: cities ? { cities } : undefined,
+      paramsSerializer: { indexes: null },
+    });
+    return response.data;
+  },
+
   async getWeatherHistory(city: string, days?: number): Promise<WeatherHistoryResponse> {
     const params = days ? `?days=${days}` : '';
     const response = await axios.get<WeatherHistoryResponse>(